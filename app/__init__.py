@@ -1,21 +1,59 @@
+import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
 from config import Config
+from app.models.routing import RoutingSession, configure_engines, init_routing
 
-db           = SQLAlchemy()
+db           = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 bcrypt        = Bcrypt()
 
+log = logging.getLogger(__name__)
+
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Logging before anything logs; the request id hook runs first
+    from app.monitoring.logs import init_logging
+    init_logging(app)
+
+    # Phase timings next, so every later before_request hook is timed
+    from app.monitoring.timing import init_timing
+    init_timing(app)
+
     # Init extensions
+    configure_engines(app)
     db.init_app(app)
+    init_routing(app, db)
     bcrypt.init_app(app)
+
+    from app.audit.sink import audit_sink
+    audit_sink.init_app(app)
+
+    from app.requests.jobs import issuance_workers
+    issuance_workers.init_app(app)
+
+    from app.requests.policy import approval_policy
+    approval_policy.init_app(app)
+
+    from app.ca.renewal import renewal_scheduler
+    renewal_scheduler.init_app(app)
+
+    from app.crypto.key_store import key_store
+    key_store.init_app(app)
+
+    from app.ca.pkcs12 import pkcs12_bundles
+    pkcs12_bundles.init_app(app)
+
+    from app.ca.signing import init_signing
+    init_signing(app)
+
+    from app.monitoring.metrics import init_metrics
+    init_metrics(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
@@ -26,12 +64,38 @@ def create_app():
     for folder in [Config.ROOT_CA_DIR, Config.INTERMEDIATE_DIR, Config.ISSUED_DIR]:
         os.makedirs(folder, exist_ok=True)
 
-    # User loader for flask-login
+    # User loader for flask-login — one query per request, role from the auth cache
+    from sqlalchemy.orm import joinedload
     from app.auth.models import User
+    from app.auth.cache import user_cache, auth_queries, init_auth_cache
+    init_auth_cache(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        user_id = int(user_id)
+        cached  = user_cache.get(user_id)
+        if cached is not None and not cached.is_active:
+            return None
+        with auth_queries():
+            if cached is not None:
+                user = db.session.get(User, user_id)
+            else:
+                user = db.session.get(User, user_id, options=[joinedload(User.role)])
+        if user is None:
+            user_cache.invalidate(user_id)
+            return None
+        if cached is not None:
+            if not user.is_active:                # deactivated behind the cache's back
+                user_cache.invalidate(user_id)
+                return None
+            return user
+        user_cache.put(user.id, user.role.name if user.role else None, user.is_active)
+        return user if user.is_active else None
+
+    # Machine clients: "Authorization: Bearer pki_..." (see app/auth/tokens.py)
+    from app.auth.tokens import load_user_from_request, enforce_token_scope
+    login_manager.request_loader(load_user_from_request)
+    app.before_request(enforce_token_scope)
 
     # Register blueprints
     from app.auth.routes        import auth_bp
@@ -44,6 +108,7 @@ def create_app():
     from app.requests.routes    import requests_bp
     from app.routes.renew       import renew_bp
     from app.routes.admin       import admin_bp
+    from app.monitoring.routes  import monitoring_bp
 
     app.register_blueprint(renew_bp)
     app.register_blueprint(admin_bp)
@@ -55,33 +120,83 @@ def create_app():
     app.register_blueprint(revoke_bp)
     app.register_blueprint(crl_ocsp_bp)
     app.register_blueprint(requests_bp)
+    app.register_blueprint(monitoring_bp)
+
+    from app.cli import register_cli
+    register_cli(app)
 
     with app.app_context():
         # Import all models so SQLAlchemy sees them
-        from app.models.certificate_db import Certificate, RevokedCertificate
-        from app.auth.models           import User, Role
+        from app.models.certificate_db import Certificate, RevokedCertificate, ArchivedCertificate
+        from app.auth.models           import User, Role, ApiToken
         from app.audit.models          import AuditLog
-        from app.requests.models       import CertificateRequest
+        from app.requests.models       import CertificateRequest, IssuanceJob
+        from app.models.lease          import Lease
+        from app.models.schema         import schema_is_current, record_schema_version
+
+        # Warm boot: the stored fingerprint matches these models, so the
+        # tables, indexes and seed rows are already in place
+        if Config.FAST_START and schema_is_current():
+            log.info("Schema up to date, skipping schema and seed work")
+        else:
+            db.create_all(bind_key=None)   # never DDL against replicas
+            _upgrade_schema()
 
-        db.create_all()
+            # Seed default roles
+            _seed_roles()
 
-        # Seed default roles
-        _seed_roles()
+            # Seed default CA admin account
+            _seed_admin()
 
-        # Seed default CA admin account
-        _seed_admin()
+            record_schema_version()
 
-        # CA hierarchy
-        from app.ca.root_ca         import generate_root_ca
-        from app.ca.intermediate_ca import generate_intermediate_ca
-        print("\n[STARTUP] Initializing CA hierarchy...")
-        generate_root_ca()
-        generate_intermediate_ca()
-        print("[STARTUP] CA hierarchy ready!\n")
+        # CA hierarchy — generated if missing, keys decrypted on first use
+        from app.ca.intermediate_ca import ensure_ca_hierarchy
+        ensure_ca_hierarchy(preload=Config.CA_PRELOAD)
 
     return app
 
 
+def _upgrade_schema():
+    """
+    Add columns and indexes that db.create_all() cannot add to tables that
+    already exist. Only touches what is missing, so it is safe on every boot.
+    """
+    from sqlalchemy import inspect, text
+    from app.models.certificate_db import Certificate, RevokedCertificate
+    from app.revocation.crl_manager import reason_code
+
+    inspector = inspect(db.engine)
+
+    columns = {c['name'] for c in inspector.get_columns('certificates')}
+    if 'revoked_at' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN revoked_at DATETIME NULL"))
+            conn.execute(text("ALTER TABLE certificates ADD COLUMN revocation_reason SMALLINT NULL"))
+
+        # Backfill the new columns from the revocation history
+        for cert in Certificate.query.filter_by(status='REVOKED').all():
+            history = RevokedCertificate.query.filter_by(
+                serial_number=cert.serial_number
+            ).order_by(RevokedCertificate.revoked_at.desc()).first()
+            cert.revoked_at        = history.revoked_at if history else cert.issued_at
+            cert.revocation_reason = reason_code(history.reason if history else None)
+        db.session.commit()
+        log.info("Added revocation columns to certificates")
+
+    # Indexes declared on the models but missing from existing tables
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                try:
+                    index.create(bind=db.engine)
+                    log.info("Created index %s", index.name)
+                except Exception as e:
+                    # Another worker booting at the same time may have won the race
+                    log.warning("Could not create index %s: %s", index.name, e)
+
+
 def _seed_roles():
     """Create roles if they don't exist."""
     from app.auth.models import Role
@@ -105,5 +220,5 @@ def _seed_admin():
         admin.set_password('Admin@12345')
         db.session.add(admin)
         db.session.commit()
-        print("  [SEED] Default CA admin created → username: admin / password: Admin@12345")
-        print("  [SEED] Change this password after first login!\n")
\ No newline at end of file
+        log.warning("Default CA admin created → username: admin / password: Admin@12345. "
+                    "Change this password after first login!")
\ No newline at end of file
@@ -1,31 +1,39 @@
-from flask import request as flask_request
+import logging
+from datetime import datetime
+from flask import request as flask_request, has_request_context
 from flask_login import current_user
-from app import db
-from app.audit.models import AuditLog
+from app.audit.sink import audit_sink
+from app.audit.query import remember_action
 
+log = logging.getLogger(__name__)
 
-def log_action(action, detail=None, certificate_serial=None, status='SUCCESS', user=None):
+
+def log_action(action, detail=None, certificate_serial=None, status='SUCCESS', user=None, sync=False):
     """
     Call this everywhere something important happens.
     Usage:
         log_action("CERTIFICATE_ISSUED", detail="Issued for John", certificate_serial="12345")
         log_action("LOGIN_FAILED", detail="Bad password", status="FAILED")
+        log_action("CA_KEY_ROTATED", sync=True)   # wait until the row is written
+
+    Events are queued and written in batches by audit_sink (see sink.py).
     """
     try:
         # Determine who is acting
-        actor = user or (current_user if current_user.is_authenticated else None)
+        in_request = has_request_context()
+        actor = user or (current_user if in_request and current_user.is_authenticated else None)
 
-        log = AuditLog(
-            user_id            = actor.id       if actor else None,
-            username           = actor.username if actor else 'anonymous',
-            action             = action,
-            detail             = detail,
-            certificate_serial = certificate_serial,
-            ip_address         = flask_request.remote_addr,
-            status             = status
-        )
-        db.session.add(log)
-        db.session.commit()
+        audit_sink.submit({
+            'user_id':            actor.id       if actor else None,
+            'username':           actor.username if actor else 'anonymous',
+            'action':             action,
+            'detail':             detail[:512] if detail else detail,
+            'certificate_serial': certificate_serial,
+            'ip_address':         flask_request.remote_addr if in_request else None,
+            'timestamp':          datetime.utcnow(),
+            'status':             status,
+        }, sync=sync)
+        remember_action(action)
 
     except Exception as e:
-        print(f"  [AUDIT] Warning: could not write audit log: {e}")
\ No newline at end of file
+        log.warning("Could not write audit log: %s", e, extra={'action': action, 'serial': certificate_serial})
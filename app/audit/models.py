@@ -16,5 +16,17 @@ class AuditLog(db.Model):
     timestamp          = db.Column(db.DateTime,    default=datetime.utcnow)
     status             = db.Column(db.String(16),  default='SUCCESS')  # SUCCESS / FAILED
 
+    # Every filter on /audit is an equality match plus a time range, newest first
+    __table_args__ = (
+        db.Index('ix_audit_logs_timestamp',        'timestamp'),
+        db.Index('ix_audit_logs_action_timestamp', 'action',             'timestamp'),
+        db.Index('ix_audit_logs_user_timestamp',   'username',           'timestamp'),
+        db.Index('ix_audit_logs_serial_timestamp', 'certificate_serial', 'timestamp'),
+        db.Index('ix_audit_logs_status_timestamp', 'status',             'timestamp'),
+        # Never reuse an id that rollover moved to audit_logs_YYYYMM: the
+        # (timestamp, id) paging cursor relies on ids being unique across them
+        {'sqlite_autoincrement': True},
+    )
+
     def __repr__(self):
         return f"<AuditLog {self.action} by {self.username} at {self.timestamp}>"
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Monthly rollover tables for the audit log.
+
+audit_logs only holds the current month. rollover_audit_log() moves older
+rows, in batches, into one table per month (audit_logs_YYYYMM) with the
+same columns and indexes. Retention is then a cheap DROP TABLE per month
+instead of a DELETE over millions of rows, and on MySQL older months can
+be switched to ROW_FORMAT=COMPRESSED.
+
+Native MySQL partitioning is not used: InnoDB does not allow foreign keys
+on partitioned tables, and audit_logs.user_id references users.id.
+"""
+import logging
+import re
+from datetime import datetime
+from sqlalchemy import MetaData, Table, inspect, text
+from app import db
+from app.audit.models import AuditLog
+from config import Config
+
+log = logging.getLogger(__name__)
+
+PARTITION_RE = re.compile(r'^audit_logs_(\d{4})(\d{2})$')
+_partition_meta = MetaData()
+
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"audit_logs_{month.year:04d}{month.month:02d}"
+
+
+def partition_table(month):
+    """Table object for one month — same columns/indexes as audit_logs, no FK."""
+    name = partition_name(month)
+    if name in _partition_meta.tables:
+        return _partition_meta.tables[name]
+
+    columns = [
+        db.Column(col.name, col.type, primary_key=col.primary_key,
+                  nullable=col.nullable, autoincrement=False)
+        for col in AuditLog.__table__.columns
+    ]
+    table = Table(name, _partition_meta, *columns)
+
+    for index in AuditLog.__table__.indexes:
+        cols = [table.c[c.name] for c in index.columns]
+        db.Index(index.name.replace('audit_logs', name, 1), *cols)
+    return table
+
+
+def list_partitions():
+    """[(month_start, table_name)] for every rollover table, oldest first."""
+    found = []
+    for name in inspect(db.engine).get_table_names():
+        m = PARTITION_RE.match(name)
+        if m:
+            found.append((datetime(int(m.group(1)), int(m.group(2)), 1), name))
+    return sorted(found)
+
+
+def rollover_audit_log(now=None, batch_size=None):
+    """
+    Move every row older than the current month into its monthly table.
+    Returns the number of rows moved.
+    """
+    batch_size = batch_size or Config.AUDIT_ROLLOVER_BATCH_SIZE
+    current    = month_start(now or datetime.utcnow())
+    live       = AuditLog.__table__
+    moved      = 0
+
+    oldest = db.session.query(db.func.min(AuditLog.timestamp)).scalar()
+    db.session.commit()
+    if oldest is None:
+        return 0
+
+    month = month_start(oldest)
+    while month < current:
+        table = partition_table(month)
+        table.create(bind=db.engine, checkfirst=True)
+        end = next_month(month)
+
+        while True:
+            with db.engine.begin() as conn:
+                ids = conn.execute(
+                    db.select(live.c.id)
+                    .where(live.c.timestamp >= month, live.c.timestamp < end)
+                    .order_by(live.c.id)
+                    .limit(batch_size)
+                ).scalars().all()
+                if not ids:
+                    break
+                conn.execute(table.insert().from_select(
+                    [c.name for c in live.columns],
+                    db.select(*live.columns).where(live.c.id.in_(ids)),
+                ))
+                conn.execute(live.delete().where(live.c.id.in_(ids)))
+            moved += len(ids)
+
+        log.info("Rolled %s (%d row(s) moved so far)", partition_name(month), moved)
+        month = end
+
+    return moved
+
+
+def apply_retention(keep_months=None, compress_after_months=None, now=None):
+    """
+    Drop monthly tables older than keep_months; on MySQL, compress tables
+    older than compress_after_months. Returns the names of dropped tables.
+    """
+    keep_months           = Config.AUDIT_RETENTION_MONTHS if keep_months is None else keep_months
+    compress_after_months = Config.AUDIT_COMPRESS_AFTER_MONTHS if compress_after_months is None else compress_after_months
+    current = month_start(now or datetime.utcnow())
+    is_mysql = db.engine.dialect.name == 'mysql'
+    dropped = []
+
+    for month, name in list_partitions():
+        age = (current.year - month.year) * 12 + current.month - month.month
+        with db.engine.begin() as conn:
+            if age > keep_months:
+                conn.execute(text(f"DROP TABLE {name}"))
+                if name in _partition_meta.tables:
+                    _partition_meta.remove(_partition_meta.tables[name])
+                dropped.append(name)
+                log.info("Dropped %s (older than %d months)", name, keep_months)
+            elif is_mysql and compress_after_months and age > compress_after_months:
+                row_format = conn.execute(text(
+                    "SELECT ROW_FORMAT FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+                ), {'name': name}).scalar()
+                if row_format != 'Compressed':   # ALTER rebuilds the table — only once
+                    conn.execute(text(f"ALTER TABLE {name} ROW_FORMAT=COMPRESSED"))
+                    log.info("Compressed %s", name)
+    return dropped
+
+
+def iter_audit_rows(since=None, until=None, action=None, chunk_size=1000):
+    """
+    Oldest-first stream of audit rows across rollover tables and audit_logs,
+    read through server-side cursors so memory stays flat.
+    """
+    tables = [partition_table(month) for month, _ in list_partitions()
+              if (until is None or month < until) and (since is None or next_month(month) > since)]
+    tables.append(AuditLog.__table__)
+
+    for table in tables:
+        stmt = db.select(*table.columns)
+        if since:
+            stmt = stmt.where(table.c.timestamp >= since)
+        if until:
+            stmt = stmt.where(table.c.timestamp < until)
+        if action:
+            stmt = stmt.where(table.c.action == action)
+        stmt = stmt.order_by(table.c.timestamp, table.c.id)
+
+        result = db.session.execute(
+            stmt, execution_options={'stream_results': True, 'yield_per': chunk_size}
+        )
+        for row in result.mappings():
+            yield row
+        result.close()
@@ -0,0 +1,124 @@
+"""
+Audit log search.
+
+Every filter is an exact match (action, username, serial, status) combined
+with an optional time range, so each query is served by one of the
+(column, timestamp) indexes on audit_logs or on the monthly rollover tables,
+which carry the same indexes, and reads only the rows it returns.
+
+Paging is keyset-based — pass the cursor of the last row seen — so deep
+pages cost the same as the first one.
+"""
+import threading
+import time
+from datetime import datetime
+from app import db
+from app.audit.models import AuditLog
+from config import Config
+
+_actions_lock  = threading.Lock()
+_actions_cache = {'values': None, 'expires': 0.0}
+
+
+def search_audit_logs(action=None, username=None, certificate_serial=None, status=None,
+                      since=None, until=None, before=None, limit=200):
+    """
+    Newest-first audit rows matching every given filter, across audit_logs
+    and the audit_logs_YYYYMM rollover tables that overlap the window.
+    since / until: datetimes (until is exclusive).
+    before:        cursor string from make_cursor() of the last row on the previous page.
+    """
+    from app.audit.partitions import list_partitions, next_month, partition_table
+
+    cursor = parse_cursor(before) if before else None
+    upper  = min(t for t in (until, cursor and cursor[0]) if t) if (until or cursor) else None
+
+    # Live table first, then months newest first; a month is skipped when it
+    # lies outside the window and reading stops once the page is full of
+    # rows newer than everything an older month can hold.
+    tables = [(None, AuditLog.__table__)] + [
+        (month, partition_table(month)) for month, _ in reversed(list_partitions())
+        if (since is None or next_month(month) > since) and (upper is None or month <= upper)
+    ]
+
+    rows = []
+    for month, table in tables:
+        if month is not None and len(rows) >= limit and rows[limit - 1].timestamp >= next_month(month):
+            break
+        rows += _search_table(table, action, username, certificate_serial, status,
+                              since, until, cursor, limit)
+        rows.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+    return rows[:limit]
+
+
+def _search_table(table, action, username, certificate_serial, status, since, until, cursor, limit):
+    c    = table.c
+    stmt = db.select(*table.columns)
+    if action:
+        stmt = stmt.where(c.action == action)
+    if username:
+        stmt = stmt.where(c.username == username)
+    if certificate_serial:
+        stmt = stmt.where(c.certificate_serial == certificate_serial)
+    if status:
+        stmt = stmt.where(c.status == status)
+    if since:
+        stmt = stmt.where(c.timestamp >= since)
+    if until:
+        stmt = stmt.where(c.timestamp < until)
+    if cursor:
+        ts, last_id = cursor
+        stmt = stmt.where(db.or_(c.timestamp < ts, db.and_(c.timestamp == ts, c.id < last_id)))
+    stmt = stmt.order_by(c.timestamp.desc(), c.id.desc()).limit(limit)
+    return db.session.execute(stmt).all()
+
+
+def make_cursor(log):
+    """Opaque paging cursor for a row: '<iso timestamp>_<id>'."""
+    return f"{log.timestamp.isoformat()}_{log.id}"
+
+
+def parse_cursor(cursor):
+    """(timestamp, id) from make_cursor(); ValueError if the cursor is malformed."""
+    ts, _, last_id = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(ts), int(last_id)
+    except ValueError:
+        raise ValueError(f"Invalid paging cursor {cursor!r}") from None
+
+
+def distinct_actions():
+    """
+    Sorted list of action codes for the filter dropdown.
+    Cached for AUDIT_ACTIONS_CACHE_SECONDS; new codes are added as they are logged.
+    """
+    now = time.monotonic()
+    with _actions_lock:
+        if _actions_cache['values'] is not None and now < _actions_cache['expires']:
+            return sorted(_actions_cache['values'])
+
+    from app.audit.partitions import list_partitions, partition_table
+
+    # Actions only seen in rolled-over months still belong in the dropdown
+    tables = [AuditLog.__table__] + [partition_table(month) for month, _ in list_partitions()]
+    values = set()
+    for table in tables:
+        values.update(db.session.execute(db.select(table.c.action).group_by(table.c.action)).scalars())
+    with _actions_lock:
+        _actions_cache['values']  = values
+        _actions_cache['expires'] = now + Config.AUDIT_ACTIONS_CACHE_SECONDS
+    return sorted(values)
+
+
+def remember_action(action):
+    """Called by log_action so a brand-new code shows up without waiting for the TTL."""
+    values = _actions_cache['values']
+    if values is not None and action not in values:
+        with _actions_lock:
+            values.add(action)
+
+
+def clear_actions_cache():
+    with _actions_lock:
+        _actions_cache['values']  = None
+        _actions_cache['expires'] = 0.0
@@ -0,0 +1,208 @@
+"""
+Buffered audit writer.
+
+log_action() hands each event to audit_sink, which puts it on a bounded
+in-process queue. A background thread drains the queue and writes one
+multi-row INSERT per batch (AUDIT_BATCH_SIZE rows, or whatever arrived
+within AUDIT_FLUSH_INTERVAL seconds). Writes use their own connection,
+never db.session, so an audit write can't commit someone else's pending
+changes.
+
+When the queue is full, AUDIT_BACKPRESSURE decides what happens:
+    'block'  wait up to AUDIT_BLOCK_TIMEOUT for space, then drop the event
+    'drop'   drop the event immediately
+    'sync'   write the event inline on the caller's thread
+Dropped events are counted in stats().
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+_STOP = object()
+
+log = logging.getLogger(__name__)
+
+
+class AuditSink:
+
+    def __init__(self):
+        self.app      = None
+        self._engine  = None
+        self._queue   = None
+        self._thread  = None
+        self._pid     = None
+        self._lock    = threading.Lock()
+        self._reset_stats()
+
+    # ─── Setup ───────────────────────────────────────────
+    def init_app(self, app):
+        self.stop()
+        cfg = app.config
+        self.app            = app
+        self.async_mode     = cfg['AUDIT_ASYNC']
+        self.batch_size     = cfg['AUDIT_BATCH_SIZE']
+        self.flush_interval = cfg['AUDIT_FLUSH_INTERVAL']
+        self.policy         = cfg['AUDIT_BACKPRESSURE']
+        self.block_timeout  = cfg['AUDIT_BLOCK_TIMEOUT']
+        self.queue_size     = cfg['AUDIT_QUEUE_SIZE']
+        if self.policy not in ('block', 'drop', 'sync'):
+            raise ValueError(f"AUDIT_BACKPRESSURE must be block, drop or sync, not {self.policy!r}")
+        self._engine = None
+        self._queue  = None
+        self._reset_stats()
+        app.extensions['audit_sink'] = self
+
+    def _reset_stats(self):
+        self._stats = {
+            'enqueued':          0,
+            'written':           0,
+            'dropped':           0,
+            'write_errors':      0,
+            'batches':           0,
+            'enqueue_seconds':   0.0,
+            'enqueue_max':       0.0,
+        }
+
+    def _ensure_started(self):
+        """Start the writer lazily, and again in a forked worker process."""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._queue  = queue.Queue(maxsize=self.queue_size)
+            self._pid    = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _get_engine(self):
+        if self._engine is None:
+            from app import db
+            with self.app.app_context():
+                self._engine = db.engine
+        return self._engine
+
+    # ─── Producer side ───────────────────────────────────
+    def submit(self, event, sync=False):
+        """
+        Queue one audit row (a dict of AuditLog columns).
+        Returns False if the event was dropped under backpressure.
+        """
+        if sync or not self.async_mode:
+            self._write([event])
+            return True
+
+        self._ensure_started()
+        start = time.perf_counter()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if self.policy == 'sync':
+                self._write([event])
+                return True
+            if self.policy == 'drop' or not self._put_blocking(event):
+                with self._lock:
+                    self._stats['dropped'] += 1
+                log.warning("Audit queue full, event dropped", extra={'action': event.get('action')})
+                return False
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats['enqueued']        += 1
+            self._stats['enqueue_seconds'] += elapsed
+            if elapsed > self._stats['enqueue_max']:
+                self._stats['enqueue_max'] = elapsed
+        return True
+
+    def _put_blocking(self, event):
+        try:
+            self._queue.put(event, timeout=self.block_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been written."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            self._thread = None
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['queue_depth'] = self._queue.qsize() if self._queue else 0
+        return snapshot
+
+    # ─── Writer side ─────────────────────────────────────
+    def _run(self):
+        q = self._queue
+        while True:
+            item  = q.get()
+            taken = 1
+            stop  = item is _STOP
+            batch = [] if stop else [item]
+            deadline = time.monotonic() + self.flush_interval
+
+            while not stop and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            # Stopping: drain whatever is left so nothing queued is lost
+            while stop:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is not _STOP:
+                    batch.append(item)
+
+            if batch:
+                self._write(batch)
+            for _ in range(taken):
+                q.task_done()
+            if stop:
+                return
+
+    def _write(self, events):
+        from app.audit.models import AuditLog
+        from app.monitoring.metrics import audit_commit_seconds
+        try:
+            with audit_commit_seconds.time(), self._get_engine().begin() as conn:
+                conn.execute(AuditLog.__table__.insert(), events)
+            with self._lock:
+                self._stats['written'] += len(events)
+                self._stats['batches'] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats['write_errors'] += len(events)
+            log.error("Could not write %d audit log(s): %s", len(events), e)
+
+
+audit_sink = AuditSink()
+atexit.register(audit_sink.stop)
@@ -0,0 +1,102 @@
+"""
+Per-user auth cache.
+
+Role name and active flag for each user id, kept in a bounded LRU with a
+short TTL. load_user() and User.role_name read it so a request normally
+costs one users-row lookup and no roles query. admin.change_role and
+admin.toggle_user invalidate the entry; other worker processes pick the
+change up when the TTL expires (AUTH_CACHE_TTL seconds).
+
+Queries issued from auth code are counted per request in g.auth_queries
+and, with AUTH_QUERY_HEADER on, returned as an X-Auth-Queries header.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+AuthInfo = namedtuple('AuthInfo', 'role_name is_active')
+
+
+class UserAuthCache:
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self._data   = OrderedDict()
+        self._lock   = threading.Lock()
+        self.hits    = 0
+        self.misses  = 0
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl     = ttl
+            self._data.clear()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[user_id]
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, role_name, is_active):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, AuthInfo(role_name, bool(is_active)))
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        """Drop one user's entry, or everything if user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._data.clear()
+            else:
+                self._data.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserAuthCache()
+
+
+@contextmanager
+def auth_queries():
+    """Count every SQL statement run inside this block as an auth query."""
+    if not has_request_context():
+        yield
+        return
+    g._auth_scope = g.get('_auth_scope', 0) + 1
+    try:
+        yield
+    finally:
+        g._auth_scope -= 1
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_auth_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('_auth_scope'):
+        g.auth_queries = g.get('auth_queries', 0) + 1
+
+
+def init_auth_cache(app):
+    user_cache.configure(app.config['AUTH_CACHE_SIZE'], app.config['AUTH_CACHE_TTL'])
+
+    if app.config['AUTH_QUERY_HEADER']:
+        @app.after_request
+        def _auth_query_header(response):
+            response.headers['X-Auth-Queries'] = str(g.get('auth_queries', 0))
+            return response
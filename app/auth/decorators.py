@@ -1,14 +1,33 @@
 from functools import wraps
-from flask import redirect, url_for, flash
+from flask import redirect, url_for, flash, request, g, jsonify
 from flask_login import current_user
 
 
+def _api_denied(status, message):
+    """JSON error for Bearer-token clients instead of a login redirect."""
+    return jsonify({'error': message}), status
+
+
+def _wants_api():
+    return request.headers.get('Authorization', '').startswith('Bearer ')
+
+
+def _token_scope_ok():
+    from app.auth.tokens import token_allows
+    token = g.get('api_token')
+    return token is None or token_allows(token, request.endpoint)
+
+
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if not current_user.is_authenticated:
+            if _wants_api():
+                return _api_denied(401, 'invalid or expired API token')
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('auth.login'))
+        if not _token_scope_ok():
+            return _api_denied(403, 'API token scope does not cover this endpoint')
         return f(*args, **kwargs)
     return decorated
 
@@ -23,11 +42,17 @@ def role_required(*roles):
         @wraps(f)
         def decorated(*args, **kwargs):
             if not current_user.is_authenticated:
+                if _wants_api():
+                    return _api_denied(401, 'invalid or expired API token')
                 flash('Please log in.', 'error')
                 return redirect(url_for('auth.login'))
             if current_user.role_name not in roles:
+                if g.get('api_token'):
+                    return _api_denied(403, 'role not permitted')
                 flash('You do not have permission to access this page.', 'error')
                 return redirect(url_for('portal.landing'))
+            if not _token_scope_ok():
+                return _api_denied(403, 'API token scope does not cover this endpoint')
             return f(*args, **kwargs)
         return decorated
-    return decorator
\ No newline at end of file
+    return decorator
@@ -41,7 +41,14 @@ class User(UserMixin, db.Model):
 
     @property
     def role_name(self):
-        return self.role.name if self.role else None
+        from app.auth.cache import user_cache, auth_queries
+        cached = user_cache.get(self.id)
+        if cached is not None:
+            return cached.role_name
+        with auth_queries():
+            name = self.role.name if self.role else None
+        user_cache.put(self.id, name, self.is_active)
+        return name
 
     def is_ca_admin(self):
         return self.role_name == 'ca_admin'
@@ -53,4 +60,37 @@ class User(UserMixin, db.Model):
         return self.role_name == 'user'
 
     def __repr__(self):
-        return f"<User {self.username} | {self.role_name}>"
\ No newline at end of file
+        return f"<User {self.username} | {self.role_name}>"
+
+
+class ApiToken(db.Model):
+    """
+    Bearer token for machine clients: "pki_<token_id>_<secret>".
+    Only an HMAC-SHA256 of the secret is stored (see app/auth/tokens.py).
+    """
+    __tablename__ = 'api_tokens'
+
+    id           = db.Column(db.Integer, primary_key=True)
+    user_id      = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    name         = db.Column(db.String(80),  nullable=False)
+    token_id     = db.Column(db.String(16),  unique=True, nullable=False)   # public lookup part
+    token_hash   = db.Column(db.String(64),  nullable=False)                # hex HMAC of the secret
+    scopes       = db.Column(db.String(256), nullable=False, default='*')   # blueprint names, comma-separated
+    created_at   = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at   = db.Column(db.DateTime, nullable=True)
+    revoked_at   = db.Column(db.DateTime, nullable=True)
+    last_used_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User', backref=db.backref('api_tokens', lazy=True))
+
+    @property
+    def scope_list(self):
+        return [s.strip() for s in self.scopes.split(',') if s.strip()]
+
+    def is_usable(self):
+        if self.revoked_at is not None:
+            return False
+        return self.expires_at is None or datetime.utcnow() < self.expires_at
+
+    def __repr__(self):
+        return f"<ApiToken {self.name} | {self.user_id}>"
\ No newline at end of file
@@ -1,9 +1,10 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, g, jsonify
 from flask_login import login_user, logout_user, current_user
 from app import db
-from app.auth.models import User, Role
+from app.auth.models import User, Role, ApiToken
 from app.audit.logger import log_action
+from app.auth.decorators import login_required
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -108,14 +109,36 @@ def logout():
 
 
 @auth_bp.route('/profile', methods=['GET', 'POST'])
+@login_required
 def profile():
-    if not current_user.is_authenticated:
-        return redirect(url_for('auth.login'))
+    new_token = None
 
     if request.method == 'POST':
         action = request.form.get('action')
 
-        if action == 'update_email':
+        if g.get('api_token'):
+            return jsonify({'error': 'API tokens cannot change the account — log in with your password'}), 403
+
+        if action == 'create_token':
+            from app.auth.tokens import create_api_token
+            name   = request.form.get('token_name', '').strip() or 'unnamed'
+            scopes = request.form.get('token_scopes', '').strip() or '*'
+            days   = request.form.get('token_days', type=int)
+            token, new_token = create_api_token(current_user, name, scopes, days)
+            log_action('API_TOKEN_CREATED', detail=f'Token "{name}" scopes={scopes}')
+            flash('API token created. Copy it now — it will not be shown again.', 'success')
+
+        elif action == 'revoke_token':
+            from app.auth.tokens import revoke_api_token
+            token = ApiToken.query.filter_by(
+                id=request.form.get('token_id', type=int), user_id=current_user.id
+            ).first()
+            if token:
+                revoke_api_token(token)
+                log_action('API_TOKEN_REVOKED', detail=f'Token "{token.name}" revoked')
+                flash(f'Token "{token.name}" revoked.', 'success')
+
+        elif action == 'update_email':
             new_email = request.form.get('email', '').strip()
             if User.query.filter_by(email=new_email).first():
                 flash('Email already in use.', 'error')
@@ -143,5 +166,10 @@ def profile():
                 flash('Password changed successfully.', 'success')
 
     from app.models.certificate_db import Certificate
-    my_certs = Certificate.query.filter_by(owner_name=current_user.username).all()
-    return render_template('profile.html', my_certs=my_certs)
\ No newline at end of file
+    my_certs  = Certificate.query.filter_by(owner_name=current_user.username).all()
+    my_tokens = ApiToken.query.filter_by(user_id=current_user.id).order_by(
+        ApiToken.created_at.desc()
+    ).all()
+    return render_template('profile.html',
+        my_certs=my_certs, my_tokens=my_tokens, new_token=new_token
+    )
\ No newline at end of file
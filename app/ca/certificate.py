@@ -1,12 +1,17 @@
-import os
+import time
 import datetime
+import logging
 from cryptography import x509
 from cryptography.x509.oid import NameOID, ExtendedKeyUsageOID
-from cryptography.hazmat.primitives import hashes, serialization
-from app.crypto.key_manager import generate_rsa_keypair, save_private_key
-from app.ca.intermediate_ca import load_intermediate_ca
+from cryptography.hazmat.primitives import serialization
+from app.crypto.key_manager import generate_rsa_keypair
+from app.crypto.key_store import key_store
+from app.ca.signing import ca_certificate, sign_certificate
+from app.monitoring.metrics import issue_seconds, sign_seconds, certificates_issued
 from config import Config
 
+log = logging.getLogger(__name__)
+
 
 def issue_certificate(owner_name, email=None, organization=None):
     """
@@ -14,16 +19,19 @@ def issue_certificate(owner_name, email=None, organization=None):
     Signed by Intermediate CA.
     Returns (cert_pem_string, serial_number, valid_from, valid_to)
     """
+    started = time.perf_counter()
+
     # Generate a fresh keypair for this user
     user_private_key, user_public_key = generate_rsa_keypair()
 
-    # Save user private key to storage/issued/
+    # Store the key under the certificate's serial, so a re-issue for the
+    # same name gets its own file instead of overwriting the old key
+    serial    = x509.random_serial_number()
     safe_name = owner_name.replace(" ", "_")
-    user_key_path = os.path.join(Config.ISSUED_DIR, f"{safe_name}.key")
-    save_private_key(user_private_key, user_key_path, Config.CA_KEY_PASSWORD)
+    key_store.save(serial, user_private_key, Config.CA_KEY_PASSWORD)
 
-    # Load Intermediate CA to sign this cert
-    int_private_key, int_cert = load_intermediate_ca()
+    # Intermediate CA certificate; its key stays with the signing backend
+    int_cert = ca_certificate('intermediate')
 
     # Build subject for end-entity
     name_attrs = [
@@ -44,12 +52,12 @@ def issue_certificate(owner_name, email=None, organization=None):
     if email:
         san_entries.append(x509.RFC822Name(email))
 
-    cert = (
+    builder = (
         x509.CertificateBuilder()
         .subject_name(subject)
         .issuer_name(int_cert.subject)          # Issued BY Intermediate CA
         .public_key(user_public_key)
-        .serial_number(x509.random_serial_number())
+        .serial_number(serial)
         .not_valid_before(now)
         .not_valid_after(valid_to)
 
@@ -94,15 +102,23 @@ def issue_certificate(owner_name, email=None, organization=None):
             x509.AuthorityKeyIdentifier.from_issuer_public_key(int_cert.public_key()),
             critical=False
         )
-        # Signed by Intermediate CA
-        .sign(int_private_key, hashes.SHA256())
     )
 
+    # Signed by Intermediate CA
+    try:
+        with sign_seconds.labels(kind='certificate').time():
+            cert = sign_certificate(builder, 'intermediate')
+    except Exception:
+        key_store.delete(serial)                # no certificate, so nothing should point at this key
+        raise
+
     cert_pem      = cert.public_bytes(serialization.Encoding.PEM).decode('utf-8')
     serial_number = str(cert.serial_number)
 
-    print(f"  [CERT] Issued certificate for: {owner_name}")
-    print(f"  [CERT] Serial: {serial_number[:20]}...")
-    print(f"  [CERT] Valid until: {valid_to}")
+    log.info("Issued certificate for %s", owner_name,
+             extra={'serial': serial_number, 'valid_to': valid_to.isoformat()})
+
+    issue_seconds.observe(time.perf_counter() - started)
+    certificates_issued.inc()
 
     return cert_pem, serial_number, now, valid_to
\ No newline at end of file
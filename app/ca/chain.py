@@ -0,0 +1,201 @@
+"""
+Certificate chain validation.
+
+validate_certificates() takes PEM or DER certificates and, for each one,
+builds the path leaf → Intermediate CA → Root CA, checks every signature
+and validity period, the leaf's Extended Key Usage, and the revocation
+index (certificates.status, one IN query per batch).
+
+The Root and Intermediate certificates are parsed once and cached in
+trust_anchors — only the public .crt files are read, never the encrypted
+CA keys — and reloaded when either file changes on disk. The
+intermediate → root signature is checked when the cache is loaded, so a
+leaf costs one signature verification.
+
+Batches are spread over a thread pool of CHAIN_VERIFY_WORKERS threads;
+OpenSSL releases the GIL while it verifies, so this scales with cores.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+from app.monitoring.metrics import chain_verify_seconds, certificates_verified
+from config import Config
+
+PURPOSES = {
+    'client_auth':      ExtendedKeyUsageOID.CLIENT_AUTH,
+    'server_auth':      ExtendedKeyUsageOID.SERVER_AUTH,
+    'email_protection': ExtendedKeyUsageOID.EMAIL_PROTECTION,
+    'code_signing':     ExtendedKeyUsageOID.CODE_SIGNING,
+}
+
+
+def _cn(name):
+    attrs = name.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return attrs[0].value if attrs else name.rfc4514_string()
+
+
+class TrustAnchors:
+    """Parsed Root + Intermediate CA certificates, reloaded when the files change."""
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._stamp   = None
+        self.root     = None
+        self.intermediate = None
+        self.intermediate_ok = False
+
+    def _paths(self):
+        return (os.path.join(Config.ROOT_CA_DIR,      "root_ca.crt"),
+                os.path.join(Config.INTERMEDIATE_DIR, "intermediate.crt"))
+
+    def get(self):
+        paths = self._paths()
+        stamp = tuple((p, os.stat(p).st_mtime_ns) for p in paths)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._load(paths, stamp)
+        return self
+
+    def _load(self, paths, stamp):
+        with open(paths[0], 'rb') as f:
+            root = x509.load_pem_x509_certificate(f.read())
+        with open(paths[1], 'rb') as f:
+            intermediate = x509.load_pem_x509_certificate(f.read())
+        try:
+            intermediate.verify_directly_issued_by(root)
+            ok = True
+        except (ValueError, TypeError, InvalidSignature):
+            ok = False
+        self.root, self.intermediate, self.intermediate_ok = root, intermediate, ok
+        self._stamp = stamp
+
+    def invalidate(self):
+        with self._lock:
+            self._stamp = None
+
+
+trust_anchors = TrustAnchors()
+_executor      = None
+_executor_lock = threading.Lock()
+
+
+def load_certificates(data):
+    """PEM (one or many) or DER bytes/str → list of x509.Certificate."""
+    if isinstance(data, str):
+        data = data.encode()
+    if not isinstance(data, (bytes, bytearray)):
+        raise ValueError(f"expected PEM or DER data, not {type(data).__name__}")
+    if b'-----BEGIN' in data:
+        return x509.load_pem_x509_certificates(data)
+    return [x509.load_der_x509_certificate(data)]
+
+
+def _check_one(cert, anchors, now, purpose):
+    """Everything except revocation — safe to run on a worker thread."""
+    result = {
+        'serial':  str(cert.serial_number),
+        'subject': _cn(cert.subject),
+        'chain':   [_cn(cert.subject)],
+    }
+
+    if cert == anchors.root:
+        return dict(result, status='VALID', detail='trust anchor')
+    if cert == anchors.intermediate:
+        result['chain'].append(_cn(anchors.root.subject))
+        if not anchors.intermediate_ok:
+            return dict(result, status='UNTRUSTED', detail='intermediate CA not signed by root CA')
+        return dict(result, status='VALID', detail='trust anchor')
+
+    if cert.issuer != anchors.intermediate.subject:
+        return dict(result, status='UNTRUSTED', detail=f'unknown issuer {_cn(cert.issuer)}')
+    try:
+        cert.verify_directly_issued_by(anchors.intermediate)
+    except (ValueError, TypeError, InvalidSignature) as e:
+        return dict(result, status='BAD_SIGNATURE', detail=str(e) or 'signature does not verify')
+    if not anchors.intermediate_ok:
+        return dict(result, status='UNTRUSTED', detail='intermediate CA not signed by root CA')
+    result['chain'] += [_cn(anchors.intermediate.subject), _cn(anchors.root.subject)]
+
+    for c in (cert, anchors.intermediate, anchors.root):
+        if now < c.not_valid_before_utc:
+            return dict(result, status='NOT_YET_VALID', detail=f'{_cn(c.subject)} not valid yet')
+        if now > c.not_valid_after_utc:
+            return dict(result, status='EXPIRED', detail=f'{_cn(c.subject)} expired')
+
+    if purpose is not None:
+        try:
+            eku = cert.extensions.get_extension_for_class(x509.ExtendedKeyUsage).value
+        except x509.ExtensionNotFound:
+            eku = None
+        if eku is not None and purpose not in eku:
+            return dict(result, status='WRONG_PURPOSE', detail=f'EKU does not allow {purpose.dotted_string}')
+
+    return dict(result, status='VALID', detail=None)
+
+
+def _revoked_serials(serials):
+    from app import db
+    from app.models.certificate_db import Certificate
+    if not serials:
+        return set()
+    rows = db.session.query(Certificate.serial_number).filter(
+        Certificate.serial_number.in_(serials),
+        Certificate.status == 'REVOKED',
+    ).all()
+    return {r.serial_number for r in rows}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=Config.CHAIN_VERIFY_WORKERS,
+                                               thread_name_prefix='chain-verify')
+    return _executor
+
+
+def validate_certificates(certs, purpose='client_auth', now=None):
+    """
+    Validate a list of x509.Certificate objects.
+    Returns (results, stats) — one result dict per certificate, in order, and
+    {'verified': n, 'seconds': s, 'per_second': r}.
+    """
+    if purpose is not None and (not isinstance(purpose, str) or purpose not in PURPOSES):
+        raise ValueError(f"Unknown purpose {purpose!r} — use one of {', '.join(PURPOSES)}")
+    eku     = PURPOSES.get(purpose)
+    now     = now or datetime.now(timezone.utc)
+    anchors = trust_anchors.get()
+    start   = time.perf_counter()
+
+    if len(certs) > 1 and Config.CHAIN_VERIFY_WORKERS > 1:
+        results = list(_get_executor().map(lambda c: _check_one(c, anchors, now, eku), certs))
+    else:
+        results = [_check_one(c, anchors, now, eku) for c in certs]
+
+    revoked = _revoked_serials([r['serial'] for r in results if r['status'] == 'VALID'])
+    for r in results:
+        if r['serial'] in revoked:
+            r['status'], r['detail'] = 'REVOKED', 'listed in the revocation index'
+        r['valid'] = r['status'] == 'VALID'
+
+    seconds = time.perf_counter() - start
+    chain_verify_seconds.observe(seconds)
+    certificates_verified.inc(len(results))
+    return results, {
+        'verified':   len(results),
+        'seconds':    round(seconds, 6),
+        'per_second': round(len(results) / seconds, 1) if seconds else None,
+    }
+
+
+def validate_certificate(data, purpose='client_auth', now=None):
+    """Convenience wrapper: one PEM/DER certificate → one result dict."""
+    results, _ = validate_certificates(load_certificates(data)[:1], purpose, now)
+    return results[0]
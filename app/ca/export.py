@@ -0,0 +1,208 @@
+"""
+Bulk certificate export.
+
+iter_certificates() reads the selected rows through a server-side cursor.
+export_certificates() turns them into a stream of byte chunks in one of
+three formats:
+
+    pem    concatenated PEM bundle
+    zip    one <serial>.pem per certificate
+    pkcs7  degenerate PKCS#7 SignedData (certificates only, no signers)
+
+Nothing is built in memory first. A chunk is yielded as soon as
+EXPORT_CHUNK_BYTES have been produced. With chain=True, the Root and
+Intermediate CA certificates come first.
+
+PKCS#7 is written with indefinite-length (BER) outer encoding, as
+`openssl cms -stream` does, because DER would need the total length before
+the first byte. Each certificate inside it is plain DER.
+`openssl pkcs7 -inform DER -print_certs` reads it.
+"""
+import base64
+import struct
+import tempfile
+import zlib
+from datetime import datetime
+
+from app import db
+from app.models.certificate_db import Certificate
+from app.monitoring.metrics import certificates_exported
+from config import Config
+
+FORMATS = {
+    #          mimetype                              extension
+    'pem':   ('application/x-pem-file',             'pem'),
+    'zip':   ('application/zip',                    'zip'),
+    'pkcs7': ('application/x-pkcs7-certificates',   'p7b'),
+}
+STATUSES = ('all', 'active', 'revoked', 'expired')
+
+# ContentInfo { signedData, [0] SignedData { version 1, digestAlgorithms {},
+# encapContentInfo { data }, certificates [0] { ...
+_OID_SIGNED_DATA = bytes.fromhex('06092a864886f70d010702')
+_OID_DATA        = bytes.fromhex('06092a864886f70d010701')
+_P7_HEAD = (b'\x30\x80' + _OID_SIGNED_DATA + b'\xa0\x80'
+            + b'\x30\x80' + b'\x02\x01\x01' + b'\x31\x00' + b'\x30\x0b' + _OID_DATA
+            + b'\xa0\x80')
+# ... } end of certificates, signerInfos {}, then close SignedData, [0], ContentInfo
+_P7_TAIL = b'\x00\x00' + b'\x31\x00' + b'\x00\x00' * 3
+
+
+def iter_certificates(status='all', organization=None, issued_since=None, issued_until=None,
+                      chunk_size=None):
+    """
+    Certificates matching the filters, oldest first, as rows with
+    serial_number, valid_from and cert_pem. Statuses mean what the
+    /certificates tabs mean: active and expired are both ACTIVE rows,
+    split on valid_to. issued_until is exclusive; callers taking a day
+    pass the start of the next one.
+
+    Only the certificates table is read, never certificates_archive, so
+    status='expired' leaves out certificates already moved there by
+    archive-certs.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}, not {status!r}")
+    now  = datetime.utcnow()
+    stmt = db.select(Certificate.serial_number, Certificate.valid_from, Certificate.cert_pem)
+    if status == 'active':
+        stmt = stmt.where(Certificate.status == 'ACTIVE', Certificate.valid_to >= now)
+    elif status == 'revoked':
+        stmt = stmt.where(Certificate.status == 'REVOKED')
+    elif status == 'expired':
+        stmt = stmt.where(Certificate.status == 'ACTIVE', Certificate.valid_to < now)
+    if organization:
+        stmt = stmt.where(Certificate.organization == organization)
+    if issued_since:
+        stmt = stmt.where(Certificate.issued_at >= issued_since)
+    if issued_until:
+        stmt = stmt.where(Certificate.issued_at < issued_until)
+    return _stream(stmt.order_by(Certificate.id), chunk_size or Config.EXPORT_YIELD_PER)
+
+
+def _stream(stmt, chunk_size):
+    result = db.session.execute(stmt, execution_options={'stream_results': True, 'yield_per': chunk_size})
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def pem_to_der(pem):
+    """DER bytes of a single PEM certificate, without parsing it."""
+    body = ''.join(line for line in pem.splitlines() if line and not line.startswith('-----'))
+    return base64.b64decode(body)
+
+
+def _ca_pems():
+    from app.ca.signing import ca_certificate
+    from cryptography.hazmat.primitives import serialization
+    return [(name, ca_certificate(ca).public_bytes(serialization.Encoding.PEM).decode())
+            for name, ca in (('root_ca', 'root'), ('intermediate_ca', 'intermediate'))]
+
+
+def _pem_pieces(rows, ca):
+    for _, pem in ca:
+        yield pem.encode()
+    for row in rows:
+        pem = row.cert_pem if row.cert_pem.endswith('\n') else row.cert_pem + '\n'
+        yield pem.encode()
+
+
+class _ZipStream:
+    """
+    Write-once ZIP archive that streams. Every entry is deflated in full
+    before its local header, so the header carries the real CRC and sizes.
+    The central directory is spooled to a temp file instead of being held
+    as a list, and ZIP64 end records are added past 65535 entries or 4 GB.
+    """
+
+    def __init__(self):
+        self.offset    = 0
+        self.count     = 0
+        self.directory = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+
+    def entry(self, name, data, when):
+        name   = name.encode()
+        data   = data.encode()
+        packer = zlib.compressobj(6, zlib.DEFLATED, -15)
+        packed = packer.compress(data) + packer.flush()
+        crc    = zlib.crc32(data)
+        time_  = (when.hour << 11) | (when.minute << 5) | (when.second // 2)
+        date_  = ((when.year - 1980) << 9) | (when.month << 5) | when.day
+
+        offset, extra, needs = self.offset, b'', 20
+        if offset >= 0xFFFFFFFF:
+            offset, extra, needs = 0xFFFFFFFF, struct.pack('<HHQ', 1, 8, self.offset), 45
+        self.directory.write(struct.pack(
+            '<4sHHHHHHIIIHHHHHII', b'PK\x01\x02', (3 << 8) | needs, needs, 0, 8, time_, date_,
+            crc, len(packed), len(data), len(name), len(extra), 0, 0, 0, 0o644 << 16, offset,
+        ) + name + extra)
+
+        local = struct.pack('<4sHHHHHIIIHH', b'PK\x03\x04', needs, 0, 8, time_, date_,
+                            crc, len(packed), len(data), len(name), 0) + name
+        self.offset += len(local) + len(packed)
+        self.count  += 1
+        return local + packed
+
+    def close(self):
+        cd_offset, cd_size = self.offset, self.directory.tell()
+        self.directory.seek(0)
+        while True:
+            block = self.directory.read(64 * 1024)
+            if not block:
+                break
+            yield block
+        self.directory.close()
+
+        count = self.count
+        if count >= 0xFFFF or cd_offset >= 0xFFFFFFFF or cd_size >= 0xFFFFFFFF:
+            end64 = cd_offset + cd_size
+            yield struct.pack('<4sQHHIIQQQQ', b'PK\x06\x06', 44, 45, 45, 0, 0, count, count, cd_size, cd_offset)
+            yield struct.pack('<4sIQI', b'PK\x06\x07', 0, end64, 1)
+            count, cd_size, cd_offset = 0xFFFF, min(cd_size, 0xFFFFFFFF), 0xFFFFFFFF
+        yield struct.pack('<4sHHHHIIH', b'PK\x05\x06', 0, 0, count, count, cd_size, cd_offset, 0)
+
+
+def _zip_pieces(rows, ca):
+    archive = _ZipStream()
+    now = datetime.utcnow()
+    for name, pem in ca:
+        yield archive.entry(f'ca/{name}.pem', pem, now)
+    for row in rows:
+        yield archive.entry(f'{row.serial_number}.pem', row.cert_pem, row.valid_from)
+    yield from archive.close()
+
+
+def _pkcs7_pieces(rows, ca):
+    yield _P7_HEAD
+    for _, pem in ca:
+        yield pem_to_der(pem)
+    for row in rows:
+        yield pem_to_der(row.cert_pem)
+    yield _P7_TAIL
+
+
+_WRITERS = {'pem': _pem_pieces, 'zip': _zip_pieces, 'pkcs7': _pkcs7_pieces}
+
+
+def export_certificates(fmt, rows, chain=False, chunk_bytes=None):
+    """Yield the export of rows (from iter_certificates) in chunks of about chunk_bytes."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}, not {fmt!r}")
+    chunk_bytes = chunk_bytes or Config.EXPORT_CHUNK_BYTES
+    exported    = certificates_exported.labels(format=fmt)
+
+    def counted(rows):
+        for row in rows:
+            exported.inc()
+            yield row
+
+    buf = bytearray()
+    for piece in _WRITERS[fmt](counted(rows), _ca_pems() if chain else []):
+        buf += piece
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
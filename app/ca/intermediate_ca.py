@@ -1,12 +1,15 @@
 import os
 import datetime
+import logging
 from cryptography import x509
 from cryptography.x509.oid import NameOID
-from cryptography.hazmat.primitives import hashes, serialization
-from app.crypto.key_manager import generate_and_save_keypair, load_private_key
-from app.ca.root_ca import load_root_ca
+from cryptography.hazmat.primitives import serialization
+from app.crypto.key_manager import generate_and_save_keypair
+from app.ca.root_ca import generate_root_ca, load_ca_material
 from config import Config
 
+log = logging.getLogger(__name__)
+
 
 def generate_intermediate_ca():
     """
@@ -17,18 +20,19 @@ def generate_intermediate_ca():
     key_path  = os.path.join(Config.INTERMEDIATE_DIR, "intermediate.key")
 
     if os.path.exists(cert_path) and os.path.exists(key_path):
-        print("  [INTERMEDIATE CA] Already exists, skipping.")
+        log.info("Intermediate CA already exists, skipping generation")
         return load_intermediate_ca()
 
-    print("  [INTERMEDIATE CA] Generating keypair...")
+    log.info("Generating Intermediate CA keypair")
     private_key, public_key = generate_and_save_keypair(
         name="intermediate",
         directory=Config.INTERMEDIATE_DIR,
         password=Config.CA_KEY_PASSWORD
     )
 
-    # Load Root CA to sign this certificate
-    root_private_key, root_cert = load_root_ca()
+    # Root CA certificate; the signature comes from the signing backend
+    from app.ca.signing import ca_certificate, sign_certificate
+    root_cert = ca_certificate('root')
 
     subject = x509.Name([
         x509.NameAttribute(NameOID.COUNTRY_NAME,             Config.CA_COUNTRY),
@@ -41,7 +45,7 @@ def generate_intermediate_ca():
 
     now = datetime.datetime.utcnow()
 
-    cert = (
+    builder = (
         x509.CertificateBuilder()
         .subject_name(subject)
         .issuer_name(root_cert.subject)       # Issued BY Root CA
@@ -77,35 +81,53 @@ def generate_intermediate_ca():
             x509.AuthorityKeyIdentifier.from_issuer_public_key(root_cert.public_key()),
             critical=False
         )
-        # Signed by ROOT CA private key
-        .sign(root_private_key, hashes.SHA256())
     )
+    # Signed by ROOT CA private key
+    cert = sign_certificate(builder, 'root')
 
     with open(cert_path, 'wb') as f:
         f.write(cert.public_bytes(serialization.Encoding.PEM))
 
-    print(f"  [INTERMEDIATE CA] Certificate saved: {cert_path}")
-    print(f"  [INTERMEDIATE CA] Signed by: {root_cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value}")
+    log.info("Intermediate CA certificate saved: %s, signed by %s", cert_path,
+             root_cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
+             extra={'serial': str(cert.serial_number)})
 
     return private_key, cert
 
 
 def load_intermediate_ca():
-    """Load existing Intermediate CA key and certificate."""
-    key_path  = os.path.join(Config.INTERMEDIATE_DIR, "intermediate.key")
-    cert_path = os.path.join(Config.INTERMEDIATE_DIR, "intermediate.crt")
-
-    private_key = load_private_key(key_path, Config.CA_KEY_PASSWORD)
+    """Load existing Intermediate CA key and certificate (cached, see load_ca_material)."""
+    return load_ca_material(os.path.join(Config.INTERMEDIATE_DIR, "intermediate.key"),
+                            os.path.join(Config.INTERMEDIATE_DIR, "intermediate.crt"))
 
-    with open(cert_path, 'rb') as f:
-        cert = x509.load_pem_x509_certificate(f.read())
 
-    return private_key, cert
+def ensure_ca_hierarchy(preload=False):
+    """
+    Startup hook: generate the Root and Intermediate CA if their files are
+    missing. Existing keys are not decrypted here — the first signing call
+    loads them — unless preload is set, which has the signing backend load
+    both CAs now so forked workers inherit them.
+    """
+    paths = [
+        os.path.join(Config.ROOT_CA_DIR, "root_ca.crt"),
+        os.path.join(Config.ROOT_CA_DIR, "root_ca.key"),
+        os.path.join(Config.INTERMEDIATE_DIR, "intermediate.crt"),
+        os.path.join(Config.INTERMEDIATE_DIR, "intermediate.key"),
+    ]
+    if not all(os.path.exists(p) for p in paths):
+        log.info("Initializing CA hierarchy")
+        generate_root_ca()
+        generate_intermediate_ca()
+        log.info("CA hierarchy ready")
+    if preload:
+        from app.ca.signing import get_backend
+        get_backend().preload()
 
 
 def get_intermediate_ca_info():
     """Return Intermediate CA certificate details as a dict."""
-    _, cert = load_intermediate_ca()
+    from app.ca.signing import ca_certificate
+    cert = ca_certificate('intermediate')
     return {
         "subject":    cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
         "issuer":     cert.issuer.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
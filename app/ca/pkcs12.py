@@ -0,0 +1,239 @@
+"""
+PKCS#12 (.p12) bundles for subscribers.
+
+A bundle holds the subscriber's private key, their certificate, and the
+Intermediate and Root CA certificates. It is encrypted with a passphrase
+the subscriber picks. Building one means decrypting the stored key, then
+running PBKDF2 (PKCS12_KDF_ROUNDS) for the key bag and the MAC. That takes
+about 0.2 s of CPU with the GIL held, so:
+
+  - Builds run in a process pool of PKCS12_WORKERS. At most
+    PKCS12_QUEUE_DEPTH more may wait behind them. Past that, bundle()
+    raises BundleQueueFull and the route answers 503, so a burst cannot
+    starve the rest of the app. PKCS12_WORKERS=0 builds inline.
+  - Concurrent requests for the same serial and passphrase share one build.
+  - Finished bundles are kept in an LRU of PKCS12_CACHE_SIZE entries. The
+    key is the serial plus an HMAC of the passphrase, made with a random
+    per-process key, so no passphrase or reusable fingerprint is kept.
+
+The subscriber key comes from the issued-key store. Keys written before the
+store existed are at ISSUED_DIR/<owner_name>.key. Such a file may belong to
+a later certificate for the same name, so it is only used if it matches
+the certificate's public key.
+"""
+import atexit
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from app.crypto.key_store import key_store
+from app.monitoring.metrics import pkcs12_requests, pkcs12_seconds
+from app.monitoring.timing import phase
+from config import Config
+
+
+class BundleQueueFull(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+
+class KeyNotFound(LookupError):
+    """No stored private key matches the certificate."""
+
+
+# ─── Worker side ─────────────────────────────────────────
+def build_bundle(name, cert_pem, key_pems, key_password, chain_pems, passphrase, kdf_rounds):
+    """
+    DER bytes of a PKCS#12 file. key_pems are candidates, tried in order.
+    The first that matches the certificate is used. Runs in a pool process.
+    """
+    cert   = x509.load_pem_x509_certificate(cert_pem)
+    wanted = cert.public_key().public_bytes(serialization.Encoding.DER,
+                                            serialization.PublicFormat.SubjectPublicKeyInfo)
+    for key_pem in key_pems:
+        key = serialization.load_pem_private_key(key_pem, key_password)
+        if key.public_key().public_bytes(serialization.Encoding.DER,
+                                         serialization.PublicFormat.SubjectPublicKeyInfo) == wanted:
+            break
+    else:
+        raise KeyNotFound(f"No stored private key matches certificate {cert.serial_number}")
+
+    encryption = (
+        serialization.PrivateFormat.PKCS12.encryption_builder()
+        .kdf_rounds(kdf_rounds)
+        .key_cert_algorithm(pkcs12.PBES.PBESv2SHA256AndAES256CBC)
+        .hmac_hash(hashes.SHA256())
+        .build(passphrase)
+    )
+    chain = [x509.load_pem_x509_certificate(pem) for pem in chain_pems]
+    return pkcs12.serialize_key_and_certificates(name, key, cert, chain, encryption)
+
+
+# ─── Request side ────────────────────────────────────────
+class BundleCache:
+    """Bounded LRU of built bundles."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data   = OrderedDict()
+        self._lock   = threading.Lock()
+
+    def configure(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._data.clear()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class KdfQueue:
+    """Process pool with a bounded backlog and single-flight per key."""
+
+    def __init__(self):
+        self.workers   = 1
+        self.depth     = 16
+        self._executor = None
+        self._pid      = None
+        self._slots    = None
+        self._inflight = {}
+        self._lock     = threading.Lock()
+
+    def configure(self, workers, depth):
+        self.stop()
+        self.workers, self.depth = workers, depth
+
+    def _ensure_started(self):
+        """Start the pool lazily, and again in a forked worker process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._slots    = threading.BoundedSemaphore(self.workers + self.depth)
+            self._inflight = {}
+            self._pid      = os.getpid()
+
+    def run(self, key, fn, *args, timeout=None):
+        if self.workers <= 0:
+            return fn(*args)
+        self._ensure_started()
+        with self._lock:
+            future = self._inflight.get(key)
+            started = future is None
+            if started:
+                if not self._slots.acquire(blocking=False):
+                    raise BundleQueueFull(f"{self.workers + self.depth} PKCS#12 builds already running or queued")
+                try:
+                    future = self._executor.submit(fn, *args)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                self._inflight[key] = future
+        if started:
+            future.add_done_callback(lambda f: self._finished(key))
+        return future.result(timeout)
+
+    def _finished(self, key):
+        with self._lock:
+            if self._inflight.pop(key, None) is not None:     # not from a pool replaced since
+                self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'depth': self.depth, 'inflight': len(self._inflight)}
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor, self._pid = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def subscriber_key_pems(cert):
+    """Candidate encrypted key PEMs for a certificate row: the store, then the legacy file."""
+    pems = []
+    stored = key_store.get(cert.serial_number)
+    if stored is not None:
+        pems.append(stored)
+    legacy = key_store.legacy_path(cert.owner_name)
+    if os.path.exists(legacy):
+        with open(legacy, 'rb') as f:
+            pems.append(f.read())
+    if not pems:
+        raise KeyNotFound(f"No private key stored for certificate {cert.serial_number}")
+    return pems
+
+
+class Pkcs12Bundles:
+
+    def __init__(self):
+        self.cache      = BundleCache()
+        self.queue      = KdfQueue()
+        self.kdf_rounds = 600000
+        self.timeout    = 30.0
+        self._hmac_key  = os.urandom(32)
+
+    def init_app(self, app):
+        cfg = app.config
+        self.cache.configure(cfg['PKCS12_CACHE_SIZE'])
+        self.queue.configure(cfg['PKCS12_WORKERS'], cfg['PKCS12_QUEUE_DEPTH'])
+        self.kdf_rounds = cfg['PKCS12_KDF_ROUNDS']
+        self.timeout    = cfg['PKCS12_WAIT_TIMEOUT']
+        app.extensions['pkcs12_bundles'] = self
+
+    def fingerprint(self, passphrase):
+        return hmac.new(self._hmac_key, passphrase, hashlib.sha256).hexdigest()
+
+    def bundle(self, cert, passphrase):
+        """PKCS#12 bytes for a Certificate row, protected by passphrase (bytes)."""
+        from app.ca.signing import ca_certificate
+
+        key    = (cert.serial_number, self.fingerprint(passphrase))
+        cached = self.cache.get(key)
+        if cached is not None:
+            pkcs12_requests.labels(outcome='cached').inc()
+            return cached
+
+        chain = [ca_certificate(ca).public_bytes(serialization.Encoding.PEM) for ca in ('intermediate', 'root')]
+        try:
+            with pkcs12_seconds.time(), phase('crypto'):
+                data = self.queue.run(
+                    key, build_bundle,
+                    cert.owner_name.encode(), cert.cert_pem.encode(), subscriber_key_pems(cert),
+                    Config.CA_KEY_PASSWORD, chain, passphrase, self.kdf_rounds,
+                    timeout=self.timeout,
+                )
+        except (BundleQueueFull, TimeoutError):
+            pkcs12_requests.labels(outcome='rejected').inc()
+            raise
+        pkcs12_requests.labels(outcome='built').inc()
+        self.cache.put(key, data)
+        return data
+
+
+pkcs12_bundles = Pkcs12Bundles()
+atexit.register(pkcs12_bundles.queue.stop)
@@ -0,0 +1,225 @@
+"""
+Expiry-driven automatic renewal.
+
+renew_expiring() finds ACTIVE certificates whose valid_to falls inside the
+next RENEWAL_WINDOW_DAYS (an index range scan on (status, valid_to)) and
+renews them in batches of RENEWAL_BATCH_SIZE: each gets a fresh certificate
+through issue_certificate(), then each predecessor is claimed with a
+conditional UPDATE (still ACTIVE → REVOKED). Only the claimed ones get their
+replacement and a history row, in one multi-row INSERT in the same
+transaction, and the CRL is regenerated once per batch. RENEWAL_RATE caps
+how many certificates per second are signed, so a large backlog doesn't
+starve interactive issuance of CPU.
+
+Run it from cron with `flask --app run renew-expiring`, or set
+RENEWAL_INTERVAL to run renewal_scheduler inside the app. Every web worker
+then starts a scheduler thread, but each tick first takes the "renewal"
+lease (app/models/lease.py), so only one process in the deployment renews
+at a time.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models.certificate_db import Certificate, RevokedCertificate
+from app.monitoring.metrics import certificates_renewed, certificates_revoked
+from config import Config
+
+log = logging.getLogger(__name__)
+
+SUPERSEDED_REASON = 'Superseded — automatic renewal'
+
+
+def _expiring(window_days, now=None):
+    now = now or datetime.utcnow()
+    return Certificate.query.filter(
+        Certificate.status == 'ACTIVE',
+        Certificate.valid_to >= now,
+        Certificate.valid_to <= now + timedelta(days=window_days),
+    )
+
+
+def renewal_backlog(window_days=None):
+    """Number of ACTIVE certificates expiring inside the renewal window."""
+    window_days = Config.RENEWAL_WINDOW_DAYS if window_days is None else window_days
+    return _expiring(window_days).with_entities(db.func.count(Certificate.id)).scalar()
+
+
+def reissue(old_cert):
+    """Sign a fresh certificate with old_cert's details. Returns the unsaved Certificate."""
+    from app.ca.certificate import issue_certificate
+
+    cert_pem, serial, valid_from, valid_to = issue_certificate(
+        old_cert.owner_name,
+        old_cert.email,
+        old_cert.organization
+    )
+    return Certificate(
+        serial_number = serial,
+        owner_name    = old_cert.owner_name,
+        email         = old_cert.email,
+        organization  = old_cert.organization,
+        issued_by     = 'PKI-Advanced Intermediate CA',
+        valid_from    = valid_from,
+        valid_to      = valid_to,
+        cert_pem      = cert_pem,
+        status        = 'ACTIVE'
+    )
+
+
+def renew_expiring(window_days=None, batch_size=None, max_batches=None, rate=None):
+    """
+    Renew certificates expiring within window_days.
+    Returns {'renewed': n, 'failed': n, 'batches': n, 'backlog': n}.
+    """
+    from app.audit.logger import log_action
+    from app.revocation.crl_manager import generate_crl, reason_code
+
+    window_days = Config.RENEWAL_WINDOW_DAYS if window_days is None else window_days
+    batch_size  = batch_size or Config.RENEWAL_BATCH_SIZE
+    rate        = Config.RENEWAL_RATE if rate is None else rate
+    code        = reason_code(SUPERSEDED_REASON)
+
+    renewed, batches, failed_ids = 0, 0, set()
+    while max_batches is None or batches < max_batches:
+        query = _expiring(window_days)
+        if failed_ids:
+            query = query.filter(Certificate.id.notin_(failed_ids))
+        batch = query.order_by(Certificate.valid_to).limit(batch_size).all()
+        if not batch:
+            break
+
+        pairs = []
+        for old_cert in batch:
+            started = time.monotonic()
+            try:
+                pairs.append((old_cert, reissue(old_cert)))
+            except Exception as e:
+                failed_ids.add(old_cert.id)
+                log.warning("Could not renew certificate: %s", e, extra={'serial': old_cert.serial_number})
+            if rate:
+                # Sign at most `rate` certificates per second
+                time.sleep(max(0.0, 1.0 / rate - (time.monotonic() - started)))
+
+        if pairs:
+            when  = datetime.utcnow()
+            pairs = _claim(pairs, code, when)
+        if pairs:
+            db.session.add_all(new for _, new in pairs)
+            db.session.execute(db.insert(RevokedCertificate), [
+                {'serial_number': old.serial_number, 'owner_name': old.owner_name,
+                 'revoked_at': when, 'reason': SUPERSEDED_REASON}
+                for old, _ in pairs
+            ])
+            db.session.commit()
+            certificates_revoked.inc(len(pairs))
+            certificates_renewed.labels(trigger='automatic').inc(len(pairs))
+
+            try:
+                generate_crl()
+            except Exception as e:
+                log.warning("Could not regenerate CRL: %s", e)
+
+            for old, new in pairs:
+                log_action('CERT_RENEWED',
+                    detail=f'Automatic renewal for {new.owner_name} (replaces {old.serial_number})',
+                    certificate_serial=new.serial_number
+                )
+            renewed += len(pairs)
+            log.info("Renewed %d certificate(s) (%d total)", len(pairs), renewed)
+
+        db.session.expunge_all()
+        batches += 1
+
+    return {'renewed': renewed, 'failed': len(failed_ids), 'batches': batches,
+            'backlog': renewal_backlog(window_days)}
+
+
+def _claim(pairs, code, when):
+    """
+    Supersede each predecessor with a conditional UPDATE and keep only the
+    pairs whose row was still ACTIVE. A predecessor revoked or renewed by
+    someone else since the batch was read is dropped with its replacement,
+    so it never gets a second certificate or history row.
+    """
+    from app.crypto.key_store import key_store
+
+    won = []
+    for old, new in pairs:
+        claimed = db.session.execute(
+            db.update(Certificate)
+            .where(Certificate.id == old.id, Certificate.status == 'ACTIVE')
+            .values(status='REVOKED', revoked_at=when, revocation_reason=code)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            won.append((old, new))
+        else:
+            key_store.delete(new.serial_number)
+            log.info("Certificate changed during renewal, replacement discarded",
+                     extra={'serial': old.serial_number})
+    return won
+
+
+class RenewalScheduler:
+    """Runs renew_expiring() every RENEWAL_INTERVAL seconds in a background thread."""
+
+    def __init__(self):
+        self.app     = None
+        self._thread = None
+        self._pid    = None
+        self._stop   = threading.Event()
+        self._lock   = threading.Lock()
+        self.last_run = None
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        app.extensions['renewal_scheduler'] = self
+
+        if app.config['RENEWAL_INTERVAL']:
+            @app.before_request
+            def _start_renewal_scheduler():
+                self._ensure_started()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid    = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='renewal-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        thread = self._thread
+        self._thread = None
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        thread.join(timeout)
+
+    def stats(self):
+        return {'backlog': renewal_backlog(), 'last_run': self.last_run}
+
+    def _run(self):
+        from app.models.lease import acquire_lease
+
+        interval = self.app.config['RENEWAL_INTERVAL']
+        while not self._stop.wait(interval):
+            try:
+                with self.app.app_context():
+                    # Held for two intervals: a slow run keeps it, a dead holder loses it
+                    if acquire_lease('renewal', ttl=2 * interval):
+                        self.last_run = renew_expiring()
+            except Exception as e:
+                log.exception("Renewal run failed: %s", e)
+
+
+renewal_scheduler = RenewalScheduler()
+atexit.register(renewal_scheduler.stop)
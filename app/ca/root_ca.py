@@ -1,11 +1,15 @@
 import os
 import datetime
+import logging
+import threading
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
 from app.crypto.key_manager import generate_and_save_keypair, load_private_key
 from config import Config
 
+log = logging.getLogger(__name__)
+
 
 def generate_root_ca():
     """
@@ -16,10 +20,10 @@ def generate_root_ca():
     key_path  = os.path.join(Config.ROOT_CA_DIR, "root_ca.key")
 
     if os.path.exists(cert_path) and os.path.exists(key_path):
-        print("  [ROOT CA] Already exists, skipping generation.")
+        log.info("Root CA already exists, skipping generation")
         return load_root_ca()
 
-    print("  [ROOT CA] Generating Root CA keypair...")
+    log.info("Generating Root CA keypair")
     private_key, public_key = generate_and_save_keypair(
         name="root_ca",
         directory=Config.ROOT_CA_DIR,
@@ -80,28 +84,52 @@ def generate_root_ca():
     with open(cert_path, 'wb') as f:
         f.write(cert.public_bytes(serialization.Encoding.PEM))
 
-    print(f"  [ROOT CA] Certificate saved: {cert_path}")
-    print(f"  [ROOT CA] Valid for 10 years until: {cert.not_valid_after_utc}")
+    log.info("Root CA certificate saved: %s", cert_path,
+             extra={'serial': str(cert.serial_number), 'valid_to': cert.not_valid_after_utc.isoformat()})
 
     return private_key, cert
 
 
-def load_root_ca():
-    """Load existing Root CA key and certificate from disk."""
-    key_path  = os.path.join(Config.ROOT_CA_DIR, "root_ca.key")
-    cert_path = os.path.join(Config.ROOT_CA_DIR, "root_ca.crt")
+# ─── CA material cache ──────────────────────────────────
+# Decrypting a CA key is the slowest thing a request can do, so each key and
+# certificate is loaded once per file version and shared by every caller.
+# Loaded before a fork (gunicorn --preload), workers share it copy-on-write.
+_ca_cache = {}
+_ca_lock  = threading.Lock()
 
-    private_key = load_private_key(key_path, Config.CA_KEY_PASSWORD)
 
-    with open(cert_path, 'rb') as f:
-        cert = x509.load_pem_x509_certificate(f.read())
+def load_ca_material(key_path, cert_path):
+    """(private_key, cert) for a CA, decrypted on first use and reused until the files change."""
+    stamp  = (os.stat(key_path).st_mtime_ns, os.stat(cert_path).st_mtime_ns)
+    cached = _ca_cache.get(key_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
 
-    return private_key, cert
+    with _ca_lock:
+        cached = _ca_cache.get(key_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        private_key = load_private_key(key_path, Config.CA_KEY_PASSWORD)
+        with open(cert_path, 'rb') as f:
+            cert = x509.load_pem_x509_certificate(f.read())
+        _ca_cache[key_path] = (stamp, (private_key, cert))
+        return _ca_cache[key_path][1]
+
+
+def clear_ca_cache():
+    _ca_cache.clear()
+
+
+def load_root_ca():
+    """Load existing Root CA key and certificate (cached, see load_ca_material)."""
+    return load_ca_material(os.path.join(Config.ROOT_CA_DIR, "root_ca.key"),
+                            os.path.join(Config.ROOT_CA_DIR, "root_ca.crt"))
 
 
 def get_root_ca_info():
     """Return Root CA certificate details as a dict for display."""
-    _, cert = load_root_ca()
+    from app.ca.signing import ca_certificate
+    cert = ca_certificate('root')
     return {
         "subject":    cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
         "issuer":     cert.issuer.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
@@ -0,0 +1,408 @@
+"""
+CA signing backends.
+
+Everything signed with a CA key goes through the backend chosen by
+SIGNING_BACKEND:
+
+    file    the password-encrypted PEM keys under storage/. Each key is
+            decrypted once per process and cached (load_ca_material).
+    pkcs11  keys held on a PKCS#11 token: an HSM, or SoftHSM for local work.
+            Needs python-pkcs11.
+
+Callers use sign_certificate(builder, ca), sign_crl(builder, ca) and
+sign_bytes(data, ca), where ca is 'root' or 'intermediate'. The CA
+certificates stay on disk either way; only the private-key operation moves.
+
+cryptography's builders only sign with keys they hold themselves. So the
+PKCS#11 backend builds the certificate or CRL with a throwaway RSA key,
+signs the to-be-signed bytes on the token, and splices that signature into
+the DER in place of the throwaway one. The algorithm identifier is
+sha256WithRSAEncryption either way, so the result is byte-for-byte what
+builder.sign() with the CA key would produce.
+
+Opening a PKCS#11 session and logging in costs far more than one signature
+on most tokens. The backend therefore keeps up to PKCS11_POOL_SIZE
+logged-in sessions and lends one to each signature. Private-key handles
+are looked up once per session and kept with it.
+"""
+import contextlib
+import logging
+import os
+import queue
+import threading
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from app.ca.root_ca import load_ca_material
+from app.monitoring.timing import phase
+from config import Config
+
+log = logging.getLogger(__name__)
+
+CA_NAMES = ('root', 'intermediate')
+
+
+def ca_paths(ca):
+    """(key_path, cert_path) of a CA's files."""
+    if ca == 'root':
+        return (os.path.join(Config.ROOT_CA_DIR, "root_ca.key"),
+                os.path.join(Config.ROOT_CA_DIR, "root_ca.crt"))
+    if ca == 'intermediate':
+        return (os.path.join(Config.INTERMEDIATE_DIR, "intermediate.key"),
+                os.path.join(Config.INTERMEDIATE_DIR, "intermediate.crt"))
+    raise ValueError(f"unknown CA {ca!r}, expected one of {', '.join(CA_NAMES)}")
+
+
+# ─── DER splicing ────────────────────────────────────────
+_placeholder = None
+_placeholder_lock = threading.Lock()
+
+
+def _placeholder_key():
+    """Throwaway RSA key the builders sign with before the real signature is spliced in."""
+    global _placeholder
+    if _placeholder is None:
+        with _placeholder_lock:
+            if _placeholder is None:
+                _placeholder = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return _placeholder
+
+
+def _der_length(n):
+    if n < 0x80:
+        return bytes([n])
+    raw = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(raw)]) + raw
+
+
+def _element(der, pos):
+    """(start of contents, end of element) for the DER element starting at pos."""
+    length, pos = der[pos + 1], pos + 2
+    if length & 0x80:
+        size = length & 0x7F
+        length, pos = int.from_bytes(der[pos:pos + size], 'big'), pos + size
+    return pos, pos + length
+
+
+def splice_signature(signed_der, signature):
+    """
+    Swap the signature of a DER certificate or CRL, which is
+    SEQUENCE { tbs, signatureAlgorithm, BIT STRING signature }.
+    """
+    contents, _ = _element(signed_der, 0)
+    _, tbs_end  = _element(signed_der, contents)
+    _, alg_end  = _element(signed_der, tbs_end)
+    bits = b'\x00' + signature
+    body = signed_der[contents:alg_end] + b'\x03' + _der_length(len(bits)) + bits
+    return b'\x30' + _der_length(len(body)) + body
+
+
+# ─── Backends ────────────────────────────────────────────
+class SigningBackend:
+    """Signs with a named CA key. Subclasses implement sign()."""
+
+    name = None
+
+    def __init__(self):
+        self._certs = {}           # ca → (mtime, certificate)
+
+    def sign(self, data, ca='intermediate'):
+        """PKCS#1 v1.5 / SHA-256 signature over data with the CA's key."""
+        raise NotImplementedError
+
+    def certificate(self, ca='intermediate'):
+        """The CA certificate, from disk."""
+        _, cert_path = ca_paths(ca)
+        stamp  = os.stat(cert_path).st_mtime_ns
+        cached = self._certs.get(ca)
+        if cached is None or cached[0] != stamp:
+            with open(cert_path, 'rb') as f:
+                cached = self._certs[ca] = (stamp, x509.load_pem_x509_certificate(f.read()))
+        return cached[1]
+
+    def sign_certificate(self, builder, ca='intermediate'):
+        draft = builder.sign(_placeholder_key(), hashes.SHA256())
+        signature = self.sign(draft.tbs_certificate_bytes, ca)
+        return x509.load_der_x509_certificate(
+            splice_signature(draft.public_bytes(serialization.Encoding.DER), signature))
+
+    def sign_crl(self, builder, ca='intermediate'):
+        draft = builder.sign(_placeholder_key(), hashes.SHA256())
+        signature = self.sign(draft.tbs_certlist_bytes, ca)
+        return x509.load_der_x509_crl(
+            splice_signature(draft.public_bytes(serialization.Encoding.DER), signature))
+
+    def preload(self):
+        """Load what signing needs up front (CA_PRELOAD)."""
+        for ca in CA_NAMES:
+            self.certificate(ca)
+
+    def close(self):
+        pass
+
+
+class FileSigningBackend(SigningBackend):
+    """CA keys from the encrypted PEM files, decrypted once and cached."""
+
+    name = 'file'
+
+    def key(self, ca='intermediate'):
+        return load_ca_material(*ca_paths(ca))[0]
+
+    # certificate() is the base class's: reading the public certificate for a
+    # chain or an issuer name never decrypts the private key
+
+    def preload(self):
+        super().preload()
+        for ca in CA_NAMES:
+            self.key(ca)
+
+    def sign(self, data, ca='intermediate'):
+        key = self.key(ca)
+        with phase('crypto'):
+            return key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+
+    # The key is local, so the builders can sign with it directly
+    def sign_certificate(self, builder, ca='intermediate'):
+        key = self.key(ca)
+        with phase('crypto'):
+            return builder.sign(key, hashes.SHA256())
+
+    def sign_crl(self, builder, ca='intermediate'):
+        key = self.key(ca)
+        with phase('crypto'):
+            return builder.sign(key, hashes.SHA256())
+
+
+class _PooledSession:
+    __slots__ = ('session', 'keys')
+
+    def __init__(self, session):
+        self.session = session
+        self.keys    = {}          # ca → private key handle
+
+
+class SessionPool:
+    """
+    Up to `size` sessions, opened on demand and reused. A session that
+    raised one of `discard_on` (token errors) while lent out is closed
+    rather than returned; any other error leaves it usable. After a fork
+    the parent's sessions are abandoned and after_fork() runs first.
+    """
+
+    def __init__(self, opener, size, timeout, after_fork=None, discard_on=Exception):
+        self._opener     = opener
+        self._after_fork = after_fork
+        self._discard_on = discard_on
+        self.size        = max(1, size)
+        self.timeout     = timeout
+        self._idle       = queue.LifoQueue()
+        self._lock       = threading.Lock()
+        self._pid        = os.getpid()
+        self._opened     = 0
+        self._stats      = {'opened': 0, 'reused': 0, 'discarded': 0, 'waited': 0}
+
+    @contextlib.contextmanager
+    def session(self):
+        entry = self._acquire()
+        try:
+            yield entry
+        except self._discard_on:
+            self._discard(entry)
+            raise
+        except BaseException:
+            self._idle.put(entry)
+            raise
+        self._idle.put(entry)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _acquire(self):
+        if self._pid != os.getpid():
+            self._forked()
+        try:
+            entry = self._idle.get_nowait()
+            self._count('reused')
+            return entry
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                entry = _PooledSession(self._opener())
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+            self._count('opened')
+            return entry
+
+        self._count('waited')
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no signing session free within {self.timeout}s "
+                               f"(PKCS11_POOL_SIZE={self.size})") from None
+
+    def _discard(self, entry):
+        with self._lock:
+            self._opened -= 1
+            self._stats['discarded'] += 1
+        with contextlib.suppress(Exception):
+            entry.session.close()
+
+    def _forked(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._idle   = queue.LifoQueue()
+            self._opened = 0
+            self._pid    = os.getpid()
+            if self._after_fork:
+                self._after_fork()
+
+    def close(self):
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(entry)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'open': self._opened, 'idle': self._idle.qsize(), 'size': self.size}
+
+
+class Pkcs11SigningBackend(SigningBackend):
+    """CA keys on a PKCS#11 token, signed through a pool of logged-in sessions."""
+
+    name = 'pkcs11'
+
+    def __init__(self, module, token_label, pin, key_labels, pool_size=4, pool_timeout=5.0):
+        try:
+            import pkcs11
+        except ImportError:
+            raise RuntimeError("SIGNING_BACKEND=pkcs11 needs python-pkcs11 (pip install python-pkcs11)") from None
+        if not module:
+            raise RuntimeError("SIGNING_BACKEND=pkcs11 needs PKCS11_MODULE, the token's PKCS#11 library")
+        super().__init__()
+        self._pkcs11     = pkcs11
+        self._lib        = pkcs11.lib(module)
+        self.token_label = token_label
+        self.key_labels  = key_labels
+        self._pin        = pin
+        # Only token errors mean the session may be broken; a config error
+        # such as a missing key label leaves it fine to reuse
+        self.pool = SessionPool(self._open_session, pool_size, pool_timeout, after_fork=self._reinitialize,
+                                discard_on=pkcs11.exceptions.PKCS11Error)
+
+    def _open_session(self):
+        token = self._lib.get_token(token_label=self.token_label)
+        try:
+            return token.open(user_pin=self._pin)
+        except self._pkcs11.exceptions.UserAlreadyLoggedIn:
+            return token.open()      # login is per application, not per session
+
+    def _reinitialize(self):
+        # A forked child must call C_Initialize again before using the token
+        if hasattr(self._lib, 'reinitialize'):
+            self._lib.reinitialize()
+
+    def _key(self, entry, ca):
+        key = entry.keys.get(ca)
+        if key is None:
+            if ca not in self.key_labels:
+                raise ValueError(f"no PKCS11 key label configured for the {ca} CA")
+            key = entry.keys[ca] = entry.session.get_key(
+                object_class=self._pkcs11.ObjectClass.PRIVATE_KEY, label=self.key_labels[ca])
+        return key
+
+    def sign(self, data, ca='intermediate'):
+        with self.pool.session() as entry:
+            key = self._key(entry, ca)
+            with phase('crypto'):
+                return bytes(key.sign(data, mechanism=self._pkcs11.Mechanism.SHA256_RSA_PKCS))
+
+    def import_key(self, ca, private_key):
+        """Copy a CA private key onto the token under its configured label."""
+        from pkcs11.util.rsa import decode_rsa_private_key
+        der   = private_key.private_bytes(serialization.Encoding.DER,
+                                          serialization.PrivateFormat.TraditionalOpenSSL,
+                                          serialization.NoEncryption())
+        attrs = decode_rsa_private_key(der)
+        Attribute = self._pkcs11.Attribute
+        attrs.update({
+            Attribute.LABEL:       self.key_labels[ca],
+            Attribute.TOKEN:       True,
+            Attribute.PRIVATE:     True,
+            Attribute.SENSITIVE:   True,
+            Attribute.EXTRACTABLE: False,
+            Attribute.SIGN:        True,
+        })
+        token = self._lib.get_token(token_label=self.token_label)
+        with token.open(user_pin=self._pin, rw=True) as session:
+            session.create_object(attrs)
+
+    def close(self):
+        self.pool.close()
+
+
+def make_backend(cfg):
+    """A backend from the SIGNING_BACKEND / PKCS11_* settings."""
+    if cfg['SIGNING_BACKEND'] == 'file':
+        return FileSigningBackend()
+    if cfg['SIGNING_BACKEND'] == 'pkcs11':
+        return Pkcs11SigningBackend(
+            module       = cfg['PKCS11_MODULE'],
+            token_label  = cfg['PKCS11_TOKEN_LABEL'],
+            pin          = cfg['PKCS11_PIN'],
+            key_labels   = {'root': cfg['PKCS11_ROOT_KEY_LABEL'],
+                            'intermediate': cfg['PKCS11_INTERMEDIATE_KEY_LABEL']},
+            pool_size    = cfg['PKCS11_POOL_SIZE'],
+            pool_timeout = cfg['PKCS11_POOL_TIMEOUT'],
+        )
+    raise ValueError(f"SIGNING_BACKEND must be file or pkcs11, not {cfg['SIGNING_BACKEND']!r}")
+
+
+# ─── Module-level access ─────────────────────────────────
+_backend = None
+
+
+def init_signing(app):
+    global _backend
+    if _backend is not None:
+        _backend.close()
+    _backend = make_backend(app.config)
+    app.extensions['signing_backend'] = _backend
+    log.info("CA signing backend: %s", _backend.name)
+
+
+def get_backend():
+    """The configured backend (file keys until init_signing() has run)."""
+    global _backend
+    if _backend is None:
+        _backend = FileSigningBackend()
+    return _backend
+
+
+def ca_certificate(ca='intermediate'):
+    return get_backend().certificate(ca)
+
+
+def sign_certificate(builder, ca='intermediate'):
+    return get_backend().sign_certificate(builder, ca)
+
+
+def sign_crl(builder, ca='intermediate'):
+    return get_backend().sign_crl(builder, ca)
+
+
+def sign_bytes(data, ca='intermediate'):
+    return get_backend().sign(data, ca)
@@ -0,0 +1,114 @@
+import click
+
+
+def register_cli(app):
+    """Attach maintenance commands to `flask --app run ...`."""
+
+    @app.cli.command('archive-certs')
+    @click.option('--retention-days', type=int, default=None,
+                  help='Archive certificates expired longer than this (default: ARCHIVE_RETENTION_DAYS).')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Rows moved per transaction (default: ARCHIVE_BATCH_SIZE).')
+    @click.option('--max-batches', type=int, default=None,
+                  help='Stop after this many batches.')
+    def archive_certs(retention_days, batch_size, max_batches):
+        """Move long-expired certificates to the archive table."""
+        from app.models.archive import archive_expired_certificates
+        total = archive_expired_certificates(retention_days, batch_size, max_batches)
+        click.echo(f"Archived {total} certificate(s).")
+
+    @app.cli.command('gc-issued-keys')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Archived serials read per query (default: KEY_STORE_GC_BATCH_SIZE).')
+    @click.option('--dry-run', is_flag=True, help='Count the keys without deleting them.')
+    def gc_issued_keys(batch_size, dry_run):
+        """Delete the stored private keys of archived certificates."""
+        from app.crypto.key_store import key_store
+        removed = key_store.collect_archived(batch_size, dry_run)
+        click.echo(f"{'Would remove' if dry_run else 'Removed'} {removed} archived key(s).")
+
+    @app.cli.command('list-issued-keys')
+    def list_issued_keys():
+        """Print the serial of every key in the issued-key store."""
+        from app.crypto.key_store import key_store
+        for serial in key_store.iter_serials():
+            click.echo(serial)
+
+    @app.cli.command('export-certs')
+    @click.option('--format', 'fmt', type=click.Choice(['pem', 'zip', 'pkcs7']), default='pem')
+    @click.option('--status', type=click.Choice(['all', 'active', 'revoked', 'expired']), default='active')
+    @click.option('--org', default=None, help='Only this organization.')
+    @click.option('--since', type=click.DateTime(['%Y-%m-%d']), default=None, help='Issued on or after this day.')
+    @click.option('--until', type=click.DateTime(['%Y-%m-%d']), default=None, help='Issued on or before this day.')
+    @click.option('--chain/--no-chain', default=None,
+                  help='Start with the Root and Intermediate CA certificates (default: only for pkcs7).')
+    @click.option('-o', '--output', type=click.File('wb'), default='-', help='Output file (default: stdout).')
+    def export_certs(fmt, status, org, since, until, chain, output):
+        """Stream certificates to a PEM bundle, ZIP or PKCS#7 file."""
+        from datetime import timedelta
+        from app.ca.export import export_certificates, iter_certificates
+        # Both ends are whole days, as in /certificates/export
+        rows = iter_certificates(status, org, since, until + timedelta(days=1) if until else None)
+        for chunk in export_certificates(fmt, rows, chain=fmt == 'pkcs7' if chain is None else chain):
+            output.write(chunk)
+
+    @app.cli.command('renew-expiring')
+    @click.option('--window-days', type=int, default=None,
+                  help='Renew certificates expiring within this many days (default: RENEWAL_WINDOW_DAYS).')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Certificates per transaction and CRL publish (default: RENEWAL_BATCH_SIZE).')
+    @click.option('--max-batches', type=int, default=None,
+                  help='Stop after this many batches.')
+    def renew_expiring_cmd(window_days, batch_size, max_batches):
+        """Renew certificates that are about to expire."""
+        from app.ca.renewal import renew_expiring
+        result = renew_expiring(window_days, batch_size, max_batches)
+        click.echo(f"Renewed {result['renewed']} certificate(s), {result['failed']} failed, "
+                   f"{result['backlog']} still expiring in the window.")
+
+    @app.cli.command('audit-rollover')
+    @click.option('--batch-size', type=int, default=None,
+                  help='Rows moved per transaction (default: AUDIT_ROLLOVER_BATCH_SIZE).')
+    def audit_rollover(batch_size):
+        """Move audit rows older than this month into audit_logs_YYYYMM tables."""
+        from app.audit.partitions import rollover_audit_log
+        moved = rollover_audit_log(batch_size=batch_size)
+        click.echo(f"Moved {moved} audit row(s) into monthly tables.")
+
+    @app.cli.command('audit-retention')
+    @click.option('--keep-months', type=int, default=None,
+                  help='Drop monthly audit tables older than this (default: AUDIT_RETENTION_MONTHS).')
+    def audit_retention(keep_months):
+        """Drop (or compress, on MySQL) old monthly audit tables."""
+        from app.audit.partitions import apply_retention
+        dropped = apply_retention(keep_months)
+        click.echo(f"Dropped {len(dropped)} monthly audit table(s).")
+
+    @app.cli.command('import-ca-keys')
+    @click.option('--ca', 'cas', multiple=True, type=click.Choice(['root', 'intermediate']),
+                  help='CA key to import (default: both).')
+    def import_ca_keys(cas):
+        """Copy the CA private keys from storage/ onto the PKCS#11 token."""
+        from app.ca.root_ca import load_ca_material
+        from app.ca.signing import ca_paths, make_backend
+        backend = make_backend({**app.config, 'SIGNING_BACKEND': 'pkcs11'})
+        for ca in cas or ('root', 'intermediate'):
+            backend.import_key(ca, load_ca_material(*ca_paths(ca))[0])
+            click.echo(f"Imported the {ca} CA key as {backend.key_labels[ca]!r} "
+                       f"on token {backend.token_label!r}.")
+        click.echo("Set SIGNING_BACKEND=pkcs11 and move the key files somewhere offline.")
+
+    @app.cli.command('create-api-token')
+    @click.argument('username')
+    @click.option('--name', default='cli', help='Label shown in the profile page.')
+    @click.option('--scopes', default='*', help='Comma-separated blueprint names, or * for all.')
+    @click.option('--days', type=int, default=None, help='Expire after this many days.')
+    def create_token(username, name, scopes, days):
+        """Create an API token for USERNAME and print it once."""
+        from app.auth.models import User
+        from app.auth.tokens import create_api_token
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No such user: {username}")
+        _, plaintext = create_api_token(user, name, scopes, days)
+        click.echo(plaintext)
@@ -1,33 +1,44 @@
+import logging
 import os
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
+from app.monitoring.metrics import keygen_seconds, key_write_seconds
+from app.monitoring.timing import phase
 from config import Config
 
+log = logging.getLogger(__name__)
+
 
 def generate_rsa_keypair():
     """Generate a 2048-bit RSA key pair."""
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-    )
+    with keygen_seconds.time(), phase('crypto'):
+        private_key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+        )
     return private_key, private_key.public_key()
 
 
-def save_private_key(private_key, filepath, password=None):
-    """Save private key to file — encrypted if password given."""
+def private_key_pem(private_key, password=None):
+    """PEM bytes of a private key — encrypted if password given."""
     if password:
         encryption = serialization.BestAvailableEncryption(password)
     else:
         encryption = serialization.NoEncryption()
-
-    pem = private_key.private_bytes(
+    return private_key.private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.TraditionalOpenSSL,
         encryption_algorithm=encryption
     )
-    with open(filepath, 'wb') as f:
-        f.write(pem)
-    print(f"  [KEY] Private key saved: {filepath}")
+
+
+def save_private_key(private_key, filepath, password=None):
+    """Save private key to file — encrypted if password given."""
+    with key_write_seconds.time(), phase('crypto'):
+        pem = private_key_pem(private_key, password)
+        with open(filepath, 'wb') as f:
+            f.write(pem)
+    log.debug("Private key saved: %s", filepath)
 
 
 def save_public_key(public_key, filepath):
@@ -38,13 +49,15 @@ def save_public_key(public_key, filepath):
     )
     with open(filepath, 'wb') as f:
         f.write(pem)
-    print(f"  [KEY] Public key saved:  {filepath}")
+    log.debug("Public key saved: %s", filepath)
 
 
 def load_private_key(filepath, password=None):
     """Load private key from file."""
     with open(filepath, 'rb') as f:
-        return serialization.load_pem_private_key(f.read(), password=password)
+        pem = f.read()
+    with phase('crypto'):
+        return serialization.load_pem_private_key(pem, password=password)
 
 
 def load_public_key(filepath):
@@ -0,0 +1,277 @@
+"""
+Issued-key store.
+
+Subscriber private keys are stored by certificate serial, not owner name.
+A re-issue for the same person therefore gets a new file and never
+overwrites the old key. Files are sharded two levels deep on the SHA-256
+of the serial, so no directory holds more than a few hundred entries:
+
+    ISSUED_DIR/3f/a2/51920393....key
+
+Every write is atomic. The key goes to a temp file in the shard directory,
+is fsynced, is renamed over the final name, and then the directory is
+fsynced. A crash leaves the key complete or absent, never half written.
+
+fsync is the slow part, so KEY_STORE_FSYNC=group shares it across
+concurrent issuances. The first writer to arrive syncs everything queued
+behind it, after waiting up to KEY_STORE_FSYNC_WINDOW seconds for more.
+The others wait for that round and do not sync themselves. =always syncs
+each write on its own. =off skips fsync (tests, benchmarks).
+
+The certificate tables are the index. collect_archived() pages through
+certificates_archive by id and deletes the keys of archived certificates.
+iter_serials() walks the shards when the filesystem itself must be listed.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+from app.crypto.key_manager import private_key_pem
+from app.monitoring.metrics import key_write_seconds, key_fsync_rounds, key_fsyncs
+from app.monitoring.timing import phase
+from config import Config
+
+log = logging.getLogger(__name__)
+
+FSYNC_MODES = ('group', 'always', 'off')
+
+
+class _Pending:
+    __slots__ = ('target', 'done', 'error')
+
+    def __init__(self, target):
+        self.target = target      # open file descriptor, or a directory path
+        self.done   = False
+        self.error  = None
+
+
+def _fsync_dir(path):
+    if not hasattr(os, 'O_DIRECTORY'):       # Windows: directories cannot be opened for fsync
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync(target):
+    if isinstance(target, int):
+        os.fsync(target)
+    else:
+        _fsync_dir(target)
+
+
+class GroupSync:
+    """
+    Group commit for fsync. sync() blocks until its target is durable.
+    One caller at a time leads a round and syncs every target queued so far.
+    Everyone else waits for a round that covers their own target.
+    """
+
+    def __init__(self, window=0.0):
+        self.window   = window
+        self.rounds   = 0
+        self.synced   = 0
+        self._cond    = threading.Condition()
+        self._pending = []
+        self._leading = False
+
+    def sync(self, target):
+        entry = _Pending(target)
+        with self._cond:
+            self._pending.append(entry)
+            while not entry.done and self._leading:
+                self._cond.wait()
+            if entry.done:
+                if entry.error:
+                    raise entry.error
+                return
+            self._leading = True
+        try:
+            if self.window:
+                time.sleep(self.window)          # let concurrent writers join this round
+            with self._cond:
+                batch, self._pending = self._pending, []
+            self._flush(batch)
+        finally:
+            with self._cond:
+                self._leading = False
+                self._cond.notify_all()
+        if entry.error:
+            raise entry.error
+
+    def _flush(self, batch):
+        results = {}                             # a shard directory is synced once per round
+        for entry in batch:
+            key = entry.target
+            if key not in results:
+                try:
+                    _fsync(key)
+                    results[key] = None
+                except OSError as e:
+                    results[key] = e
+            entry.error = results[key]
+            entry.done  = True
+        self.rounds += 1
+        self.synced += len(results)
+        key_fsync_rounds.inc()
+        key_fsyncs.inc(len(results))
+
+    def stats(self):
+        return {'rounds': self.rounds, 'synced': self.synced}
+
+
+class KeyStore:
+
+    def __init__(self):
+        self.root   = None
+        self.fsync  = 'group'
+        self.syncer = GroupSync()
+
+    def init_app(self, app):
+        cfg = app.config
+        if cfg['KEY_STORE_FSYNC'] not in FSYNC_MODES:
+            raise ValueError(f"KEY_STORE_FSYNC must be one of {', '.join(FSYNC_MODES)}, "
+                             f"not {cfg['KEY_STORE_FSYNC']!r}")
+        self.root   = cfg['ISSUED_DIR']
+        self.fsync  = cfg['KEY_STORE_FSYNC']
+        self.syncer = GroupSync(cfg['KEY_STORE_FSYNC_WINDOW'])
+        app.extensions['key_store'] = self
+
+    # ─── Layout ──────────────────────────────────────────
+    def _root(self):
+        return self.root or Config.ISSUED_DIR
+
+    def path_for(self, serial):
+        serial = str(serial)
+        digest = hashlib.sha256(serial.encode()).hexdigest()
+        return os.path.join(self._root(), digest[:2], digest[2:4], f"{serial}.key")
+
+    def legacy_path(self, owner_name):
+        """Where issue_certificate() used to put keys: ISSUED_DIR/<owner_name>.key."""
+        return os.path.join(self._root(), f"{owner_name.replace(' ', '_')}.key")
+
+    # ─── Writes ──────────────────────────────────────────
+    def _sync(self, target):
+        if self.fsync == 'group':
+            self.syncer.sync(target)
+        elif self.fsync == 'always':
+            _fsync(target)
+            key_fsync_rounds.inc()
+            key_fsyncs.inc()
+
+    def put(self, serial, pem):
+        """Atomically write PEM bytes for serial. An existing key is never replaced."""
+        path      = self.path_for(serial)
+        directory = os.path.dirname(path)
+        if os.path.exists(path):
+            raise FileExistsError(f"A key for serial {serial} is already stored")
+
+        new_dirs = []                            # shard directories this write creates
+        parent = directory
+        while not os.path.isdir(parent):
+            new_dirs.append(parent)
+            parent = os.path.dirname(parent)
+        os.makedirs(directory, exist_ok=True)
+
+        tmp = os.path.join(directory, f".{serial}.{uuid.uuid4().hex[:8]}.tmp")
+        fd  = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+        try:
+            try:
+                view = memoryview(pem)
+                while view:
+                    view = view[os.write(fd, view):]
+                self._sync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+        # The rename is durable once the directory entry is; a new shard
+        # directory also needs its own entry in the parent synced.
+        for d in [directory] + [os.path.dirname(d) for d in new_dirs]:
+            self._sync(d)
+        return path
+
+    def save(self, serial, private_key, password=None):
+        """Serialise (and encrypt) private_key and store it under serial."""
+        with key_write_seconds.time(), phase('crypto'):
+            path = self.put(serial, private_key_pem(private_key, password))
+        log.debug("Private key saved: %s", path, extra={'serial': str(serial)})
+        return path
+
+    # ─── Reads ───────────────────────────────────────────
+    def get(self, serial):
+        """PEM bytes for serial, or None."""
+        try:
+            with open(self.path_for(serial), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, serial):
+        return os.path.exists(self.path_for(serial))
+
+    def delete(self, serial):
+        try:
+            os.unlink(self.path_for(serial))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_serials(self):
+        """Every serial with a stored key, shard by shard."""
+        root = self._root()
+        if not os.path.isdir(root):
+            return
+        for first in sorted(os.scandir(root), key=lambda e: e.name):
+            if not (first.is_dir() and len(first.name) == 2):
+                continue
+            for second in sorted(os.scandir(first.path), key=lambda e: e.name):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if entry.name.endswith('.key') and not entry.name.startswith('.'):
+                        yield entry.name[:-4]
+
+    # ─── Garbage collection ──────────────────────────────
+    def collect_archived(self, batch_size=None, dry_run=False):
+        """
+        Delete the keys of certificates in certificates_archive.
+        Returns the number of key files removed (or that would be, with dry_run).
+        """
+        from app import db
+        from app.models.certificate_db import ArchivedCertificate
+
+        batch_size = batch_size or Config.KEY_STORE_GC_BATCH_SIZE
+        removed = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                db.select(ArchivedCertificate.id, ArchivedCertificate.serial_number)
+                .where(ArchivedCertificate.id > last_id)
+                .order_by(ArchivedCertificate.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                if dry_run:
+                    removed += self.exists(row.serial_number)
+                else:
+                    removed += self.delete(row.serial_number)
+        log.info("Removed %d archived key(s)", removed, extra={'dry_run': dry_run})
+        return removed
+
+
+key_store = KeyStore()
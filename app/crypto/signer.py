@@ -1,15 +1,26 @@
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import padding, utils
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import base64
+import binascii
+import mmap
+import os
+from app.monitoring.timing import phase
+
+CHUNK_SIZE = 1024 * 1024        # bytes hashed per read when streaming files
+SIG_SUFFIX = '.sig'             # detached signature file next to the artifact
+MIN_PARALLEL = 64               # below this many items a thread pool costs more than it saves
 
 
 def sign_data(data: bytes, private_key) -> str:
     """Sign data with private key. Returns base64 signature string."""
-    signature = private_key.sign(
-        data,
-        padding.PKCS1v15(),
-        hashes.SHA256()
-    )
+    with phase('crypto'):
+        signature = private_key.sign(
+            data,
+            padding.PKCS1v15(),
+            hashes.SHA256()
+        )
     return base64.b64encode(signature).decode('utf-8')
 
 
@@ -17,26 +28,260 @@ def verify_signature(data: bytes, signature_b64: str, public_key) -> bool:
     """Verify a base64 signature against data using public key."""
     try:
         signature = base64.b64decode(signature_b64)
-        public_key.verify(
-            signature,
-            data,
+        with phase('crypto'):
+            public_key.verify(
+                signature,
+                data,
+                padding.PKCS1v15(),
+                hashes.SHA256()
+            )
+        return True
+    except Exception:
+        return False
+
+
+# ─── Batch: many messages, one key ──────────────────────
+# One padding/hash object for the whole batch, base64 decoded up front, and
+# the RSA work spread over threads in contiguous slices. Threads only pay
+# off where the crypto backend releases the GIL during the RSA operation —
+# benchmarks/bench_signatures.py shows whether it does on a given build.
+# verify_many() results come back as a ResultBitmap, one bit per item.
+
+class ResultBitmap:
+    """Compact verify_many() result: bit i is set when item i verified."""
+
+    __slots__ = ('bits', 'size')
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+
+    def set(self, i):
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (self[i] for i in range(self.size))
+
+    def count(self):
+        """Number of items that verified."""
+        return sum(bin(b).count('1') for b in self.bits)
+
+    def all(self):
+        return self.count() == self.size
+
+    def failed(self):
+        """Indexes of the items that did not verify."""
+        return [i for i in range(self.size) if not self[i]]
+
+    def __repr__(self):
+        return f"<ResultBitmap {self.count()}/{self.size} valid>"
+
+
+def _run_sliced(fn, n, workers, align=1):
+    """Call fn(start, end) over 0..n, split across threads in align-multiple slices."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or n < MIN_PARALLEL:
+        fn(0, n)
+        return
+    step = -(-n // workers)
+    step = -(-step // align) * align
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='signer') as pool:
+        for future in [pool.submit(fn, a, min(a + step, n)) for a in range(0, n, step)]:
+            future.result()
+
+
+def _decode_signature(sig):
+    if isinstance(sig, str):
+        try:
+            return binascii.a2b_base64(sig)
+        except binascii.Error:
+            return None
+    return bytes(sig)
+
+
+def verify_many(items, public_key, workers=None, raw=False) -> ResultBitmap:
+    """
+    Verify many (data, signature) pairs against one public key.
+    Signatures are base64 strings (as sign_data returns) or, with raw=True,
+    signature bytes. Malformed base64 counts as a failed item.
+    """
+    items  = list(items)
+    data   = [d for d, _ in items]
+    sigs   = [s for _, s in items] if raw else [_decode_signature(s) for _, s in items]
+    result = ResultBitmap(len(items))
+    pad    = padding.PKCS1v15()
+    algo   = hashes.SHA256()
+    verify = public_key.verify
+
+    def work(start, end):
+        for i in range(start, end):
+            if sigs[i] is None:
+                continue
+            try:
+                verify(sigs[i], data[i], pad, algo)
+            except (InvalidSignature, ValueError, TypeError):
+                continue
+            result.set(i)
+
+    # Slices start on byte boundaries, so no two threads update the same bitmap byte
+    _run_sliced(work, len(items), workers, align=8)
+    return result
+
+
+def sign_many(messages, private_key, workers=None, raw=False) -> list:
+    """
+    Sign many messages with one private key. Returns base64 strings
+    (same format as sign_data), or signature bytes with raw=True.
+    """
+    messages = list(messages)
+    out      = [None] * len(messages)
+    pad      = padding.PKCS1v15()
+    algo     = hashes.SHA256()
+    sign     = private_key.sign
+
+    def work(start, end):
+        for i in range(start, end):
+            out[i] = sign(messages[i], pad, algo)
+
+    _run_sliced(work, len(messages), workers)
+    if raw:
+        return out
+    return [base64.b64encode(sig).decode('ascii') for sig in out]
+
+
+# ─── Streaming file signatures ──────────────────────────
+# The file is hashed in CHUNK_SIZE pieces (or through mmap) and only the
+# 32-byte digest is signed with Prehashed, so memory stays flat however big
+# the file is. The signature is identical to sign_data(whole_file).
+
+def hash_file(filepath: str, chunk_size: int = CHUNK_SIZE, use_mmap: bool = False) -> bytes:
+    """SHA-256 digest of a file, read in fixed-size chunks (or mapped)."""
+    digest = hashes.Hash(hashes.SHA256())
+    with open(filepath, 'rb') as f:
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mapped)
+                for offset in range(0, len(view), chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+                view.release()
+        else:
+            buffer = bytearray(chunk_size)
+            view   = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    return digest.finalize()
+
+
+def sign_digest(digest: bytes, private_key) -> str:
+    """Sign a precomputed SHA-256 digest. Returns base64 signature string."""
+    with phase('crypto'):
+        signature = private_key.sign(
+            digest,
             padding.PKCS1v15(),
-            hashes.SHA256()
+            utils.Prehashed(hashes.SHA256())
         )
+    return base64.b64encode(signature).decode('utf-8')
+
+
+def verify_digest(digest: bytes, signature_b64: str, public_key) -> bool:
+    """Verify a base64 signature against a precomputed SHA-256 digest."""
+    try:
+        signature = base64.b64decode(signature_b64)
+        with phase('crypto'):
+            public_key.verify(
+                signature,
+                digest,
+                padding.PKCS1v15(),
+                utils.Prehashed(hashes.SHA256())
+            )
         return True
     except Exception:
         return False
 
 
-def sign_file(filepath: str, private_key) -> str:
-    """Read a file and sign its contents."""
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    return sign_data(data, private_key)
+def sign_file(filepath: str, private_key, use_mmap: bool = False) -> str:
+    """Sign a file's contents without loading it into memory."""
+    return sign_digest(hash_file(filepath, use_mmap=use_mmap), private_key)
 
 
-def verify_file(filepath: str, signature_b64: str, public_key) -> bool:
-    """Verify signature of a file."""
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    return verify_signature(data, signature_b64, public_key)
\ No newline at end of file
+def verify_file(filepath: str, signature_b64: str, public_key, use_mmap: bool = False) -> bool:
+    """Verify signature of a file without loading it into memory."""
+    return verify_digest(hash_file(filepath, use_mmap=use_mmap), signature_b64, public_key)
+
+
+def write_detached_signature(filepath: str, private_key, sig_path: str = None) -> str:
+    """Sign a file and write the base64 signature to <file>.sig. Returns the .sig path."""
+    sig_path = sig_path or filepath + SIG_SUFFIX
+    signature = sign_file(filepath, private_key)
+    with open(sig_path, 'w') as f:
+        f.write(signature + '\n')
+    return sig_path
+
+
+def verify_detached_signature(filepath: str, public_key, sig_path: str = None) -> bool:
+    """Verify a file against its detached <file>.sig signature."""
+    try:
+        with open(sig_path or filepath + SIG_SUFFIX) as f:
+            signature_b64 = f.read().strip()
+    except OSError:
+        return False
+    return verify_file(filepath, signature_b64, public_key)
+
+
+# ─── Batch: many files across a process pool ───────────
+# Key objects can't be pickled, so each worker process loads the key once
+# from PEM in its initializer and reuses it for every file it handles.
+_worker_key = None
+
+
+def _init_signer(key_pem: bytes, password, private: bool):
+    global _worker_key
+    if private:
+        _worker_key = serialization.load_pem_private_key(key_pem, password=password)
+    else:
+        _worker_key = serialization.load_pem_public_key(key_pem)
+
+
+def _sign_one(filepath):
+    return write_detached_signature(filepath, _worker_key)
+
+
+def _verify_one(filepath):
+    return verify_detached_signature(filepath, _worker_key)
+
+
+def sign_files(filepaths, private_key_path: str, password=None, workers: int = None):
+    """
+    Write a detached .sig for every file, in parallel processes.
+    Returns the list of .sig paths, in input order.
+    """
+    with open(private_key_path, 'rb') as f:
+        key_pem = f.read()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_signer,
+                             initargs=(key_pem, password, True)) as pool:
+        return list(pool.map(_sign_one, filepaths))
+
+
+def verify_files(filepaths, public_key_path: str, workers: int = None):
+    """
+    Check every file against its detached .sig, in parallel processes.
+    Returns a list of booleans, in input order.
+    """
+    with open(public_key_path, 'rb') as f:
+        key_pem = f.read()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_signer,
+                             initargs=(key_pem, None, False)) as pool:
+        return list(pool.map(_verify_one, filepaths))
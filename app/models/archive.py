@@ -0,0 +1,80 @@
+"""
+Cold-storage archival for the certificates table.
+
+Certificates that expired more than ARCHIVE_RETENTION_DAYS ago are copied to
+certificates_archive and deleted from the hot table in small batches, each
+in its own short transaction, so the job never holds long locks on
+certificates. Lookups by serial fall back to the archive via
+certificate_db.find_certificate().
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models.certificate_db import Certificate, ArchivedCertificate
+from app.requests.models import CertificateRequest
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+def archive_expired_certificates(retention_days=None, batch_size=None, max_batches=None, pause=None):
+    """
+    Move expired certificates into certificates_archive.
+    Returns the number of certificates archived.
+    """
+    retention_days = Config.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size     = batch_size or Config.ARCHIVE_BATCH_SIZE
+    pause          = Config.ARCHIVE_BATCH_PAUSE if pause is None else pause
+    cutoff         = datetime.utcnow() - timedelta(days=retention_days)
+
+    archived = 0
+    batches  = 0
+    while max_batches is None or batches < max_batches:
+        batch = (
+            Certificate.query
+            .filter(Certificate.valid_to < cutoff)
+            .order_by(Certificate.valid_to)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+
+        ids = [c.id for c in batch]
+        db.session.execute(db.insert(ArchivedCertificate), [
+            {
+                'id':                c.id,
+                'serial_number':     c.serial_number,
+                'owner_name':        c.owner_name,
+                'email':             c.email,
+                'organization':      c.organization,
+                'issued_by':         c.issued_by,
+                'issued_at':         c.issued_at,
+                'valid_from':        c.valid_from,
+                'valid_to':          c.valid_to,
+                'status':            c.status,
+                'revoked_at':        c.revoked_at,
+                'revocation_reason': c.revocation_reason,
+                'cert_pem_z':        ArchivedCertificate.compress_pem(c.cert_pem),
+            }
+            for c in batch
+        ])
+        # Requests keep their history but no longer point at the hot row
+        CertificateRequest.query.filter(
+            CertificateRequest.certificate_id.in_(ids)
+        ).update({CertificateRequest.certificate_id: None}, synchronize_session=False)
+        Certificate.query.filter(Certificate.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        db.session.expunge_all()
+
+        archived += len(ids)
+        batches  += 1
+        log.info("Moved %d certificate(s) to cold storage (%d total)", len(ids), archived)
+
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)   # let OLTP traffic in between batches
+
+    return archived
@@ -1,3 +1,4 @@
+import zlib
 from datetime import datetime
 from app import db
 
@@ -17,6 +18,37 @@ class Certificate(db.Model):
     status        = db.Column(db.String(16),  default='ACTIVE')   # ACTIVE / REVOKED
     cert_pem      = db.Column(db.Text,        nullable=False)      # full PEM stored in DB
 
+    # Denormalized from revoked_certificates so status/OCSP/CRL are single-table reads
+    revoked_at        = db.Column(db.DateTime, nullable=True)
+    revocation_reason = db.Column(db.SmallInteger, nullable=True)  # RFC 5280 CRLReason code
+
+    __table_args__ = (
+        db.Index('ix_certificates_status_revoked_at', 'status', 'revoked_at'),
+        db.Index('ix_certificates_valid_to', 'valid_to'),
+        db.Index('ix_certificates_status_valid_to', 'status', 'valid_to'),   # renewal scan
+        db.Index('ix_certificates_organization_status', 'organization', 'status'),
+        db.Index('ix_certificates_owner_status', 'owner_name', 'status'),
+        # Never hand out an id that was moved to the archive
+        {'sqlite_autoincrement': True},
+    )
+
+    def revoke(self, reason_code, reason_text=None, when=None):
+        """
+        Mark this certificate revoked and return the matching history row.
+        Add the returned RevokedCertificate in the same transaction so both
+        tables change atomically.
+        """
+        when = when or datetime.utcnow()
+        self.status            = 'REVOKED'
+        self.revoked_at        = when
+        self.revocation_reason = reason_code
+        return RevokedCertificate(
+            serial_number = self.serial_number,
+            owner_name    = self.owner_name,
+            revoked_at    = when,
+            reason        = reason_text,
+        )
+
     def is_expired(self):
         return datetime.utcnow() > self.valid_to
 
@@ -31,10 +63,58 @@ class RevokedCertificate(db.Model):
     __tablename__ = 'revoked_certificates'
 
     id            = db.Column(db.Integer, primary_key=True)
-    serial_number = db.Column(db.String(64),  nullable=False)
+    serial_number = db.Column(db.String(64),  nullable=False, index=True)
     owner_name    = db.Column(db.String(128), nullable=False)
     revoked_at    = db.Column(db.DateTime,    default=datetime.utcnow)
     reason        = db.Column(db.String(256), nullable=True)
 
     def __repr__(self):
-        return f"<Revoked {self.owner_name} at {self.revoked_at}>"
\ No newline at end of file
+        return f"<Revoked {self.owner_name} at {self.revoked_at}>"
+
+
+class ArchivedCertificate(db.Model):
+    """
+    Cold copy of a certificate that expired more than ARCHIVE_RETENTION_DAYS ago.
+    Keeps the original id; the PEM is stored zlib-compressed.
+    """
+    __tablename__ = 'certificates_archive'
+
+    id                = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    serial_number     = db.Column(db.String(64),  unique=True, nullable=False)
+    owner_name        = db.Column(db.String(128), nullable=False)
+    email             = db.Column(db.String(256), nullable=True)
+    organization      = db.Column(db.String(256), nullable=True)
+    issued_by         = db.Column(db.String(128), nullable=False)
+    issued_at         = db.Column(db.DateTime,    nullable=True)
+    valid_from        = db.Column(db.DateTime,    nullable=False)
+    valid_to          = db.Column(db.DateTime,    nullable=False)
+    status            = db.Column(db.String(16),  nullable=True)
+    revoked_at        = db.Column(db.DateTime,    nullable=True)
+    revocation_reason = db.Column(db.SmallInteger, nullable=True)
+    cert_pem_z        = db.Column(db.LargeBinary, nullable=False)
+    archived_at       = db.Column(db.DateTime,    default=datetime.utcnow)
+
+    @property
+    def cert_pem(self):
+        return zlib.decompress(self.cert_pem_z).decode('utf-8')
+
+    @staticmethod
+    def compress_pem(cert_pem):
+        return zlib.compress(cert_pem.encode('utf-8'), 9)
+
+    def is_expired(self):
+        return datetime.utcnow() > self.valid_to
+
+    def is_valid(self):
+        return False
+
+    def __repr__(self):
+        return f"<ArchivedCertificate {self.owner_name} | {self.status}>"
+
+
+def find_certificate(serial_number):
+    """Look a serial up in the hot table, falling back to the archive."""
+    cert = Certificate.query.filter_by(serial_number=serial_number).first()
+    if cert is None:
+        cert = ArchivedCertificate.query.filter_by(serial_number=serial_number).first()
+    return cert
@@ -0,0 +1,54 @@
+"""
+Named leases, so a periodic job runs in one process of the whole deployment.
+
+acquire_lease() is a conditional UPDATE, like the issuance job claim: it
+takes the lease when it is free, expired or already held by the caller,
+and extends it for ttl seconds. Every process tries on each tick; only the
+holder runs. A holder that dies simply stops renewing, and another process
+takes over once the lease expires.
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+
+class Lease(db.Model):
+    __tablename__ = 'leases'
+
+    name       = db.Column(db.String(64),  primary_key=True)
+    holder     = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime,    nullable=False)
+
+    def __repr__(self):
+        return f"<Lease {self.name} held by {self.holder} until {self.expires_at}>"
+
+
+def lease_holder():
+    """Identity of this process: host and pid."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(name, ttl, holder=None, now=None):
+    """True if `holder` holds the lease `name` for the next ttl seconds."""
+    holder  = holder or lease_holder()
+    now     = now or datetime.utcnow()
+    expires = now + timedelta(seconds=ttl)
+    table   = Lease.__table__
+
+    with db.engine.begin() as conn:
+        taken = conn.execute(
+            table.update()
+            .where(table.c.name == name, or_(table.c.holder == holder, table.c.expires_at < now))
+            .values(holder=holder, expires_at=expires)
+        ).rowcount
+    if taken:
+        return True
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.insert().values(name=name, holder=holder, expires_at=expires))
+        return True
+    except IntegrityError:
+        return False          # held by another live process
@@ -0,0 +1,123 @@
+"""
+Primary / read-replica routing for db.session.
+
+Views marked with @read_only send their SELECTs to one of the replica
+engines listed in DATABASE_REPLICA_URLS. Everything else goes to the
+primary, including any query a read-only view makes after it has written.
+A browser session that wrote recently stays on the primary for
+DB_STICKY_SECONDS so users always see their own changes.
+"""
+import random
+import time
+from flask import g, session, has_request_context, current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+REPLICA_PREFIX = 'replica_'
+_STICKY_KEY    = '_db_primary_until'
+
+
+def read_only(f):
+    """
+    Mark a view as safe to serve from a read replica.
+    Usage:
+        @bp.route('/ocsp/<serial_number>')
+        @read_only
+        def ocsp_check(serial_number): ...
+    """
+    f.db_read_only = True
+    return f
+
+
+def _pool_options(url, cfg):
+    """Engine kwargs for one database URL, built from the DB_POOL_* settings."""
+    options = {
+        'pool_pre_ping': cfg['DB_POOL_PRE_PING'],
+        'pool_recycle':  cfg['DB_POOL_RECYCLE'],
+    }
+    parsed = make_url(url)
+    # In-memory SQLite uses StaticPool, which has no size or overflow
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:'):
+        return options
+
+    options.update(
+        pool_size    = cfg['DB_POOL_SIZE'],
+        max_overflow = cfg['DB_MAX_OVERFLOW'],
+        pool_timeout = cfg['DB_POOL_TIMEOUT'],
+    )
+    # SQLite has one writer at a time. Issuance workers, the audit writer and
+    # requests all write, so each waits for the lock instead of failing with
+    # "database is locked" after pysqlite's default 5 s
+    if parsed.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'timeout': cfg['DB_SQLITE_BUSY_TIMEOUT']}
+    return options
+
+
+def configure_engines(app):
+    """
+    Fill SQLALCHEMY_ENGINE_OPTIONS and one SQLALCHEMY_BINDS entry per replica.
+    Must run before db.init_app(app).
+    """
+    cfg = app.config
+    cfg['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **_pool_options(cfg['SQLALCHEMY_DATABASE_URI'], cfg),
+        **cfg.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+
+    binds = dict(cfg.get('SQLALCHEMY_BINDS') or {})
+    for i, url in enumerate(cfg.get('DATABASE_REPLICA_URLS') or []):
+        binds[f'{REPLICA_PREFIX}{i}'] = {'url': url, **_pool_options(url, cfg)}
+    cfg['SQLALCHEMY_BINDS'] = binds
+
+
+def replica_keys(db):
+    """Bind keys of the configured replica engines (empty list if none)."""
+    return [k for k in db.engines if k and k.startswith(REPLICA_PREFIX)]
+
+
+class RoutingSession(Session):
+    """
+    db.session class that picks a replica engine for reads inside
+    read-only views, and the primary for everything else.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._wants_replica(clause):
+            keys = replica_keys(self._db)
+            if keys:
+                return self._db.engines[random.choice(keys)]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _wants_replica(self, clause):
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            # INSERT / UPDATE / DELETE executed directly — primary from now on
+            self.info['wrote'] = True
+            return False
+        return has_request_context() and g.get('db_read_only', False)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(sess, flush_context):
+    sess.info['wrote'] = True
+
+
+def init_routing(app, db):
+    """Register the request hooks that drive replica selection and stickiness."""
+
+    @app.before_request
+    def _select_database():
+        view = app.view_functions.get(request.endpoint)
+        sticky_until = session.get(_STICKY_KEY, 0)
+        g.db_read_only = (
+            getattr(view, 'db_read_only', False)
+            and time.time() >= sticky_until
+        )
+
+    @app.after_request
+    def _remember_write(response):
+        if replica_keys(db) and db.session().info.get('wrote'):
+            session[_STICKY_KEY] = time.time() + current_app.config['DB_STICKY_SECONDS']
+        return response
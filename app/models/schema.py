@@ -0,0 +1,52 @@
+"""
+Stored schema version, so a warm boot can skip schema and seed work.
+
+schema_fingerprint() hashes every table, column, type and index declared
+on the models. create_app() compares it with the row in schema_version:
+if they match, create_all(), _upgrade_schema() and the seeders already ran
+against this exact schema and are skipped. Any model change produces a new
+fingerprint, so the next boot runs the full path once and records it.
+"""
+import hashlib
+from datetime import datetime
+from app import db
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+
+    id         = db.Column(db.Integer,    primary_key=True)
+    version    = db.Column(db.String(64), nullable=False)
+    applied_at = db.Column(db.DateTime,   default=datetime.utcnow)
+
+
+def schema_fingerprint():
+    """SHA-256 over the declared tables, columns and indexes."""
+    parts = []
+    for table in sorted(db.metadata.sorted_tables, key=lambda t: t.name):
+        if table.name == SchemaVersion.__tablename__:
+            continue
+        parts.append(table.name)
+        for col in table.columns:
+            parts.append(f"  {col.name} {col.type} {col.nullable}")
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            parts.append(f"  ix {index.name} {','.join(c.name for c in index.columns)}")
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def schema_is_current():
+    """True if the database was last set up for exactly these models."""
+    try:
+        stored = db.session.query(SchemaVersion.version).order_by(SchemaVersion.id.desc()).limit(1).scalar()
+    except Exception:
+        db.session.rollback()   # first boot — the table doesn't exist yet
+        return False
+    finally:
+        db.session.commit()
+    return stored == schema_fingerprint()
+
+
+def record_schema_version():
+    db.session.query(SchemaVersion).delete()
+    db.session.add(SchemaVersion(version=schema_fingerprint()))
+    db.session.commit()
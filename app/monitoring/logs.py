@@ -0,0 +1,295 @@
+"""
+Structured logging.
+
+Application code logs through the standard library:
+
+    log = logging.getLogger(__name__)
+    log.info("Issued certificate for %s", owner, extra={'serial': serial})
+
+init_logging() puts one handler on the root logger. It is a QueueHandler,
+so a request thread only stamps the record and puts it on a bounded queue.
+A QueueListener thread formats the records and writes them to stdout. A
+request never waits on a slow or blocked stdout. If the queue is full the
+record is dropped and counted in pki_log_records_dropped_total.
+
+Before a record is queued, two filters run on the caller's thread:
+    _ContextFilter    adds request_id, user and user_id from the request.
+                      request_id is taken from X-Request-ID or generated,
+                      and echoed back on the response.
+    _RateLimitFilter  applies a token bucket per (logger, message template),
+                      LOG_RATE_LIMIT records/s with bursts of LOG_RATE_BURST.
+                      Records over the limit are dropped. The next record
+                      that gets through carries suppressed=<count>.
+                      ERROR and above are never limited.
+
+LOG_FORMAT=json writes one JSON object per line:
+    {"ts": "...", "level": "INFO", "logger": "app.ca.certificate",
+     "msg": "Issued certificate for alice", "request_id": "...",
+     "user": "admin", "serial": "5192..."}
+LOG_FORMAT=text writes the same fields as one readable line.
+
+LOG_LEVEL sets the level of the `app` package. LOG_LEVELS overrides it
+per module, e.g. "app.crypto=DEBUG,app.audit=WARNING,werkzeug=ERROR".
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, request, session, has_request_context
+
+from app.monitoring.metrics import metrics
+
+log_records_dropped    = metrics.counter('pki_log_records_dropped_total', 'Log records dropped because the log queue was full')
+log_records_suppressed = metrics.counter('pki_log_records_suppressed_total', 'Log records dropped by the rate limiter')
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+_RESERVED   = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {
+    'message', 'asctime', 'request_id', 'user', 'user_id', 'serial', 'suppressed',
+}
+
+
+def parse_levels(spec):
+    """'app.crypto=DEBUG, werkzeug=ERROR' → {'app.crypto': 10, 'werkzeug': 40}."""
+    levels = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        name, _, level = part.partition('=')
+        value = logging.getLevelName(level.strip().upper())
+        if not name.strip() or not isinstance(value, int):
+            raise ValueError(f"LOG_LEVELS entries look like module=LEVEL, not {part.strip()!r}")
+        levels[name.strip()] = value
+    return levels
+
+
+# ─── Filters (caller's thread) ───────────────────────────
+class _ContextFilter(logging.Filter):
+    """Stamp request_id and user while the request context is still there."""
+
+    def filter(self, record):
+        if has_request_context():
+            if not hasattr(record, 'request_id'):
+                record.request_id = g.get('request_id')
+            if not hasattr(record, 'user'):
+                # Never query from a log call: the username only if Flask-Login
+                # already loaded the user, otherwise the id in the session cookie
+                user = g.get('_login_user')
+                record.user    = getattr(user, 'username', None)
+                record.user_id = getattr(user, 'id', None) or session.get('_user_id')
+        return True
+
+
+class _RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, message template)."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        super().__init__()
+        self.rate    = float(rate)
+        self.burst   = float(max(1, burst))
+        self._clock  = clock
+        self._lock   = threading.Lock()
+        self._bucket = {}          # key → [tokens, last refill, suppressed since last pass]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = self._clock()
+        with self._lock:
+            state = self._bucket.get(key)
+            if state is None:
+                state = self._bucket[key] = [self.burst, now, 0]
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            if state[0] < 1.0:
+                state[2] += 1
+                log_records_suppressed.inc()
+                return False
+            state[0] -= 1.0
+            suppressed, state[2] = state[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+# ─── Formatters (listener thread) ────────────────────────
+def _fields(record):
+    out = {
+        'ts':     datetime.fromtimestamp(record.created, timezone.utc)
+                          .isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'level':  record.levelname,
+        'logger': record.name,
+        'msg':    record.getMessage(),
+    }
+    for key in ('request_id', 'user', 'user_id', 'serial'):
+        value = getattr(record, key, None)
+        if value is not None:
+            out[key] = value
+    for key, value in record.__dict__.items():
+        if key not in _RESERVED and not key.startswith('_'):
+            out[key] = value
+    if getattr(record, 'suppressed', None):
+        out['suppressed'] = record.suppressed
+    if record.exc_text:
+        out['exc'] = record.exc_text
+    return out
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        return json.dumps(_fields(record), default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record):
+        fields = _fields(record)
+        head   = f"{fields.pop('ts')} {fields.pop('level'):<7} {fields.pop('logger')}: {fields.pop('msg')}"
+        exc    = fields.pop('exc', None)
+        line   = ' '.join([head] + [f'{k}={v}' for k, v in fields.items()])
+        return f'{line}\n{exc}' if exc else line
+
+
+# ─── Queue plumbing ──────────────────────────────────────
+class _QueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, pipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        # Render the message and traceback now; args and exc_info may not
+        # survive the trip to another thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.pipeline.put(record)
+
+
+class _Listener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)     # blocking — the queue may be full right now
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time (test capture, redirects)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class LogPipeline:
+
+    def __init__(self):
+        self._queue    = None
+        self._output   = None
+        self._handler  = None
+        self._listener = None
+        self._pid      = None
+        self._levels   = []
+        self._lock     = threading.Lock()
+
+    # ─── Setup ───────────────────────────────────────────
+    def init_app(self, app):
+        self.stop()
+        cfg = app.config
+        if cfg['LOG_FORMAT'] not in ('json', 'text'):
+            raise ValueError(f"LOG_FORMAT must be json or text, not {cfg['LOG_FORMAT']!r}")
+
+        self.queue_size = cfg['LOG_QUEUE_SIZE']
+        self._queue     = None
+        self._output    = _StdoutHandler()
+        self._output.setFormatter(JsonFormatter() if cfg['LOG_FORMAT'] == 'json' else TextFormatter())
+
+        handler = _QueueHandler(self)
+        handler.addFilter(_ContextFilter())
+        if cfg['LOG_RATE_LIMIT'] > 0:
+            handler.addFilter(_RateLimitFilter(cfg['LOG_RATE_LIMIT'], cfg['LOG_RATE_BURST']))
+
+        root = logging.getLogger()
+        if self._handler is not None:
+            root.removeHandler(self._handler)
+        root.addHandler(handler)
+        self._handler = handler
+
+        for name in self._levels:          # undo the previous app's overrides
+            logging.getLogger(name).setLevel(logging.NOTSET)
+        levels = {'app': logging.getLevelName(cfg['LOG_LEVEL'].upper()), **parse_levels(cfg['LOG_LEVELS'])}
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+        self._levels = list(levels)
+        app.extensions['log_pipeline'] = self
+
+    def _ensure_started(self):
+        """Start the listener lazily, and again in a forked worker process."""
+        if self._pid == os.getpid() and self._listener is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._listener is not None:
+                return
+            self._queue    = queue.Queue(maxsize=self.queue_size)
+            self._pid      = os.getpid()
+            self._listener = _Listener(self._queue, self._output)
+            self._listener.start()
+
+    # ─── Producer side ───────────────────────────────────
+    def put(self, record):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been written."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def stop(self):
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
+
+
+def init_logging(app):
+    """Install the queue handler and the request-id hooks."""
+    log_pipeline.init_app(app)
+
+    @app.before_request
+    def _assign_request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def _echo_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
@@ -0,0 +1,352 @@
+"""
+In-process metrics, exposed in Prometheus text format at /metrics.
+
+Counters and histograms keep one small list of values per thread. observe()
+and inc() only touch the calling thread's list, so the hot path takes no
+lock. A lock is taken only the first time a thread touches a metric and
+when /metrics sums the per-thread values. Cells of finished threads are
+folded into a retired total at that point, so short-lived pool threads
+don't pile up.
+
+Gauges hold a single value (last write wins) or call a function at scrape
+time. That suits pool depths and database counts, which are cheap to read
+and pointless to keep updating.
+
+Each process has its own registry. Behind gunicorn, scrape every worker or
+run metrics on a single-worker instance.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# Seconds — from a cache hit up to an RSA keygen on a loaded box
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Cells:
+    """Per-thread value lists. Writers touch only their own; totals() sums them."""
+
+    __slots__ = ('size', '_local', '_lock', '_live', '_retired')
+
+    def __init__(self, size):
+        self.size     = size
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+        self._live    = []                  # (thread, cell)
+        self._retired = [0] * size
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self.size
+            with self._lock:
+                self._live.append((threading.current_thread(), cell))
+            self._local.cell = cell
+            return cell
+
+    def totals(self):
+        with self._lock:
+            total, live = list(self._retired), []
+            for thread, cell in self._live:
+                if thread.is_alive():
+                    live.append((thread, cell))
+                else:
+                    self._retired = [a + b for a, b in zip(self._retired, cell)]
+                for i, v in enumerate(cell):
+                    total[i] += v
+            self._live = live
+        return total
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), _labelvalues=()):
+        self.name          = name
+        self.documentation = documentation
+        self.labelnames    = tuple(labelnames)
+        self._labelvalues  = tuple(_labelvalues)
+        self._children     = {}
+        self._lock         = threading.Lock()
+        self._function     = None
+
+    def set_function(self, fn):
+        """Read the value from fn() at scrape time instead of from updates."""
+        self._function = fn
+
+    def labels(self, *values, **kwargs):
+        """Child metric for one combination of label values."""
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        values = tuple(str(v) for v in values)
+        child  = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child(values)
+                    self._children[values] = child
+        return child
+
+    def _new_child(self, values):
+        return type(self)(self.name, self.documentation, self.labelnames, values)
+
+    def _series(self):
+        """(labelvalues, metric) for every series — self alone if unlabelled."""
+        if self.labelnames:
+            return sorted(self._children.items())
+        return [(self._labelvalues, self)]
+
+    def _label_str(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, metric in self._series():
+            lines.extend(metric._samples(values))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cells = _Cells(1)
+
+    def inc(self, amount=1):
+        self._cells.cell()[0] += amount
+
+    def value(self):
+        return self._function() if self._function else self._cells.totals()[0]
+
+    def _samples(self, values):
+        return [f'{self.name}{self._label_str(values)} {_fmt(self.value())}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self._function() if self._function else self._value
+
+    def _samples(self, values):
+        return [f'{self.name}{self._label_str(values)} {_fmt(self.value())}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), _labelvalues=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, _labelvalues)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, one for +Inf, one for the running sum
+        self._cells  = _Cells(len(self.buckets) + 2)
+
+    def _new_child(self, values):
+        return Histogram(self.name, self.documentation, self.labelnames, values, self.buckets)
+
+    def observe(self, value):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        """Context manager: observe the block's duration in seconds."""
+        return _Timer(self)
+
+    def snapshot(self):
+        """{'count': n, 'sum': s, 'buckets': [(le, cumulative_count), ...]}"""
+        totals = self._cells.totals()
+        cumulative, running = [], 0
+        for le, n in zip(self.buckets + (math.inf,), totals[:-1]):
+            running += n
+            cumulative.append((le, running))
+        return {'count': running, 'sum': totals[-1], 'buckets': cumulative}
+
+    def _samples(self, values):
+        snap  = self.snapshot()
+        lines = [f'{self.name}_bucket{self._label_str(values, [("le", _fmt(le))])} {n}'
+                 for le, n in snap['buckets']]
+        lines.append(f'{self.name}_sum{self._label_str(values)} {_fmt(snap["sum"])}')
+        lines.append(f'{self.name}_count{self._label_str(values)} {snap["count"]}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock    = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'metric {metric.name} already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def expose(self):
+        """All metrics in Prometheus text exposition format 0.0.4."""
+        lines = []
+        for name in sorted(self._metrics):
+            try:
+                lines.extend(self._metrics[name].expose())
+            except Exception as e:
+                # One broken scrape-time callback must not hide every other metric
+                log.warning("Could not collect %s: %s", name, e)
+        return '\n'.join(lines) + '\n'
+
+
+def _fmt(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+metrics = MetricsRegistry()
+
+# ─── PKI operations ──────────────────────────────────────
+keygen_seconds        = metrics.histogram('pki_keygen_seconds', 'RSA key pair generation time')
+sign_seconds          = metrics.histogram('pki_sign_seconds', 'CA signature time by object signed', ['kind'])
+key_write_seconds     = metrics.histogram('pki_key_write_seconds', 'Time to serialise, encrypt and write a private key file')
+issue_seconds         = metrics.histogram('pki_issue_certificate_seconds', 'issue_certificate() end to end')
+crl_build_seconds     = metrics.histogram('pki_crl_build_seconds', 'CRL revoked-entry query and builder time, before signing')
+ocsp_lookup_seconds   = metrics.histogram('pki_ocsp_lookup_seconds', 'OCSP status lookup time')
+audit_commit_seconds  = metrics.histogram('pki_audit_commit_seconds', 'Audit log batch INSERT and commit time')
+chain_verify_seconds  = metrics.histogram('pki_chain_verify_seconds', 'Chain validation time per batch')
+db_query_seconds      = metrics.histogram('pki_db_query_seconds', 'Database time per request, by route', ['route'])
+pkcs12_seconds        = metrics.histogram('pki_pkcs12_build_seconds', 'PKCS#12 bundle build time, including the wait for a worker')
+request_seconds       = metrics.histogram('pki_request_seconds', 'Request time, by route', ['route'])
+
+certificates_issued   = metrics.counter('pki_certificates_issued_total', 'Certificates issued')
+certificates_revoked  = metrics.counter('pki_certificates_revoked_total', 'Certificates revoked, including superseded')
+certificates_renewed  = metrics.counter('pki_certificates_renewed_total', 'Certificates renewed', ['trigger'])
+certificates_exported = metrics.counter('pki_certificates_exported_total', 'Certificates written by bulk exports, by format', ['format'])
+certificates_verified = metrics.counter('pki_chain_certificates_verified_total', 'Certificates checked by chain validation')
+pkcs12_requests       = metrics.counter('pki_pkcs12_requests_total', 'PKCS#12 downloads by outcome (cached, built, rejected)', ['outcome'])
+db_queries            = metrics.counter('pki_db_queries_total', 'SQL statements run inside requests, by route', ['route'])
+key_fsync_rounds      = metrics.counter('pki_key_store_fsync_rounds_total', 'Issued-key store fsync rounds (one per group commit)')
+key_fsyncs            = metrics.counter('pki_key_store_fsyncs_total', 'fsync() calls made by the issued-key store')
+
+crl_entries           = metrics.gauge('pki_crl_entries', 'Revoked certificates listed in the last CRL generated')
+crl_bytes             = metrics.gauge('pki_crl_bytes', 'PEM size of the last CRL generated')
+
+# ─── Read at scrape time ─────────────────────────────────
+db_pool_checked_out   = metrics.gauge('pki_db_pool_checked_out', 'Connections currently checked out, by engine', ['engine'])
+audit_queue_depth     = metrics.gauge('pki_audit_queue_depth', 'Audit events waiting for the writer thread')
+audit_events          = metrics.counter('pki_audit_events_total', 'Audit events by outcome', ['outcome'])
+issuance_jobs_queued  = metrics.gauge('pki_issuance_jobs_queued', 'Issuance jobs waiting for a worker')
+renewal_backlog_size  = metrics.gauge('pki_renewal_backlog', 'ACTIVE certificates inside the renewal window')
+approval_evaluations  = metrics.counter('pki_approval_evaluations_total', 'Auto-approval policy evaluations by outcome', ['outcome'])
+approval_eval_seconds = metrics.counter('pki_approval_eval_seconds_total', 'Time spent evaluating auto-approval policies')
+
+
+# ─── Per-request database time ───────────────────────────
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    if start is not None and has_request_context():
+        g.db_seconds = g.get('db_seconds', 0.0) + (time.perf_counter() - start)
+        g.db_queries = g.get('db_queries', 0) + 1
+
+
+def init_metrics(app):
+    """Per-route DB histograms and the scrape-time gauges."""
+    from app import db
+    from app.audit.sink import audit_sink
+    from app.requests.policy import approval_policy
+
+    @app.teardown_request
+    def _observe_db_time(exc):
+        queries = g.get('db_queries')
+        if queries:
+            route = request.endpoint or 'unmatched'
+            db_query_seconds.labels(route=route).observe(g.db_seconds)
+            db_queries.labels(route=route).inc(queries)
+
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        pool = engine.pool
+        if hasattr(pool, 'checkedout'):
+            db_pool_checked_out.labels(engine=key or 'primary').set_function(pool.checkedout)
+
+    audit_queue_depth.set_function(lambda: audit_sink.stats()['queue_depth'])
+    for outcome in ('enqueued', 'written', 'dropped', 'write_errors'):
+        audit_events.labels(outcome=outcome).set_function(lambda o=outcome: audit_sink.stats()[o])
+    for outcome in ('auto_approved', 'manual'):
+        approval_evaluations.labels(outcome=outcome).set_function(lambda o=outcome: approval_policy.stats()[o])
+    approval_eval_seconds.set_function(lambda: approval_policy.stats()['eval_seconds'])
+    issuance_jobs_queued.set_function(_queued_jobs)
+    renewal_backlog_size.set_function(_renewal_backlog)
+
+
+def _queued_jobs():
+    from app.requests.models import IssuanceJob
+    return IssuanceJob.query.filter_by(status='QUEUED').count()
+
+
+def _renewal_backlog():
+    from app.ca.renewal import renewal_backlog
+    return renewal_backlog()
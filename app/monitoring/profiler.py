@@ -0,0 +1,142 @@
+"""
+On-demand sampling profiler.
+
+A CA admin arms it for one route and a request count. The next N requests
+to that route register their thread. While any are running, a sampler
+thread reads their Python stacks every PROFILER_INTERVAL seconds with
+sys._current_frames(). Identical stacks are counted, and the result
+downloads in the folded format flamegraph.pl, speedscope and inferno read:
+
+    root;app.routes.crl_ocsp:view_crl;app.revocation.crl_manager:generate_crl 42
+
+Nothing is sampled while the profiler is idle. The only hot-path cost is
+one attribute check per request. The profiler is per process, so behind
+gunicorn it captures the requests that reach the worker that was armed.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.endpoint  = None
+        self.remaining = 0
+        self.captured  = 0
+        self.samples   = 0
+        self.interval  = 0.005
+        self.started_at  = None
+        self.finished_at = None
+        self._stacks  = Counter()
+        self._threads = set()
+        self._sampler = None
+        self._wakeup  = threading.Event()
+
+    # ─── Control ─────────────────────────────────────────
+    def arm(self, endpoint, requests, interval):
+        """Profile the next `requests` requests to `endpoint`. Discards any previous profile."""
+        self.stop()
+        with self._lock:
+            self._reset()
+            self.endpoint   = endpoint
+            self.remaining  = requests
+            self.interval   = interval
+            self.started_at = time.time()
+            self._sampler   = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        with self._lock:
+            sampler, self.remaining = self._sampler, 0
+            self._sampler = None
+            if sampler is not None and self.finished_at is None:
+                self.finished_at = time.time()
+            self._wakeup.set()
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join(1.0)
+
+    @property
+    def active(self):
+        return self._sampler is not None
+
+    def status(self):
+        with self._lock:
+            return {
+                'active':      self._sampler is not None,
+                'endpoint':    self.endpoint,
+                'remaining':   self.remaining,
+                'captured':    self.captured,
+                'in_flight':   len(self._threads),
+                'samples':     self.samples,
+                'stacks':      len(self._stacks),
+                'interval':    self.interval,
+                'started_at':  self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+    def folded(self):
+        """The profile as folded stacks, one 'frame;frame;... count' line each."""
+        with self._lock:
+            items = sorted(self._stacks.items(), key=lambda kv: -kv[1])
+        return ''.join(f'{stack} {count}\n' for stack, count in items)
+
+    # ─── Request side ────────────────────────────────────
+    def request_started(self, endpoint):
+        """Called for every request. Returns True if this one is being profiled."""
+        if self._sampler is None or endpoint != self.endpoint:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.captured  += 1
+            self._threads.add(threading.get_ident())
+        self._wakeup.set()
+        return True
+
+    def request_finished(self):
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+            done = self.remaining <= 0 and not self._threads
+        if done:
+            self.stop()
+
+    # ─── Sampler thread ──────────────────────────────────
+    def _run(self):
+        me = threading.current_thread()
+        while self._sampler is me:
+            with self._lock:
+                targets = set(self._threads)
+            if not targets:
+                self._wakeup.wait(0.5)
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            taken  = [_fold(frames[t]) for t in targets if t in frames]
+            with self._lock:
+                for stack in taken:
+                    self._stacks[stack] += 1
+                self.samples += len(taken)
+            del frames
+            time.sleep(self.interval)
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+        names.append(f'{module}:{code.co_name}'.replace(';', ':').replace(' ', '_'))
+        frame = frame.f_back
+    names.append('root')
+    return ';'.join(reversed(names))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,86 @@
+import hmac
+from flask import (Blueprint, Response, abort, current_app, flash, jsonify, redirect,
+                   render_template, request, url_for)
+from app.auth.decorators import role_required
+from app.audit.logger import log_action
+from app.monitoring.metrics import metrics
+from app.monitoring.profiler import profiler
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+
+@monitoring_bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint. Guarded by METRICS_TOKEN when one is set."""
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        given = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return Response('unauthorized\n', status=401, mimetype='text/plain',
+                            headers={'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@monitoring_bp.route('/admin/profiler', methods=['GET', 'POST'])
+@role_required('ca_admin')
+def profiler_control():
+    """
+    Arm the sampling profiler for the next N requests to one endpoint.
+    Form or JSON body: {"endpoint": "crl_ocsp.view_crl", "requests": 20, "interval_ms": 5}
+    """
+    if request.method == 'GET':
+        if request.args.get('format') == 'json':
+            return jsonify(profiler.status())
+        endpoints = sorted(r.endpoint for r in current_app.url_map.iter_rules() if r.endpoint != 'static')
+        return render_template('admin/profiler.html', status=profiler.status(), endpoints=endpoints)
+
+    data = (request.get_json(silent=True) if request.is_json else request.form) or {}
+    cfg  = current_app.config
+    try:
+        endpoint = (data.get('endpoint') or '').strip()
+        if endpoint not in current_app.view_functions:
+            raise ValueError(f'unknown endpoint: {endpoint or "(none)"}')
+        count = int(data.get('requests') or 10)
+        if not 1 <= count <= cfg['PROFILER_MAX_REQUESTS']:
+            raise ValueError(f"requests must be between 1 and {cfg['PROFILER_MAX_REQUESTS']}")
+        interval_ms = data.get('interval_ms')
+        interval = float(interval_ms) / 1000 if interval_ms else cfg['PROFILER_INTERVAL']
+        if not 0.001 <= interval <= 1.0:
+            raise ValueError('interval_ms must be between 1 and 1000')
+    except (TypeError, ValueError) as e:
+        if request.is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        return redirect(url_for('monitoring.profiler_control'))
+
+    profiler.arm(endpoint, count, interval)
+    log_action('PROFILER_ARMED', detail=f'Profiling next {count} request(s) to {endpoint}')
+
+    if request.is_json:
+        return jsonify(profiler.status())
+    flash(f'Profiling the next {count} request(s) to {endpoint}.', 'success')
+    return redirect(url_for('monitoring.profiler_control'))
+
+
+@monitoring_bp.route('/admin/profiler/stop', methods=['POST'])
+@role_required('ca_admin')
+def profiler_stop():
+    profiler.stop()
+    if request.is_json:
+        return jsonify(profiler.status())
+    flash('Profiler stopped.', 'success')
+    return redirect(url_for('monitoring.profiler_control'))
+
+
+@monitoring_bp.route('/admin/profiler/profile.folded')
+@role_required('ca_admin')
+def profiler_download():
+    """Folded stacks — feed to flamegraph.pl, speedscope or inferno."""
+    name = (profiler.endpoint or 'profile').replace('.', '-')
+    return Response(
+        profiler.folded(),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={name}.folded'}
+    )
@@ -0,0 +1,119 @@
+"""
+Per-request phase timings.
+
+Every request is split into:
+    db      SQL time, from the engine cursor events in metrics.py
+    crypto  key generation, CA key decryption, key-file writes and signing,
+            timed by phase('crypto') blocks in app/crypto and app/ca
+    render  Jinja template rendering, from Flask's template signals
+    app     everything else
+
+With SERVER_TIMING_HEADER on, the split goes back to the browser as a
+Server-Timing header (DevTools → Network → Timing). Requests slower than
+REQUEST_SLOW_MS are logged with the split as fields (0 logs every request,
+-1 none).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context, before_render_template, template_rendered
+
+from app.monitoring.metrics import request_seconds
+from app.monitoring.profiler import profiler
+
+log = logging.getLogger(__name__)
+
+
+@contextmanager
+def phase(name):
+    """Add the block's duration to the current request's <name> phase."""
+    if not has_request_context():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f'{name}_seconds'
+        setattr(g, key, g.get(key, 0.0) + time.perf_counter() - start)
+
+
+def request_timings():
+    """{'total', 'db', 'crypto', 'render', 'app'} seconds so far for this request."""
+    total  = time.perf_counter() - g.get('request_start', time.perf_counter())
+    db     = g.get('db_seconds', 0.0)
+    crypto = g.get('crypto_seconds', 0.0)
+    render = g.get('render_seconds', 0.0)
+    return {
+        'total':  total,
+        'db':     db,
+        'crypto': crypto,
+        'render': render,
+        'app':    max(0.0, total - db - crypto - render),
+    }
+
+
+def server_timing_header(timings, queries=0):
+    parts = [
+        f'db;dur={timings["db"] * 1000:.1f};desc="{queries} queries"',
+        f'crypto;dur={timings["crypto"] * 1000:.1f}',
+        f'render;dur={timings["render"] * 1000:.1f}',
+        f'app;dur={timings["app"] * 1000:.1f}',
+        f'total;dur={timings["total"] * 1000:.1f}',
+    ]
+    return ', '.join(parts)
+
+
+def init_timing(app):
+    """Register before/after hooks. Call before other before_request hooks."""
+    header  = app.config['SERVER_TIMING_HEADER']
+    slow_ms = app.config['REQUEST_SLOW_MS']
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+        if profiler.active and profiler.request_started(request.endpoint):
+            g.profiled = True
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        if g.pop('profiled', False):
+            profiler.request_finished()
+
+    @app.after_request
+    def _emit_timings(response):
+        if 'request_start' not in g:
+            return response
+        timings = request_timings()
+        queries = g.get('db_queries', 0)
+        route   = request.endpoint or 'unmatched'
+        request_seconds.labels(route=route).observe(timings['total'])
+
+        if header:
+            response.headers['Server-Timing'] = server_timing_header(timings, queries)
+        if slow_ms >= 0 and timings['total'] * 1000 >= slow_ms:
+            log.info("%s %s took %.1f ms", request.method, route, timings['total'] * 1000, extra={
+                'method':    request.method,
+                'route':     route,
+                'status':    response.status_code,
+                'total_ms':  round(timings['total'] * 1000, 1),
+                'db_ms':     round(timings['db'] * 1000, 1),
+                'queries':   queries,
+                'crypto_ms': round(timings['crypto'] * 1000, 1),
+                'render_ms': round(timings['render'] * 1000, 1),
+                'app_ms':    round(timings['app'] * 1000, 1),
+            })
+        return response
+
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+
+
+def _render_started(sender, template, context, **extra):
+    g._render_start = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    start = g.pop('_render_start', None)
+    if start is not None:
+        g.render_seconds = g.get('render_seconds', 0.0) + time.perf_counter() - start
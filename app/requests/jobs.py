@@ -0,0 +1,302 @@
+"""
+Asynchronous certificate issuance.
+
+Approving a request no longer signs inside the admin's HTTP request. The
+approve route calls enqueue_issuance(), which moves the request to ISSUING
+and writes one IssuanceJob row; a small pool of worker threads
+(ISSUANCE_WORKERS) picks jobs up, issues the certificate and marks the
+request APPROVED.
+
+Jobs live in the database, so they survive a restart and every web worker
+process can run them. A job is claimed with a conditional UPDATE, so two
+workers never run the same job. The job is keyed by request id: enqueueing
+twice returns the same job, and a job whose request already has a
+certificate is marked DONE without signing again.
+
+A failed attempt is retried after ISSUANCE_RETRY_DELAY * 2^(attempt-1)
+seconds. After ISSUANCE_MAX_ATTEMPTS the job is FAILED and the request goes
+back to PENDING so an admin can approve it again.
+"""
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.requests.models import IssuanceJob
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+# ─── Enqueue ─────────────────────────────────────────────
+def enqueue_issuance(req, reviewer):
+    """
+    Queue issuance for a PENDING request. Safe to call twice for the same
+    request — the existing job is returned (and re-armed if it FAILED).
+    """
+    job = IssuanceJob.query.filter_by(request_id=req.id).first()
+    if job is None:
+        job = IssuanceJob(request_id=req.id)
+        db.session.add(job)
+    elif job.status in ('QUEUED', 'RUNNING', 'DONE'):
+        return job
+
+    job.status          = 'QUEUED'
+    job.reviewer        = reviewer
+    job.attempts        = 0
+    job.last_error      = None
+    job.next_attempt_at = datetime.utcnow()
+    req.status          = 'ISSUING'
+    req.reviewed_by     = reviewer
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another admin approved the same request at the same moment
+        db.session.rollback()
+        return IssuanceJob.query.filter_by(request_id=req.id).first()
+
+    if Config.ISSUANCE_ASYNC:
+        issuance_workers.notify()
+    else:
+        run_job(job.id)
+        db.session.refresh(job)
+    return job
+
+
+# ─── Claim / run ─────────────────────────────────────────
+def claim_next_job(now=None):
+    """
+    Atomically move one due job to RUNNING and return its id, or None.
+    RUNNING jobs older than ISSUANCE_JOB_TIMEOUT (a worker died) are taken over.
+    """
+    now   = now or datetime.utcnow()
+    stale = now - timedelta(seconds=Config.ISSUANCE_JOB_TIMEOUT)
+    table = IssuanceJob.__table__
+
+    candidates = db.session.execute(
+        db.select(table.c.id, table.c.status, table.c.started_at)
+        .where(or_(
+            and_(table.c.status == 'QUEUED',  table.c.next_attempt_at <= now),
+            and_(table.c.status == 'RUNNING', table.c.started_at < stale),
+        ))
+        .order_by(table.c.next_attempt_at, table.c.id)
+        .limit(5)
+    ).all()
+    db.session.commit()
+
+    for job_id, status, started_at in candidates:
+        with db.engine.begin() as conn:
+            claimed = conn.execute(
+                table.update()
+                .where(table.c.id == job_id,
+                       table.c.status == status,
+                       table.c.started_at.is_(started_at) if started_at is None
+                       else table.c.started_at == started_at)
+                .values(status='RUNNING', started_at=now, attempts=table.c.attempts + 1)
+            ).rowcount
+        if claimed:
+            return job_id
+    return None
+
+
+def run_job(job_id):
+    """Issue the certificate for one job. Returns the job's final status."""
+    job = db.session.get(IssuanceJob, job_id)
+    if job is None:
+        return None
+    if job.status != 'RUNNING':
+        # Inline mode: nobody claimed it yet
+        if job.status != 'QUEUED':
+            return job.status
+        job.status     = 'RUNNING'
+        job.started_at = datetime.utcnow()
+        job.attempts   = (job.attempts or 0) + 1
+        db.session.commit()
+
+    req = job.request
+    try:
+        if req.certificate_id is None:
+            serial = _issue_for_request(req, job.reviewer)
+        else:
+            serial = None   # issued by an earlier attempt — don't sign twice
+        req.status      = 'APPROVED'
+        job.status      = 'DONE'
+        job.last_error  = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return _record_failure(job_id, e)
+
+    if serial:
+        from app.audit.logger import log_action
+        log_action('CERT_APPROVED',
+            detail=f'Approved request for {req.owner_name}',
+            certificate_serial=serial,
+            user=_reviewer_user(job.reviewer)
+        )
+    return 'DONE'
+
+
+def _issue_for_request(req, reviewer):
+    from app.ca.certificate import issue_certificate
+    from app.models.certificate_db import Certificate
+
+    cert_pem, serial, valid_from, valid_to = issue_certificate(
+        req.owner_name, req.email, req.organization
+    )
+
+    new_cert = Certificate(
+        serial_number = serial,
+        owner_name    = req.owner_name,
+        email         = req.email,
+        organization  = req.organization,
+        issued_by     = "PKI-Advanced Intermediate CA",
+        valid_from    = valid_from,
+        valid_to      = valid_to,
+        cert_pem      = cert_pem,
+        status        = 'ACTIVE'
+    )
+    db.session.add(new_cert)
+    db.session.flush()
+
+    req.reviewed_at    = datetime.utcnow()
+    req.reviewed_by    = reviewer
+    req.certificate_id = new_cert.id
+    return serial
+
+
+def _record_failure(job_id, error):
+    job = db.session.get(IssuanceJob, job_id)
+    job.last_error = str(error)[:512]
+
+    # Inline mode has no worker to retry later — the admin sees the error instead
+    if job.attempts >= Config.ISSUANCE_MAX_ATTEMPTS or not Config.ISSUANCE_ASYNC:
+        job.status              = 'FAILED'
+        job.finished_at         = datetime.utcnow()
+        job.request.status      = 'PENDING'
+        job.request.reviewed_by = None
+    else:
+        delay = Config.ISSUANCE_RETRY_DELAY * 2 ** (job.attempts - 1)
+        job.status          = 'QUEUED'
+        job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+    db.session.commit()
+    log.warning("Job %d attempt %d failed: %s", job.id, job.attempts, error,
+                extra={'job_id': job.id, 'certificate_request_id': job.request_id})
+
+    if job.status == 'FAILED':
+        from app.audit.logger import log_action
+        log_action('CERT_ISSUE_FAILED',
+            detail=f'Issuance failed for {job.request.owner_name}: {job.last_error}',
+            status='FAILED',
+            user=_reviewer_user(job.reviewer)
+        )
+    return job.status
+
+
+def _reviewer_user(username):
+    from app.auth.models import User
+    return User.query.filter_by(username=username).first() if username else None
+
+
+def process_pending_jobs(limit=None):
+    """Run due jobs on the calling thread until none are left. Returns the count."""
+    done = 0
+    while limit is None or done < limit:
+        job_id = claim_next_job()
+        if job_id is None:
+            break
+        run_job(job_id)
+        done += 1
+    return done
+
+
+def job_status(req):
+    """Status payload for the polling endpoint."""
+    job = IssuanceJob.query.filter_by(request_id=req.id).first()
+    # Re-read the request after the job so it is never older than the job state
+    db.session.refresh(req)
+    return {
+        "request_id":     req.id,
+        "request_status": req.status,
+        "certificate_id": req.certificate_id,
+        "job":            job.to_dict() if job else None,
+    }
+
+
+# ─── Worker pool ─────────────────────────────────────────
+class IssuanceWorkerPool:
+
+    def __init__(self):
+        self.app      = None
+        self._threads = []
+        self._pid     = None
+        self._wakeup  = threading.Event()
+        self._stop    = threading.Event()
+        self._lock    = threading.Lock()
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        app.extensions['issuance_workers'] = self
+
+        if app.config['ISSUANCE_ASYNC']:
+            # Pick up jobs left queued by a previous process on the first request
+            @app.before_request
+            def _start_issuance_workers():
+                self._ensure_started()
+
+    def _ensure_started(self):
+        """Start the workers lazily, and again in a forked worker process."""
+        if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._pid     = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f'issuance-worker-{i}', daemon=True)
+                for i in range(max(1, self.app.config['ISSUANCE_WORKERS']))
+            ]
+            for t in self._threads:
+                t.start()
+
+    def notify(self):
+        """Wake the workers — a job was just queued."""
+        self._ensure_started()
+        self._wakeup.set()
+
+    def stop(self, timeout=5.0):
+        if self._pid != os.getpid():
+            self._threads = []
+            return
+        self._stop.set()
+        self._wakeup.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        poll = self.app.config['ISSUANCE_POLL_INTERVAL']
+        while not self._stop.is_set():
+            self._wakeup.wait(poll)
+            self._wakeup.clear()
+            while not self._stop.is_set():
+                try:
+                    with self.app.app_context():
+                        job_id = claim_next_job()
+                        if job_id is None:
+                            break
+                        run_job(job_id)
+                except Exception as e:
+                    log.exception("Issuance worker error: %s", e)
+                    break
+
+
+issuance_workers = IssuanceWorkerPool()
+atexit.register(issuance_workers.stop)
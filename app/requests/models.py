@@ -13,7 +13,7 @@ class CertificateRequest(db.Model):
     organization = db.Column(db.String(256), nullable=True)
     purpose      = db.Column(db.String(512), nullable=True)
     status       = db.Column(db.String(16),  default='PENDING')
-    # PENDING / APPROVED / REJECTED / REVOKED
+    # PENDING / ISSUING / APPROVED / REJECTED / REVOKED
 
     requested_at = db.Column(db.DateTime, default=datetime.utcnow)
     reviewed_at  = db.Column(db.DateTime, nullable=True)
@@ -23,5 +23,50 @@ class CertificateRequest(db.Model):
     # Link to issued certificate (set after approval)
     certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=True)
 
+    __table_args__ = (
+        # "one open request per user" check and the auto-approval quota
+        db.Index('ix_certificate_requests_user_status', 'user_id', 'status', 'requested_at'),
+    )
+
+    def __repr__(self):
+        return f"<CertReq {self.owner_name} | {self.status}>"
+
+
+class IssuanceJob(db.Model):
+    """
+    One queued certificate issuance for an approved request.
+    request_id is unique, so approving the same request twice never issues twice.
+    """
+    __tablename__ = 'issuance_jobs'
+
+    id              = db.Column(db.Integer,     primary_key=True)
+    request_id      = db.Column(db.Integer,     db.ForeignKey('certificate_requests.id'),
+                                unique=True, nullable=False)
+    status          = db.Column(db.String(16),  default='QUEUED')
+    # QUEUED / RUNNING / DONE / FAILED
+    reviewer        = db.Column(db.String(80),  nullable=True)    # CA admin username or policy name
+    attempts        = db.Column(db.Integer,     default=0)
+    last_error      = db.Column(db.String(512), nullable=True)
+    created_at      = db.Column(db.DateTime,    default=datetime.utcnow)
+    started_at      = db.Column(db.DateTime,    nullable=True)
+    finished_at     = db.Column(db.DateTime,    nullable=True)
+    next_attempt_at = db.Column(db.DateTime,    default=datetime.utcnow)
+
+    request = db.relationship('CertificateRequest', backref=db.backref('job', uselist=False))
+
+    __table_args__ = (
+        db.Index('ix_issuance_jobs_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            "id":          self.id,
+            "status":      self.status,
+            "attempts":    self.attempts,
+            "last_error":  self.last_error,
+            "created_at":  self.created_at.strftime("%Y-%m-%d %H:%M:%S UTC") if self.created_at else None,
+            "finished_at": self.finished_at.strftime("%Y-%m-%d %H:%M:%S UTC") if self.finished_at else None,
+        }
+
     def __repr__(self):
-        return f"<CertReq {self.owner_name} | {self.status}>"
\ No newline at end of file
+        return f"<IssuanceJob req={self.request_id} | {self.status}>"
\ No newline at end of file
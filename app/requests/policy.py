@@ -0,0 +1,161 @@
+"""
+Auto-approval policies for certificate requests.
+
+submit_request() asks approval_policy whether a new request can skip the
+CA admin. Policies come from AUTO_APPROVE_POLICIES, a list of rules such as
+
+    [{"name": "staff",
+      "roles": ["user"],
+      "email_domains": ["example.com"],
+      "owner_names": ["{username}", "{username}-*"],
+      "max_per_user": 3, "window_days": 30}]
+
+Every key except name is optional; a rule matches when all of its keys
+match, and the first matching rule wins. Only attributes of the account are
+trusted, never the free text typed on the request:
+
+  - email_domains is checked against the account email, and a request whose
+    typed email differs from the account's matches no rule.
+  - owner_name, the name the certificate is issued to, must match one of the
+    rule's owner_names glob patterns, where {username} stands for the
+    requester's username. Without owner_names it must be the username.
+  - The requested organization is never checked; an "organizations" key is
+    rejected, since anyone could type an allowed one.
+
+Rules are compiled to frozensets and tuples once in init_app(), so
+evaluating one is a few set lookups and glob matches. max_per_user is the
+only check that touches the database (a count of the requester's
+approved/issuing requests in the window), and it runs last, only for
+requests that passed every other check.
+
+Decision counts and evaluation time are kept in stats().
+"""
+import fnmatch
+import glob
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+CompiledPolicy = namedtuple(
+    'CompiledPolicy', 'name roles email_domains owner_names max_per_user window_days'
+)
+
+_KNOWN_KEYS = {'name', 'roles', 'email_domains', 'owner_names', 'max_per_user', 'window_days'}
+
+
+def _lowered(values):
+    return frozenset(v.strip().lower() for v in values) if values else None
+
+
+def compile_policy(rule):
+    """Validate one rule dict and turn it into a CompiledPolicy."""
+    if 'organizations' in rule:
+        raise ValueError(f"Policy {rule.get('name')!r}: 'organizations' is not supported — the "
+                         "requested organization is free text, so it cannot grant auto-approval")
+    unknown = set(rule) - _KNOWN_KEYS
+    if unknown:
+        raise ValueError(f"Unknown auto-approval policy key(s): {', '.join(sorted(unknown))}")
+    if not rule.get('name'):
+        raise ValueError("Every auto-approval policy needs a name")
+
+    return CompiledPolicy(
+        name          = rule['name'],
+        roles         = frozenset(rule['roles']) if rule.get('roles') else None,
+        email_domains = _lowered([d.lstrip('@') for d in rule.get('email_domains') or []]),
+        owner_names   = tuple(p.strip().lower() for p in rule.get('owner_names') or ['{username}']),
+        max_per_user  = rule.get('max_per_user'),
+        window_days   = rule.get('window_days', 30),
+    )
+
+
+class ApprovalPolicyEngine:
+
+    def __init__(self):
+        self.policies = ()
+        self._lock    = threading.Lock()
+        self._reset_stats()
+
+    def init_app(self, app):
+        self.policies = tuple(compile_policy(r) for r in app.config['AUTO_APPROVE_POLICIES'])
+        self._reset_stats()
+        app.extensions['approval_policy'] = self
+
+    def _reset_stats(self):
+        self._stats = {
+            'evaluated':     0,
+            'auto_approved': 0,
+            'manual':        0,
+            'eval_seconds':  0.0,
+            'eval_max':      0.0,
+            'by_policy':     {},
+        }
+
+    # ─── Evaluation ──────────────────────────────────────
+    def evaluate(self, user, req):
+        """Name of the first policy that auto-approves req, or None."""
+        if not self.policies:
+            return None
+
+        start = time.perf_counter()
+        matched = None
+        # Domains are matched on the account's email; the free-text email on
+        # the request must be blank or the same address, or nothing matches.
+        email  = (user.email or '').strip().lower()
+        typed  = (req.email or '').strip().lower()
+        domain = email.rpartition('@')[2] if '@' in email else None
+        owner  = (req.owner_name or '').strip().lower()
+        name   = glob.escape(user.username.lower())
+        role   = user.role_name
+
+        for policy in (self.policies if typed in ('', email) else ()):
+            if policy.roles is not None and role not in policy.roles:
+                continue
+            if policy.email_domains is not None and domain not in policy.email_domains:
+                continue
+            if not any(fnmatch.fnmatchcase(owner, p.replace('{username}', name)) for p in policy.owner_names):
+                continue
+            if policy.max_per_user is not None and \
+                    _recent_approvals(user.id, policy.window_days, exclude=req.id) >= policy.max_per_user:
+                continue
+            matched = policy.name
+            break
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            s = self._stats
+            s['evaluated']    += 1
+            s['eval_seconds'] += elapsed
+            if elapsed > s['eval_max']:
+                s['eval_max'] = elapsed
+            if matched:
+                s['auto_approved'] += 1
+                s['by_policy'][matched] = s['by_policy'].get(matched, 0) + 1
+            else:
+                s['manual'] += 1
+        return matched
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats, by_policy=dict(self._stats['by_policy']))
+        n = snapshot['evaluated']
+        snapshot['eval_avg'] = snapshot['eval_seconds'] / n if n else 0.0
+        return snapshot
+
+
+def _recent_approvals(user_id, window_days, exclude=None):
+    from app import db
+    from app.requests.models import CertificateRequest
+
+    since = datetime.utcnow() - timedelta(days=window_days)
+    query = db.session.query(db.func.count(CertificateRequest.id)).filter(
+        CertificateRequest.user_id == user_id,
+        CertificateRequest.status.in_(('ISSUING', 'APPROVED')),
+        CertificateRequest.requested_at >= since,
+    )
+    if exclude is not None:
+        query = query.filter(CertificateRequest.id != exclude)
+    return query.scalar()
+
+
+approval_policy = ApprovalPolicyEngine()
@@ -1,10 +1,13 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import current_user
 from app import db
 from app.auth.decorators import login_required, role_required
 from app.requests.models import CertificateRequest
+from app.requests.jobs import enqueue_issuance, job_status
+from app.requests.policy import approval_policy
 from app.audit.logger import log_action
+from app.models.routing import read_only
 
 requests_bp = Blueprint('requests', __name__)
 
@@ -44,13 +47,23 @@ def submit_request():
         log_action('CERT_REQUEST_SUBMITTED',
             detail=f'Certificate requested for {owner_name}'
         )
-        flash('Certificate request submitted! Awaiting CA Admin approval.', 'success')
+
+        policy = approval_policy.evaluate(current_user, new_req)
+        if policy:
+            log_action('CERT_AUTO_APPROVED',
+                detail=f'Request for {owner_name} auto-approved by policy "{policy}"'
+            )
+            enqueue_issuance(new_req, f'policy:{policy}')
+            flash('Certificate request auto-approved — your certificate is being issued.', 'success')
+        else:
+            flash('Certificate request submitted! Awaiting CA Admin approval.', 'success')
         return redirect(url_for('portal.user_portal'))
 
     return render_template('requests/submit.html')
 
 
 @requests_bp.route('/requests/review')
+@read_only
 @role_required('ca_admin')
 def review_requests():
     pending  = CertificateRequest.query.filter_by(status='PENDING').all()
@@ -71,44 +84,13 @@ def approve_request(req_id):
         flash('This request is no longer pending.', 'error')
         return redirect(url_for('requests.review_requests'))
 
-    try:
-        from app.ca.certificate import issue_certificate
-        from app.models.certificate_db import Certificate
-
-        cert_pem, serial, valid_from, valid_to = issue_certificate(
-            req.owner_name, req.email, req.organization
-        )
-
-        new_cert = Certificate(
-            serial_number = serial,
-            owner_name    = req.owner_name,
-            email         = req.email,
-            organization  = req.organization,
-            issued_by     = "PKI-Advanced Intermediate CA",
-            valid_from    = valid_from,
-            valid_to      = valid_to,
-            cert_pem      = cert_pem,
-            status        = 'ACTIVE'
-        )
-        db.session.add(new_cert)
-        db.session.flush()
-
-        req.status       = 'APPROVED'
-        req.reviewed_at  = datetime.utcnow()
-        req.reviewed_by  = current_user.username
-        req.certificate_id = new_cert.id
-
-        db.session.commit()
-
-        log_action('CERT_APPROVED',
-            detail=f'Approved request for {req.owner_name}',
-            certificate_serial=serial
-        )
+    job = enqueue_issuance(req, current_user.username)
+    if job.status == 'DONE':
         flash(f'Certificate approved and issued for {req.owner_name}.', 'success')
-
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error issuing certificate: {str(e)}', 'error')
+    elif job.status == 'FAILED':
+        flash(f'Error issuing certificate: {job.last_error}', 'error')
+    else:
+        flash(f'Approved — certificate for {req.owner_name} is being issued.', 'success')
 
     return redirect(url_for('requests.review_requests'))
 
@@ -119,15 +101,31 @@ def reject_request(req_id):
     req    = CertificateRequest.query.get_or_404(req_id)
     reason = request.form.get('reason', 'No reason provided').strip()
 
-    req.status        = 'REJECTED'
-    req.reviewed_at   = datetime.utcnow()
-    req.reviewed_by   = current_user.username
-    req.reject_reason = reason
-
+    # Conditional UPDATE, like the job claim: an approval that got there
+    # first (ISSUING / APPROVED) is never overwritten.
+    rejected = db.session.execute(
+        db.update(CertificateRequest)
+        .where(CertificateRequest.id == req.id, CertificateRequest.status == 'PENDING')
+        .values(status='REJECTED', reviewed_at=datetime.utcnow(),
+                reviewed_by=current_user.username, reject_reason=reason)
+    ).rowcount
     db.session.commit()
+    if not rejected:
+        flash('This request is no longer pending.', 'error')
+        return redirect(url_for('requests.review_requests'))
 
     log_action('CERT_REJECTED',
         detail=f'Rejected request for {req.owner_name}. Reason: {reason}'
     )
     flash(f'Request rejected for {req.owner_name}.', 'success')
-    return redirect(url_for('requests.review_requests'))
\ No newline at end of file
+    return redirect(url_for('requests.review_requests'))
+
+
+@requests_bp.route('/requests/status/<int:req_id>')
+@login_required
+def request_status(req_id):
+    """Issuance progress for the requester or a CA admin — poll after approval."""
+    req = CertificateRequest.query.get_or_404(req_id)
+    if req.user_id != current_user.id and current_user.role_name != 'ca_admin':
+        return jsonify({'error': 'not your request'}), 403
+    return jsonify(job_status(req))
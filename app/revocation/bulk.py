@@ -0,0 +1,93 @@
+"""
+Bulk revocation.
+
+Revokes every ACTIVE certificate that matches a selection — organization,
+owner names, issue-time window and/or serial numbers — in batched
+transactions of BULK_REVOKE_BATCH_SIZE certificates, then publishes the
+CRL once at the end instead of once per certificate. Each certificate
+still gets its own revocation history row and CERT_REVOKED audit event.
+"""
+import logging
+from datetime import datetime
+from app import db
+from app.models.certificate_db import Certificate
+from app.revocation.crl_manager import generate_crl, reason_code
+from app.monitoring.metrics import certificates_revoked
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+def select_certificates(organization=None, owners=None, issued_after=None,
+                        issued_before=None, serials=None):
+    """
+    Query for the ids of ACTIVE certificates matching every given criterion.
+    At least one criterion is required so an empty form can't revoke everything.
+    """
+    if not (organization or owners or issued_after or issued_before or serials):
+        raise ValueError("Bulk revocation needs at least one selection criterion")
+
+    query = db.session.query(Certificate.id).filter(Certificate.status == 'ACTIVE')
+    if organization:
+        query = query.filter(Certificate.organization == organization)
+    if owners:
+        query = query.filter(Certificate.owner_name.in_(owners))
+    if serials:
+        query = query.filter(Certificate.serial_number.in_(serials))
+    if issued_after:
+        query = query.filter(Certificate.issued_at >= issued_after)
+    if issued_before:
+        query = query.filter(Certificate.issued_at < issued_before)
+    return query.order_by(Certificate.id)
+
+
+def bulk_revoke(reason='No reason provided', batch_size=None, user=None, **criteria):
+    """
+    Revoke every matching certificate. Returns
+    {'revoked': n, 'batches': n, 'serials': [...], 'crl_published': bool}.
+    """
+    from app.audit.logger import log_action
+
+    batch_size = batch_size or Config.BULK_REVOKE_BATCH_SIZE
+    ids        = [row.id for row in select_certificates(**criteria)]
+    code       = reason_code(reason)
+    serials    = []
+    batches    = 0
+
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        when  = datetime.utcnow()
+        # Re-check status: a single revoke may have raced us since the id scan
+        certs = Certificate.query.filter(
+            Certificate.id.in_(chunk), Certificate.status == 'ACTIVE'
+        ).all()
+        for cert in certs:
+            db.session.add(cert.revoke(code, reason, when))
+        db.session.commit()
+        certificates_revoked.inc(len(certs))
+        batches += 1
+
+        for cert in certs:
+            serials.append(cert.serial_number)
+            log_action('CERT_REVOKED',
+                detail=f'Bulk revocation of {cert.owner_name}: {reason}',
+                certificate_serial=cert.serial_number,
+                user=user
+            )
+
+    published = False
+    if serials:
+        try:
+            generate_crl()
+            published = True
+        except Exception as e:
+            log.warning("Could not regenerate CRL: %s", e)
+
+    selection = ', '.join(f'{k}={v}' for k, v in criteria.items() if v)
+    log_action('CERT_BULK_REVOKED',
+        detail=f'{len(serials)} certificate(s) revoked in {batches} batch(es) '
+               f'({selection}). Reason: {reason}',
+        user=user
+    )
+    return {'revoked': len(serials), 'batches': batches,
+            'serials': serials, 'crl_published': published}
@@ -1,12 +1,18 @@
 import datetime
+import logging
+import time
 from cryptography import x509
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import serialization
 from cryptography.x509 import ReasonFlags
-from app.ca.intermediate_ca import load_intermediate_ca
-from app.models.certificate_db import RevokedCertificate
+from app import db
+from app.ca.signing import ca_certificate, sign_crl
+from app.models.certificate_db import Certificate
+from app.monitoring.metrics import crl_build_seconds, sign_seconds, crl_entries, crl_bytes
 from config import Config
 import os
 
+log = logging.getLogger(__name__)
+
 
 # Map reason string → cryptography ReasonFlags
 REASON_MAP = {
@@ -19,44 +25,87 @@ REASON_MAP = {
     "No reason provided":      ReasonFlags.unspecified,
 }
 
+# RFC 5280 §5.3.1 CRLReason codes, as stored in Certificate.revocation_reason
+REASON_CODES = {
+    ReasonFlags.unspecified:             0,
+    ReasonFlags.key_compromise:          1,
+    ReasonFlags.ca_compromise:           2,
+    ReasonFlags.affiliation_changed:     3,
+    ReasonFlags.superseded:              4,
+    ReasonFlags.cessation_of_operation:  5,
+    ReasonFlags.certificate_hold:        6,
+    ReasonFlags.remove_from_crl:         8,
+    ReasonFlags.privilege_withdrawn:     9,
+    ReasonFlags.aa_compromise:          10,
+}
+CODE_TO_FLAG  = {code: flag for flag, code in REASON_CODES.items()}
+CODE_TO_LABEL = {REASON_CODES[flag]: label for label, flag in REASON_MAP.items()}
+
+
+def reason_code(reason):
+    """Reason label from the revoke form → RFC 5280 code (0 if unknown)."""
+    for label, flag in REASON_MAP.items():
+        if reason and reason.startswith(label):
+            return REASON_CODES[flag]
+    return REASON_CODES[ReasonFlags.unspecified]
+
+
+def reason_label(code):
+    """RFC 5280 code → human label for display."""
+    return CODE_TO_LABEL.get(code, "No reason provided")
+
 
 def generate_crl():
     """
     Build a proper signed CRL from all revoked certs in the database.
     Saves to storage/intermediate_ca/crl.pem and returns PEM string.
     """
-    int_private_key, int_cert = load_intermediate_ca()
+    int_cert = ca_certificate('intermediate')
 
+    started  = time.perf_counter()
     now      = datetime.datetime.utcnow()
     next_update = now + datetime.timedelta(days=7)  # CRL valid for 7 days
 
-    builder = (
-        x509.CertificateRevocationListBuilder()
-        .issuer_name(int_cert.subject)
-        .last_update(now)
-        .next_update(next_update)
+    # Pull all revoked certs from DB — one indexed, column-only read
+    revoked_records = (
+        db.session.query(
+            Certificate.serial_number,
+            Certificate.revoked_at,
+            Certificate.revocation_reason,
+        )
+        .filter(Certificate.status == 'REVOKED')
+        .all()
     )
 
-    # Pull all revoked certs from DB and add to CRL
-    revoked_records = RevokedCertificate.query.all()
-
+    revoked_certs = []
     for record in revoked_records:
-        reason_flag = REASON_MAP.get(record.reason, ReasonFlags.unspecified)
+        reason_flag = CODE_TO_FLAG.get(record.revocation_reason, ReasonFlags.unspecified)
 
-        revoked_cert = (
+        revoked_certs.append(
             x509.RevokedCertificateBuilder()
             .serial_number(int(record.serial_number))
-            .revocation_date(record.revoked_at)
+            .revocation_date(record.revoked_at or now)
             .add_extension(
                 x509.CRLReason(reason_flag),
                 critical=False
             )
             .build()
         )
-        builder = builder.add_revoked_certificate(revoked_cert)
+
+    # Entries go in through the constructor: add_revoked_certificate()
+    # copies the list on every call, which is quadratic at 100k entries
+    builder = (
+        x509.CertificateRevocationListBuilder(revoked_certificates=revoked_certs)
+        .issuer_name(int_cert.subject)
+        .last_update(now)
+        .next_update(next_update)
+    )
+
+    crl_build_seconds.observe(time.perf_counter() - started)
 
     # Sign CRL with Intermediate CA private key
-    crl = builder.sign(int_private_key, hashes.SHA256())
+    with sign_seconds.labels(kind='crl').time():
+        crl = sign_crl(builder, 'intermediate')
 
     # Save as PEM file
     crl_path = os.path.join(Config.INTERMEDIATE_DIR, "crl.pem")
@@ -65,7 +114,10 @@ def generate_crl():
     with open(crl_path, 'wb') as f:
         f.write(crl_pem)
 
-    print(f"  [CRL] Generated with {len(revoked_records)} revoked certificate(s)")
+    crl_entries.set(len(revoked_records))
+    crl_bytes.set(len(crl_pem))
+    log.info("Generated CRL with %d revoked certificate(s)", len(revoked_records),
+             extra={'crl_bytes': len(crl_pem)})
     return crl_pem.decode('utf-8')
 
 
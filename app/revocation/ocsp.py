@@ -2,10 +2,13 @@ from cryptography import x509
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.x509 import ocsp
 from cryptography.x509.ocsp import OCSPCertStatus
-from app.ca.intermediate_ca import load_intermediate_ca
-from app.ca.root_ca import load_root_ca
-from app.models.certificate_db import Certificate, RevokedCertificate
+from app.ca.signing import ca_certificate, sign_bytes
+from app.models.certificate_db import find_certificate
+from app.revocation.crl_manager import reason_label
+from app.monitoring.metrics import ocsp_lookup_seconds, sign_seconds
+import base64
 import datetime
+import json
 
 
 def check_status_by_serial(serial_number: str):
@@ -13,21 +16,19 @@ def check_status_by_serial(serial_number: str):
     Given a serial number string, return its OCSP-style status dict.
     This is the core logic used by the /ocsp route.
     """
-    cert = Certificate.query.filter_by(serial_number=serial_number).first()
+    with ocsp_lookup_seconds.time():
+        cert = find_certificate(serial_number)
 
     if not cert:
         return {"status": "UNKNOWN", "serial": serial_number}
 
     if cert.status == "REVOKED":
-        revoked = RevokedCertificate.query.filter_by(
-            serial_number=serial_number
-        ).first()
         return {
             "status":      "REVOKED",
             "serial":      serial_number,
             "owner":       cert.owner_name,
-            "revoked_at":  revoked.revoked_at.strftime("%Y-%m-%d %H:%M UTC") if revoked else "unknown",
-            "reason":      revoked.reason if revoked else "unspecified",
+            "revoked_at":  cert.revoked_at.strftime("%Y-%m-%d %H:%M UTC") if cert.revoked_at else "unknown",
+            "reason":      reason_label(cert.revocation_reason),
         }
 
     if cert.is_expired():
@@ -49,26 +50,37 @@ def check_status_by_serial(serial_number: str):
 def build_ocsp_response(serial_number: str) -> dict:
     """
     Full OCSP-style response with CA info attached.
-    Returns a structured dict ready for JSON response.
+    Returns a structured dict ready for JSON response. "signature" is the
+    Intermediate CA's SHA256withRSA signature, base64, over
+    canonical_response_bytes() of every other field.
     """
-    _, int_cert  = load_intermediate_ca()
-    _, root_cert = load_root_ca()
+    int_cert  = ca_certificate('intermediate')
+    root_cert = ca_certificate('root')
 
     status = check_status_by_serial(serial_number)
 
-    return {
-        "ocsp_response": {
-            "version":        "1.0",
-            "responder":      int_cert.subject.rfc4514_string(),
-            "produced_at":    datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            "cert_status":    status,
-            "this_update":    datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            "next_update":    (datetime.datetime.utcnow() + datetime.timedelta(hours=1))
-                              .strftime("%Y-%m-%d %H:%M:%S UTC"),
-            "signature_alg":  "SHA256withRSA",
-            "issuer_chain": {
-                "intermediate": int_cert.subject.rfc4514_string(),
-                "root":         root_cert.subject.rfc4514_string(),
-            }
+    body = {
+        "version":        "1.0",
+        "responder":      int_cert.subject.rfc4514_string(),
+        "produced_at":    datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "cert_status":    status,
+        "this_update":    datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "next_update":    (datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+                          .strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "signature_alg":  "SHA256withRSA",
+        "issuer_chain": {
+            "intermediate": int_cert.subject.rfc4514_string(),
+            "root":         root_cert.subject.rfc4514_string(),
         }
-    }
\ No newline at end of file
+    }
+    with sign_seconds.labels(kind='ocsp').time():
+        signature = sign_bytes(canonical_response_bytes(body), 'intermediate')
+    body["signature"] = base64.b64encode(signature).decode('ascii')
+
+    return {"ocsp_response": body}
+
+
+def canonical_response_bytes(body: dict) -> bytes:
+    """The bytes an OCSP response signature covers: sorted-key compact JSON, minus "signature"."""
+    unsigned = {k: v for k, v in body.items() if k != "signature"}
+    return json.dumps(unsigned, sort_keys=True, separators=(',', ':')).encode('utf-8')
@@ -3,11 +3,14 @@ from app import db
 from app.auth.decorators import role_required
 from app.auth.models import User, Role
 from app.audit.logger import log_action
+from app.models.routing import read_only
+from app.auth.cache import user_cache
 
 admin_bp = Blueprint('admin', __name__)
 
 
 @admin_bp.route('/admin/users')
+@read_only
 @role_required('ca_admin')
 def manage_users():
     users = User.query.order_by(User.created_at.desc()).all()
@@ -35,6 +38,7 @@ def change_role(user_id):
     old_role  = user.role_name
     user.role = role
     db.session.commit()
+    user_cache.invalidate(user.id)
 
     log_action(
         'ROLE_CHANGED',
@@ -56,6 +60,7 @@ def toggle_user(user_id):
 
     user.is_active = not user.is_active
     db.session.commit()
+    user_cache.invalidate(user.id)
 
     action = 'ACTIVATED' if user.is_active else 'DEACTIVATED'
     log_action(f'USER_{action}', detail=f'{user.username} was {action.lower()}')
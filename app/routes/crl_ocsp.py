@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, render_template, request, Response
 from app.revocation.crl_manager import generate_crl, get_crl_info
 from app.revocation.ocsp import build_ocsp_response
+from app.models.routing import read_only
 
 crl_ocsp_bp = Blueprint('crl_ocsp', __name__)
 
@@ -25,6 +26,7 @@ def download_crl():
 
 
 @crl_ocsp_bp.route('/ocsp/<serial_number>')
+@read_only
 def ocsp_check(serial_number):
     """OCSP-style JSON endpoint. Query: /ocsp/<serial_number>"""
     response = build_ocsp_response(serial_number)
@@ -32,6 +34,7 @@ def ocsp_check(serial_number):
 
 
 @crl_ocsp_bp.route('/ocsp', methods=['GET', 'POST'])
+@read_only
 def ocsp_ui():
     """Web UI for OCSP checking."""
     result = None
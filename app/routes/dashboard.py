@@ -1,12 +1,14 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, Response, stream_with_context
 from app.models.certificate_db import Certificate
 from app.auth.decorators import login_required, role_required
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.models.routing import read_only
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 
 @dashboard_bp.route('/dashboard')
+@read_only
 @login_required
 def index():
     total   = Certificate.query.count()
@@ -19,6 +21,7 @@ def index():
 
 
 @dashboard_bp.route('/certificates')
+@read_only
 @login_required
 def list_certs():
     # Filter param from query string: ?filter=active / expired / revoked / all
@@ -55,27 +58,142 @@ def list_certs():
     )
 
 
+@dashboard_bp.route('/certificates/export')
+@read_only
+@role_required('ca_admin', 'server_admin')
+def export_certs():
+    """
+    Stream the selected certificates as a PEM bundle, ZIP or PKCS#7 file.
+    Query: ?format=pem|zip|pkcs7&status=all|active|revoked|expired
+           &org=NAME&since=YYYY-MM-DD&until=YYYY-MM-DD&chain=0|1
+    """
+    from app.ca.export import FORMATS, STATUSES, export_certificates, iter_certificates
+    from app.audit.logger import log_action
+
+    fmt    = request.args.get('format', 'pem')
+    status = request.args.get('status', 'active')
+    org    = request.args.get('org', '').strip() or None
+    chain  = request.args.get('chain', '1' if fmt == 'pkcs7' else '0') == '1'
+    if fmt not in FORMATS:
+        return Response(f"format must be one of {', '.join(FORMATS)}\n", status=400, mimetype='text/plain')
+    if status not in STATUSES:
+        return Response(f"status must be one of {', '.join(STATUSES)}\n", status=400, mimetype='text/plain')
+    try:
+        since = _parse_date('since')
+        until = _parse_date('until', end_of_day=True)
+    except ValueError as e:
+        return Response(f'{e}\n', status=400, mimetype='text/plain')
+
+    log_action('CERTIFICATES_EXPORTED',
+               detail=f'format={fmt} status={status} org={org} since={since} until={until}')
+    rows = iter_certificates(status, org, since, until)
+
+    mimetype, ext = FORMATS[fmt]
+    return Response(
+        stream_with_context(export_certificates(fmt, rows, chain=chain)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=certificates_{status}.{ext}'}
+    )
+
+
 @dashboard_bp.route('/audit')
+@read_only
 @role_required('ca_admin')
 def audit_log():
-    from app.audit.models import AuditLog
-    # Filter by action type
+    from app.audit.query import search_audit_logs, distinct_actions, make_cursor
+    # Exact-match filters — each one is backed by an index on audit_logs
     action_filter = request.args.get('action', 'all')
-    query = AuditLog.query
-
-    if action_filter != 'all':
-        query = query.filter(AuditLog.action.like(f'%{action_filter.upper()}%'))
-
-    logs = query.order_by(AuditLog.timestamp.desc()).limit(200).all()
-
-    # Distinct action types for filter dropdown
-    all_actions = db.session.query(AuditLog.action).distinct().all()
+    try:
+        filters = {
+            'username':           request.args.get('user', '').strip() or None,
+            'certificate_serial': request.args.get('serial', '').strip() or None,
+            'status':             request.args.get('status', '').strip().upper() or None,
+            'since':              _parse_date('since'),
+            'until':              _parse_date('until', end_of_day=True),
+        }
+        logs = search_audit_logs(
+            action=None if action_filter == 'all' else action_filter,
+            before=request.args.get('before') or None,
+            limit=200,
+            **filters
+        )
+    except ValueError as e:                 # hand-edited ?before= cursor or date
+        return Response(f'{e}\n', status=400, mimetype='text/plain')
+    next_cursor = make_cursor(logs[-1]) if len(logs) == 200 else None
 
     return render_template('audit.html',
         logs=logs, active_filter=action_filter,
-        all_actions=[a[0] for a in all_actions]
+        all_actions=distinct_actions(),
+        next_cursor=next_cursor
+    )
+
+
+@dashboard_bp.route('/audit/export')
+@read_only
+@role_required('ca_admin')
+def audit_export():
+    """
+    Stream the audit trail (all monthly tables + live) as NDJSON or CSV.
+    Query: ?format=ndjson|csv&since=YYYY-MM-DD&until=YYYY-MM-DD&action=CODE
+    """
+    import csv
+    import io
+    import json
+    from app.audit.partitions import iter_audit_rows
+    from app.audit.logger import log_action
+
+    fmt    = request.args.get('format', 'ndjson')
+    action = request.args.get('action') or None
+    if fmt not in ('ndjson', 'csv'):
+        return Response('format must be ndjson or csv\n', status=400, mimetype='text/plain')
+    try:
+        since = _parse_date('since')
+        until = _parse_date('until', end_of_day=True)
+    except ValueError as e:
+        return Response(f'{e}\n', status=400, mimetype='text/plain')
+
+    log_action('AUDIT_EXPORTED', detail=f'format={fmt} since={since} until={until} action={action}')
+    columns = ['id', 'timestamp', 'user_id', 'username', 'action', 'detail',
+               'certificate_serial', 'ip_address', 'status']
+
+    def generate():
+        buf    = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == 'csv':
+            writer.writerow(columns)
+        for i, row in enumerate(iter_audit_rows(since, until, action), 1):
+            record = {c: row[c] for c in columns}
+            record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+            if fmt == 'csv':
+                writer.writerow([record[c] for c in columns])
+            else:
+                buf.write(json.dumps(record))
+                buf.write('\n')
+            if i % 500 == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    ext = 'csv' if fmt == 'csv' else 'ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=audit_export.{ext}'}
     )
 
 
-# Import db for audit route
-from app import db
\ No newline at end of file
+def _parse_date(name, end_of_day=False):
+    """?name=YYYY-MM-DD (from the date inputs) → datetime, or None if absent.
+
+    A malformed date raises ValueError rather than silently widening the
+    range; the routes answer 400.
+    """
+    value = request.args.get(name)
+    try:
+        parsed = datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        raise ValueError(f'{name} must be a date as YYYY-MM-DD') from None
+    if parsed and end_of_day:
+        parsed += timedelta(days=1)
+    return parsed
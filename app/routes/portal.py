@@ -1,11 +1,13 @@
 from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import current_user
 from app.auth.decorators import login_required
+from app.models.routing import read_only
 
 portal_bp = Blueprint('portal', __name__)
 
 
 @portal_bp.route('/')
+@read_only
 def landing():
     if not current_user.is_authenticated:
         return redirect(url_for('auth.login'))
@@ -13,6 +15,7 @@ def landing():
 
 
 @portal_bp.route('/portal/user')
+@read_only
 @login_required
 def user_portal():
     from app.requests.models import CertificateRequest
@@ -23,6 +26,7 @@ def user_portal():
 
 
 @portal_bp.route('/portal/server')
+@read_only
 @login_required
 def server_portal():
     # Only server_admin or ca_admin can access
@@ -33,6 +37,7 @@ def server_portal():
 
 
 @portal_bp.route('/portal/ca')
+@read_only
 @login_required
 def ca_portal():
     if not current_user.is_ca_admin():
@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime
 from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import current_user
@@ -5,6 +6,10 @@ from app import db
 from app.auth.decorators import login_required
 from app.models.certificate_db import Certificate
 from app.audit.logger import log_action
+from app.ca.renewal import reissue
+from app.monitoring.metrics import certificates_renewed, certificates_revoked
+
+log = logging.getLogger(__name__)
 
 renew_bp = Blueprint('renew', __name__)
 
@@ -38,54 +43,34 @@ def renew_certificate(cert_id):
         return redirect(url_for('verify.view_cert', cert_id=cert_id))
 
     try:
-        from app.ca.certificate import issue_certificate
-
         # Issue new certificate with same details
-        cert_pem, serial, valid_from, valid_to = issue_certificate(
-            old_cert.owner_name,
-            old_cert.email,
-            old_cert.organization
-        )
+        new_cert = reissue(old_cert)
 
         # Mark old cert as revoked (superseded)
-        from app.models.certificate_db import RevokedCertificate
-        old_cert.status = 'REVOKED'
-        revoked = RevokedCertificate(
-            serial_number = old_cert.serial_number,
-            owner_name    = old_cert.owner_name,
-            reason        = 'Superseded — renewed by user'
-        )
-        db.session.add(revoked)
+        from app.revocation.crl_manager import reason_code
+        reason = 'Superseded — renewed by user'
+        db.session.add(old_cert.revoke(reason_code(reason), reason))
 
         # Save new cert
-        new_cert = Certificate(
-            serial_number = serial,
-            owner_name    = old_cert.owner_name,
-            email         = old_cert.email,
-            organization  = old_cert.organization,
-            issued_by     = 'PKI-Advanced Intermediate CA',
-            valid_from    = valid_from,
-            valid_to      = valid_to,
-            cert_pem      = cert_pem,
-            status        = 'ACTIVE'
-        )
         db.session.add(new_cert)
         db.session.commit()
+        certificates_revoked.inc()
+        certificates_renewed.labels(trigger='user').inc()
 
         # Regenerate CRL since old cert is now revoked
         try:
             from app.revocation.crl_manager import generate_crl
             generate_crl()
         except Exception as e:
-            print(f"  [CRL] Warning: {e}")
+            log.warning("Could not regenerate CRL: %s", e)
 
         log_action(
             'CERT_RENEWED',
             detail=f'Renewed certificate for {old_cert.owner_name}',
-            certificate_serial=serial
+            certificate_serial=new_cert.serial_number
         )
 
-        flash(f'Certificate renewed successfully! New cert valid until {valid_to.strftime("%Y-%m-%d")}.', 'success')
+        flash(f'Certificate renewed successfully! New cert valid until {new_cert.valid_to.strftime("%Y-%m-%d")}.', 'success')
         return redirect(url_for('verify.view_cert', cert_id=new_cert.id))
 
     except Exception as e:
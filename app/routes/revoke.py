@@ -1,7 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import logging
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from app import db
-from app.models.certificate_db import Certificate, RevokedCertificate
-from app.revocation.crl_manager import generate_crl
+from app.auth.decorators import role_required
+from app.models.certificate_db import Certificate
+from app.revocation.crl_manager import generate_crl, reason_code
+from app.revocation.bulk import bulk_revoke
+from app.monitoring.metrics import certificates_revoked
+
+log = logging.getLogger(__name__)
 
 revoke_bp = Blueprint('revoke', __name__)
 
@@ -19,25 +26,63 @@ def revoke():
             flash(f'No active certificate found for {owner_name}.', 'error')
             return redirect(url_for('revoke.revoke'))
 
-        # Mark as revoked in certificates table
-        cert.status = 'REVOKED'
-
-        # Add to revocation log
-        revoked = RevokedCertificate(
-            serial_number = cert.serial_number,
-            owner_name    = owner_name,
-            reason        = reason
-        )
-        db.session.add(revoked)
+        # Mark as revoked in certificates table + add to revocation log
+        db.session.add(cert.revoke(reason_code(reason), reason))
         db.session.commit()
+        certificates_revoked.inc()
 
         try:
             generate_crl()
         except Exception as e:
-            print(f"  [CRL] Warning: could not regenerate CRL: {e}")
+            log.warning("Could not regenerate CRL: %s", e)
         flash(f'Certificate revoked for {owner_name}.', 'success')
         return redirect(url_for('dashboard.index'))
 
     # Show all active certs in dropdown
     active_certs = Certificate.query.filter_by(status='ACTIVE').all()
-    return render_template('revoke.html', active_certs=active_certs)
\ No newline at end of file
+    return render_template('revoke.html', active_certs=active_certs)
+
+def _split_list(value):
+    """'a, b\nc' or ['a', 'b'] → ['a', 'b', 'c']"""
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in (value or '').replace(',', '\n').splitlines() if v.strip()]
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d') if value else None
+
+
+@revoke_bp.route('/revoke/bulk', methods=['GET', 'POST'])
+@role_required('ca_admin')
+def revoke_bulk():
+    """
+    Revoke every ACTIVE certificate matching the selection, then publish one CRL.
+    Accepts the admin form or a JSON body (API token clients):
+        {"organization": "...", "owners": [...], "serials": [...],
+         "issued_after": "YYYY-MM-DD", "issued_before": "YYYY-MM-DD", "reason": "Key Compromise"}
+    """
+    if request.method == 'GET':
+        return render_template('revoke_bulk.html')
+
+    data = request.get_json(silent=True) if request.is_json else request.form
+    data = data or {}
+    try:
+        criteria = dict(
+            organization  = (data.get('organization') or '').strip() or None,
+            owners        = _split_list(data.get('owners')),
+            serials       = _split_list(data.get('serials')),
+            issued_after  = _parse_day(data.get('issued_after')),
+            issued_before = _parse_day(data.get('issued_before')),
+        )
+        result = bulk_revoke(reason=(data.get('reason') or 'No reason provided').strip(), **criteria)
+    except ValueError as e:
+        if request.is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        return redirect(url_for('revoke.revoke_bulk'))
+
+    if request.is_json:
+        return jsonify(result)
+    flash(f"Revoked {result['revoked']} certificate(s) in {result['batches']} batch(es).", 'success')
+    return redirect(url_for('dashboard.index'))
@@ -1,9 +1,19 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from app.models.certificate_db import Certificate
+from io import BytesIO
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, Response, send_file
+from werkzeug.utils import secure_filename
+from flask_login import current_user
+from app import db
+from app.auth.decorators import login_required
+from app.ca.chain import load_certificates, validate_certificates
+from app.models.certificate_db import Certificate, ArchivedCertificate
+from app.models.routing import read_only
+from app.requests.models import CertificateRequest
+from config import Config
 
 verify_bp = Blueprint('verify', __name__)
 
 @verify_bp.route('/verify', methods=['GET', 'POST'])
+@read_only
 def verify():
     result = None
     if request.method == 'POST':
@@ -24,13 +34,103 @@ def verify():
     return render_template('verify.html', result=result)
 
 
+@verify_bp.route('/verify/chain', methods=['POST'])
+@read_only
+def verify_chain():
+    """
+    Validate real certificates against the CA chain.
+    Body: a PEM bundle or one DER certificate, or JSON
+        {"certificates": ["-----BEGIN CERTIFICATE-----...", ...], "purpose": "client_auth"}
+    """
+    try:
+        if request.is_json:
+            body  = request.get_json(silent=True) or {}
+            blobs = (body.get('certificates') or []) if isinstance(body, dict) else None
+            if not isinstance(blobs, list):
+                return jsonify({'error': 'expected {"certificates": [PEM, ...]}'}), 400
+            purpose = body.get('purpose', 'client_auth')
+            certs   = [c for blob in blobs for c in load_certificates(blob)]
+        else:
+            purpose = request.args.get('purpose', 'client_auth')
+            upload  = request.files.get('certificate')
+            certs   = load_certificates(upload.read() if upload else request.get_data())
+    except ValueError as e:
+        return jsonify({'error': f'could not parse certificate: {e}'}), 400
+
+    if not certs:
+        return jsonify({'error': 'no certificates supplied'}), 400
+    if len(certs) > Config.CHAIN_VERIFY_MAX_BATCH:
+        return jsonify({'error': f'at most {Config.CHAIN_VERIFY_MAX_BATCH} certificates per request'}), 413
+
+    try:
+        results, stats = validate_certificates(certs, purpose or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'results': results, **stats})
+
+
 @verify_bp.route('/view/<int:cert_id>')
+@read_only
 def view_cert(cert_id):
+    cert = Certificate.query.get(cert_id) or ArchivedCertificate.query.get_or_404(cert_id)
+    return render_template('view.html', cert=cert,
+                           can_download_key=isinstance(cert, Certificate) and _may_download_key(cert))
+
+
+def _may_download_key(cert):
+    """
+    CA admins, and the user whose own request produced cert. owner_name is
+    free text anyone can register as a username, so it proves nothing.
+    """
+    if not current_user.is_authenticated:
+        return False
+    if current_user.is_ca_admin():
+        return True
+    return db.session.query(
+        CertificateRequest.query.filter_by(certificate_id=cert.id, user_id=current_user.id).exists()
+    ).scalar()
+
+
+@verify_bp.route('/view/<int:cert_id>/pkcs12', methods=['POST'])
+@login_required
+def download_pkcs12(cert_id):
+    """
+    Key, certificate and CA chain as a .p12 file. Requester or CA admin only.
+    Form: passphrase=... (at least PKCS12_MIN_PASSPHRASE characters)
+    """
+    from app.ca.pkcs12 import pkcs12_bundles, BundleQueueFull, KeyNotFound
+    from app.audit.logger import log_action
+
     cert = Certificate.query.get_or_404(cert_id)
-    return render_template('view.html', cert=cert)
+    if not _may_download_key(cert):
+        return Response('only the requester or a CA admin can download this key\n', status=403, mimetype='text/plain')
+    if not cert.is_valid():
+        return Response('only active, unexpired certificates can be exported\n', status=409, mimetype='text/plain')
+    passphrase = request.form.get('passphrase', '')
+    if len(passphrase) < Config.PKCS12_MIN_PASSPHRASE:
+        return Response(f'passphrase must be at least {Config.PKCS12_MIN_PASSPHRASE} characters\n',
+                        status=400, mimetype='text/plain')
+
+    try:
+        data = pkcs12_bundles.bundle(cert, passphrase.encode())
+    except KeyNotFound:
+        return Response('no private key is stored for this certificate\n', status=404, mimetype='text/plain')
+    except (BundleQueueFull, TimeoutError):
+        return Response('too many PKCS#12 downloads in progress, try again shortly\n', status=503,
+                        mimetype='text/plain', headers={'Retry-After': '2'})
+
+    log_action('PKCS12_DOWNLOADED', detail=f'PKCS#12 bundle for {cert.owner_name}',
+               certificate_serial=cert.serial_number)
+    # owner_name is free text: secure_filename() keeps quotes, ';' and CR/LF out
+    # of the header, and a name with nothing ASCII left falls back to the serial
+    resp = send_file(BytesIO(data), mimetype='application/x-pkcs12', as_attachment=True,
+                     download_name=f'{secure_filename(cert.owner_name) or cert.serial_number}.p12')
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
 
 
 @verify_bp.route('/certificates')
+@read_only
 def list_certs():
     certs = Certificate.query.order_by(Certificate.issued_at.desc()).all()
     return render_template('view.html', certs=certs, list_mode=True)
\ No newline at end of file
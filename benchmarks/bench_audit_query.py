@@ -0,0 +1,105 @@
+"""
+Audit search benchmark: indexed exact-match queries vs the old LIKE scan.
+
+    python benchmarks/bench_audit_query.py --rows 1000000
+    python benchmarks/bench_audit_query.py --rows 20000000 --workdir /data/bench
+
+Seeding is done once per workdir; re-running against the same --workdir
+reuses the table.
+"""
+import argparse
+import random
+import os
+from datetime import datetime, timedelta
+
+from common import make_app, timed, report
+
+ACTIONS = [
+    'LOGIN_SUCCESS', 'LOGIN_FAILED', 'LOGOUT', 'CERT_REQUEST_SUBMITTED', 'CERT_APPROVED',
+    'CERT_REJECTED', 'CERT_RENEWED', 'ROLE_CHANGED', 'USER_REGISTERED', 'PASSWORD_CHANGED',
+]
+
+
+def seed(db, rows, batch=50_000):
+    """Insert `rows` synthetic audit events spread over the last year."""
+    from app.audit.models import AuditLog
+    existing = db.session.query(db.func.count(AuditLog.id)).scalar()
+    if existing >= rows:
+        return existing
+
+    rnd   = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    step  = timedelta(days=365) / rows
+    table = AuditLog.__table__
+    with db.engine.begin() as conn:
+        for offset in range(existing, rows, batch):
+            conn.execute(table.insert(), [
+                {
+                    'username':           f'user{rnd.randrange(5000)}',
+                    'action':             rnd.choice(ACTIONS),
+                    'detail':             'benchmark row',
+                    'certificate_serial': str(rnd.randrange(10**12)) if rnd.random() < 0.3 else None,
+                    'ip_address':         '127.0.0.1',
+                    'timestamp':          start + step * i,
+                    'status':             'FAILED' if rnd.random() < 0.05 else 'SUCCESS',
+                }
+                for i in range(offset, min(offset + batch, rows))
+            ])
+            print(f"  seeded {min(offset + batch, rows):,} / {rows:,}", end='\r')
+    print()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+    app, workdir = make_app(args.workdir)
+    from app import db
+    from app.audit.models import AuditLog
+    from app.audit.query import search_audit_logs, distinct_actions, clear_actions_cache
+
+    with app.app_context():
+        total = seed(db, args.rows)
+        print(f"\nAudit query benchmark — {total:,} rows ({workdir})\n")
+
+        month_ago = datetime.utcnow() - timedelta(days=30)
+        sample    = AuditLog.query.filter(AuditLog.certificate_serial.isnot(None)).first()
+
+        rows = []
+        t, _ = timed(lambda: search_audit_logs(action='CERT_RENEWED'))
+        rows.append(('action = CERT_RENEWED (newest 200)', t, 'index'))
+        t, _ = timed(lambda: search_audit_logs(action='ROLE_CHANGED', since=month_ago))
+        rows.append(('action + last 30 days', t, 'index'))
+        t, _ = timed(lambda: search_audit_logs(username='user42'))
+        rows.append(('username = user42', t, 'index'))
+        t, _ = timed(lambda: search_audit_logs(certificate_serial=sample.certificate_serial))
+        rows.append(('certificate_serial lookup', t, 'index'))
+        t, _ = timed(lambda: search_audit_logs(status='FAILED', since=month_ago))
+        rows.append(('status = FAILED + last 30 days', t, 'index'))
+        page = search_audit_logs(action='LOGIN_SUCCESS')
+        from app.audit.query import make_cursor
+        t, _ = timed(lambda: search_audit_logs(action='LOGIN_SUCCESS', before=make_cursor(page[-1])))
+        rows.append(('action, page 2 (keyset cursor)', t, 'index'))
+
+        clear_actions_cache()
+        t, _ = timed(lambda: (clear_actions_cache(), distinct_actions()), repeat=1)
+        rows.append(('distinct actions (cold)', t, 'GROUP BY on index'))
+        t, _ = timed(distinct_actions)
+        rows.append(('distinct actions (cached)', t, 'memory'))
+
+        t, _ = timed(lambda: AuditLog.query.filter(AuditLog.action.like('%RENEWED%'))
+                     .order_by(AuditLog.timestamp.desc()).limit(200).all(), repeat=1)
+        rows.append(("old: action LIKE '%RENEWED%'", t, 'full scan'))
+        t, _ = timed(lambda: db.session.query(AuditLog.action).distinct().all(), repeat=1)
+        rows.append(('old: SELECT DISTINCT action', t, 'per page view'))
+
+        report(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Bulk certificate export benchmark: throughput and peak Python memory of
+export_certificates() for each format, at two table sizes. Peak memory
+should not grow with the number of certificates.
+
+    python benchmarks/bench_export.py --certs 20000
+"""
+import argparse
+import shutil
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import make_app
+
+
+def seed(n, pem):
+    from app import db
+    from app.models.certificate_db import Certificate
+    now  = datetime.utcnow()
+    rows = [{'serial_number': str(10 ** 12 + i), 'owner_name': f'user-{i}', 'organization': 'Bench',
+             'issued_by': 'bench', 'issued_at': now, 'valid_from': now,
+             'valid_to': now + timedelta(days=365), 'status': 'ACTIVE', 'cert_pem': pem}
+            for i in range(n)]
+    for start in range(0, n, 5000):
+        db.session.execute(db.insert(Certificate), rows[start:start + 5000])
+    db.session.commit()
+
+
+def measure(fmt):
+    from app.ca.export import export_certificates, iter_certificates
+    tracemalloc.start()
+    start = time.perf_counter()
+    size  = 0
+    for chunk in export_certificates(fmt, iter_certificates('active')):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--certs', type=int, default=20000)
+    args = parser.parse_args()
+
+    rows = []
+    for n in (args.certs // 10, args.certs):
+        app, workdir = make_app()
+        try:
+            with app.app_context():
+                from app.ca.certificate import issue_certificate
+                seed(n, issue_certificate('bench-template')[0])
+                for fmt in ('pem', 'zip', 'pkcs7'):
+                    rows.append((n, fmt, *measure(fmt)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nCertificate export — SQLite, status=active\n")
+    for n, fmt, elapsed, size, peak in rows:
+        print(f"  {n:>8,} certs  {fmt:<6} {n / elapsed:10,.0f} certs/s  "
+              f"{size / 2 ** 20:8.1f} MB out  {peak / 2 ** 20:6.2f} MB peak")
+
+
+if __name__ == '__main__':
+    main()
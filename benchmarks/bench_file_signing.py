@@ -0,0 +1,107 @@
+"""
+File signing benchmark: whole-file read vs streaming (chunks / mmap) vs
+process-pool batch. Each single-file variant runs in a fresh process so
+its peak RSS is measured on its own.
+
+    python benchmarks/bench_file_signing.py                  # 1 GB artifact
+    python benchmarks/bench_file_signing.py --size-mb 4096 --batch-files 32
+
+No app or database is needed — only a throwaway RSA key in the workdir.
+The mmap variant's peak RSS includes the mapped file pages; they are clean
+page-cache pages the kernel can drop, not heap the process holds on to.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import common  # noqa: F401 — puts the repo root on sys.path
+from app.crypto.key_manager import generate_and_save_keypair, load_private_key
+from app.crypto.signer import sign_data, sign_file, sign_files, write_detached_signature
+
+
+def _write_file(path, size_mb):
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def _run_variant(variant, path, key_path, out):
+    key   = load_private_key(key_path)
+    start = time.perf_counter()
+    if variant == 'read-all':
+        with open(path, 'rb') as f:
+            sign_data(f.read(), key)
+    elif variant == 'stream':
+        sign_file(path, key)
+    elif variant == 'mmap':
+        sign_file(path, key, use_mmap=True)
+    seconds = time.perf_counter() - start
+    out.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))  # KiB → MiB
+
+
+def measure(variant, path, key_path):
+    """(seconds, peak_rss_mb) for one variant in a clean spawned process."""
+    ctx = multiprocessing.get_context('spawn')
+    out = ctx.Queue()
+    proc = ctx.Process(target=_run_variant, args=(variant, path, key_path, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--batch-files', type=int, default=16)
+    parser.add_argument('--batch-size-mb', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='pki-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    generate_and_save_keypair('bench', workdir)
+    key_path = os.path.join(workdir, 'bench.key')
+
+    big = os.path.join(workdir, 'artifact.bin')
+    if not os.path.exists(big) or os.path.getsize(big) != args.size_mb * 1024 * 1024:
+        print(f"  writing {args.size_mb} MB test artifact...")
+        _write_file(big, args.size_mb)
+
+    print(f"\nFile signing benchmark — {args.size_mb} MB artifact ({workdir})\n")
+    width = 28
+    for variant in ('read-all', 'stream', 'mmap'):
+        seconds, peak = measure(variant, big, key_path)
+        print(f"  {variant:<{width}}  {seconds:8.2f} s  {args.size_mb / seconds:8.0f} MB/s"
+              f"  peak RSS {peak:8.0f} MB")
+
+    files = []
+    for i in range(args.batch_files):
+        path = os.path.join(workdir, f'batch_{i}.bin')
+        if not os.path.exists(path):
+            _write_file(path, args.batch_size_mb)
+        files.append(path)
+    total_mb = args.batch_files * args.batch_size_mb
+
+    key = load_private_key(key_path)
+    start = time.perf_counter()
+    for path in files:
+        write_detached_signature(path, key)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sign_files(files, key_path, workers=args.workers)
+    parallel = time.perf_counter() - start
+
+    label = f'batch {args.batch_files} x {args.batch_size_mb} MB'
+    print(f"  {label + ', one process':<{width}}  {serial:8.2f} s  {total_mb / serial:8.0f} MB/s")
+    print(f"  {label + f', {args.workers} procs':<{width}}  {parallel:8.2f} s  {total_mb / parallel:8.0f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+PKCS#12 download benchmark: cold builds vs cache hits per second, then a
+burst of concurrent downloads with distinct passphrases. It reports how
+many were built or rejected with 503, and the OCSP latency measured while
+the burst runs.
+
+    python benchmarks/bench_pkcs12.py --burst 64 --workers 1 --depth 16
+
+Uses the real PKCS12_KDF_ROUNDS (600k PBKDF2-SHA256 iterations) unless
+--rounds is given.
+"""
+import argparse
+import shutil
+import statistics
+import threading
+import time
+
+from common import make_app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--burst', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--depth', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=None)
+    parser.add_argument('--builds', type=int, default=5)
+    args = parser.parse_args()
+
+    overrides = {'PKCS12_WORKERS': args.workers, 'PKCS12_QUEUE_DEPTH': args.depth,
+                 'PKCS12_CACHE_SIZE': args.burst + args.builds + 1}
+    if args.rounds:
+        overrides['PKCS12_KDF_ROUNDS'] = args.rounds
+    app, workdir = make_app(**overrides)
+    from app import db
+    from app.ca.certificate import issue_certificate
+    from app.ca.pkcs12 import pkcs12_bundles, BundleQueueFull
+    from app.models.certificate_db import Certificate
+
+    try:
+        with app.app_context():
+            pem, serial, valid_from, valid_to = issue_certificate('bench-p12')
+            db.session.add(Certificate(serial_number=serial, owner_name='bench-p12', issued_by='bench',
+                                       valid_from=valid_from, valid_to=valid_to, cert_pem=pem))
+            db.session.commit()
+            cert = Certificate.query.filter_by(serial_number=serial).one()
+            db.session.expunge(cert)
+
+        pkcs12_bundles.bundle(cert, b'warm-up-pool')             # start the worker processes
+
+        start = time.perf_counter()
+        for i in range(args.builds):
+            pkcs12_bundles.bundle(cert, f'cold-{i}'.encode())
+        cold = args.builds / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            pkcs12_bundles.bundle(cert, b'cold-0')
+        cached = 1000 / (time.perf_counter() - start)
+
+        outcomes, lock, done = {'built': 0, 'rejected': 0}, threading.Lock(), threading.Event()
+
+        def download(i):
+            try:
+                pkcs12_bundles.bundle(cert, f'burst-{i}'.encode())
+                outcome = 'built'
+            except (BundleQueueFull, TimeoutError):
+                outcome = 'rejected'
+            with lock:
+                outcomes[outcome] += 1
+
+        ocsp_ms = []
+
+        def ocsp():
+            client = app.test_client()
+            while not done.is_set():
+                t = time.perf_counter()
+                client.get(f'/ocsp/{serial}')
+                ocsp_ms.append((time.perf_counter() - t) * 1000)
+
+        prober  = threading.Thread(target=ocsp)
+        burst   = [threading.Thread(target=download, args=(i,)) for i in range(args.burst)]
+        start   = time.perf_counter()
+        prober.start()
+        for t in burst:
+            t.start()
+        for t in burst:
+            t.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        prober.join()
+    finally:
+        pkcs12_bundles.queue.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nPKCS#12 downloads — {pkcs12_bundles.kdf_rounds:,} KDF rounds, "
+          f"{args.workers} worker(s), queue depth {args.depth}\n")
+    print(f"  cold build        {cold:10,.1f} bundles/s")
+    print(f"  cache hit         {cached:10,.0f} bundles/s")
+    print(f"  burst of {args.burst:<4}     {outcomes['built']} built, {outcomes['rejected']} rejected (503) "
+          f"in {elapsed:.2f} s")
+    if ocsp_ms:
+        ocsp_ms.sort()
+        print(f"  OCSP during burst p50 {statistics.median(ocsp_ms):.1f} ms, "
+              f"p95 {ocsp_ms[int(len(ocsp_ms) * 0.95) - 1]:.1f} ms ({len(ocsp_ms)} requests)")
+
+
+if __name__ == '__main__':
+    main()
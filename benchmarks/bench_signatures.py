@@ -0,0 +1,54 @@
+"""
+Signature microbenchmark: per-call sign_data / verify_signature loops vs
+sign_many / verify_many with one key.
+
+    python benchmarks/bench_signatures.py --items 5000
+    python benchmarks/bench_signatures.py --items 20000 --workers 8
+
+No app or database is needed.
+"""
+import argparse
+import os
+
+from common import timed
+from app.crypto.key_manager import generate_rsa_keypair
+from app.crypto.signer import sign_data, verify_signature, sign_many, verify_many
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    private_key, public_key = generate_rsa_keypair()
+    messages = [os.urandom(256) for _ in range(args.items)]
+    sigs     = sign_many(messages, private_key)
+    items    = list(zip(messages, sigs))
+    n        = args.items
+
+    print(f"\nSignature benchmark — {n:,} items, RSA-2048 PKCS#1 v1.5, "
+          f"{args.workers} worker(s)\n")
+
+    rows = []
+    t, _ = timed(lambda: [verify_signature(d, s, public_key) for d, s in items], repeat=3)
+    rows.append(('verify_signature loop', t))
+    t, _ = timed(lambda: verify_many(items, public_key, workers=1), repeat=3)
+    rows.append(('verify_many, 1 thread', t))
+    t, _ = timed(lambda: verify_many(items, public_key, workers=args.workers), repeat=3)
+    rows.append((f'verify_many, {args.workers} threads', t))
+
+    t, _ = timed(lambda: [sign_data(m, private_key) for m in messages], repeat=1)
+    rows.append(('sign_data loop', t))
+    t, _ = timed(lambda: sign_many(messages, private_key, workers=1), repeat=1)
+    rows.append(('sign_many, 1 thread', t))
+    t, _ = timed(lambda: sign_many(messages, private_key, workers=args.workers), repeat=1)
+    rows.append((f'sign_many, {args.workers} threads', t))
+
+    width = max(len(label) for label, _ in rows)
+    for label, seconds in rows:
+        print(f"  {label:<{width}}  {seconds * 1000:10.2f} ms  {n / seconds:10,.0f} ops/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+CA signing backend benchmark: signatures per second through the file
+backend and, when a token is configured, the PKCS#11 backend with pooled
+sessions and with a fresh session per signature.
+
+    python benchmarks/bench_signing_backends.py --signatures 500
+    PKCS11_MODULE=/usr/lib/softhsm/libsofthsm2.so PKCS11_PIN=1234 \\
+        python benchmarks/bench_signing_backends.py --threads 4
+
+With PKCS11_MODULE set, the CA keys generated in the temp directory are
+imported onto the token (PKCS11_TOKEN_LABEL) under throwaway labels first.
+"""
+import argparse
+import datetime
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from common import make_app
+
+
+def rate(fn, n, threads=1):
+    """Calls of fn() per second, n calls spread over `threads` threads."""
+    per_thread = [n // threads + (i < n % threads) for i in range(threads)]
+
+    def run(count):
+        for _ in range(count):
+            fn()
+    workers = [threading.Thread(target=run, args=(c,)) for c in per_thread]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return n / (time.perf_counter() - start)
+
+
+def crl_builder(int_cert):
+    from cryptography import x509
+    now = datetime.datetime.utcnow()
+    return (x509.CertificateRevocationListBuilder()
+            .issuer_name(int_cert.subject)
+            .last_update(now)
+            .next_update(now + datetime.timedelta(days=7)))
+
+
+def bench_backend(label, backend, args, rows):
+    int_cert = backend.certificate('intermediate')
+    builder  = crl_builder(int_cert)
+    payload  = os.urandom(256)
+    backend.sign(payload)                       # warm up: key load / session open
+    rows.append((f'{label}: raw signature', rate(lambda: backend.sign(payload), args.signatures)))
+    if args.threads > 1:
+        rows.append((f'{label}: raw signature, {args.threads} threads',
+                     rate(lambda: backend.sign(payload), args.signatures, args.threads)))
+    rows.append((f'{label}: empty CRL', rate(lambda: backend.sign_crl(builder), args.signatures // 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--signatures', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    app, workdir = make_app()
+    from app.ca.root_ca import load_ca_material
+    from app.ca.signing import FileSigningBackend, ca_paths, make_backend
+
+    rows = []
+    try:
+        with app.app_context():
+            bench_backend('file', FileSigningBackend(), args, rows)
+
+            if os.environ.get('PKCS11_MODULE'):
+                suffix = uuid.uuid4().hex[:8]
+                cfg = {**app.config, 'SIGNING_BACKEND': 'pkcs11',
+                       'PKCS11_MODULE':      os.environ['PKCS11_MODULE'],
+                       'PKCS11_PIN':         os.environ.get('PKCS11_PIN'),
+                       'PKCS11_TOKEN_LABEL': os.environ.get('PKCS11_TOKEN_LABEL', 'pki-advanced'),
+                       'PKCS11_ROOT_KEY_LABEL':         f'bench-root-{suffix}',
+                       'PKCS11_INTERMEDIATE_KEY_LABEL': f'bench-int-{suffix}',
+                       'PKCS11_POOL_SIZE':   max(1, args.threads)}
+                token = make_backend(cfg)
+                token.import_key('intermediate', load_ca_material(*ca_paths('intermediate'))[0])
+                bench_backend('pkcs11 pooled', token, args, rows)
+
+                payload = os.urandom(256)
+
+                def unpooled():
+                    session = token._open_session()
+                    try:
+                        key = session.get_key(object_class=token._pkcs11.ObjectClass.PRIVATE_KEY,
+                                              label=token.key_labels['intermediate'])
+                        key.sign(payload, mechanism=token._pkcs11.Mechanism.SHA256_RSA_PKCS)
+                    finally:
+                        session.close()
+                rows.append(('pkcs11 session per signature', rate(unpooled, args.signatures)))
+                print(f"  pool: {token.pool.stats()}")
+                token.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nCA signing backends — intermediate CA key, "
+          f"{'PKCS#11 ' + os.environ['PKCS11_MODULE'] if os.environ.get('PKCS11_MODULE') else 'no PKCS11_MODULE set'}\n")
+    width = max(len(label) for label, _ in rows)
+    for label, per_second in rows:
+        print(f"  {label:<{width}}  {per_second:10,.0f} signatures/s")
+
+
+if __name__ == '__main__':
+    main()
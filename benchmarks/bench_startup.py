@@ -0,0 +1,81 @@
+"""
+Startup benchmark: create_app() time for cold boots (empty database and CA
+storage) and warm boots (both already in place), with FAST_START off and on.
+Every boot runs in a fresh interpreter, as a new gunicorn worker would.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --boots 10 --preload
+
+"process" includes interpreter start-up and imports; "create_app" is the
+factory call alone.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _child(workdir, fast_start, preload):
+    from common import make_app
+    import app  # noqa: F401 — keep framework imports out of the create_app figure
+    start = time.perf_counter()
+    make_app(workdir, FAST_START=fast_start, CA_PRELOAD=preload)
+    print(json.dumps({'create_app': time.perf_counter() - start}))
+
+
+def boot(workdir, fast_start, preload):
+    """(process_seconds, create_app_seconds) for one boot in a new interpreter."""
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', workdir,
+           '--fast-start', str(int(fast_start))] + (['--preload'] if preload else [])
+    start = time.perf_counter()
+    out   = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - start
+    return total, json.loads(out.strip().splitlines()[-1])['create_app']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--boots', type=int, default=5)
+    parser.add_argument('--preload', action='store_true', help='set CA_PRELOAD for every boot')
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--fast-start', type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, bool(args.fast_start), args.preload)
+        return
+
+    print(f"\nStartup benchmark — median of {args.boots} boots, "
+          f"CA_PRELOAD={'1' if args.preload else '0'}\n")
+
+    rows = []
+    for fast_start in (False, True):
+        cold, warm = [], []
+        for _ in range(args.boots):
+            workdir = tempfile.mkdtemp(prefix='pki-bench-')
+            try:
+                cold.append(boot(workdir, fast_start, args.preload))
+                warm.append(boot(workdir, fast_start, args.preload))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        label = f"FAST_START={int(fast_start)}"
+        rows.append((f"{label}, cold", cold))
+        rows.append((f"{label}, warm", warm))
+
+    width = max(len(label) for label, _ in rows)
+    for label, samples in rows:
+        process = statistics.median(s[0] for s in samples)
+        factory = statistics.median(s[1] for s in samples)
+        print(f"  {label:<{width}}  process {process * 1000:8.1f} ms  create_app {factory * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, HERE)
+    main()
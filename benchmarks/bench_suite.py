@@ -0,0 +1,287 @@
+"""
+Benchmark suite: issuance, CRL, OCSP, certificate listing and audit writes
+against SQLite in a temp directory with a freshly generated CA.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --quick --output ci.json
+    python benchmarks/bench_suite.py --output new.json --compare baseline.json
+    python benchmarks/bench_suite.py --only ocsp,crl --certs 20000
+
+Scenarios:
+    issue     issue_certificate() per second (keygen + key write + sign)
+    ocsp      check_status_by_serial() latency over the seeded certificates, and
+              build_ocsp_response(), which adds the response signature
+    listing   GET /certificates latency with --certs rows in the table
+    audit     log_action() throughput, inline writes and through the async sink
+    crl       generate_crl() at 1k / 10k / 100k revocations (capped at --certs)
+
+Results go to --output as JSON: one entry per metric with its unit and
+whether higher or lower is better. --compare loads an earlier file, prints
+the change per metric and exits 1 if any metric regressed by more than
+--threshold (default 0.20 = 20%).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import make_app, percentile, timed
+
+SCENARIOS = ('issue', 'ocsp', 'listing', 'audit', 'crl')
+CRL_TIERS = (1_000, 10_000, 100_000)
+SERIAL_BASE = 10 ** 15
+
+
+# ─── Seeding ─────────────────────────────────────────────
+def seed_certificates(db, count, cert_pem, batch=10_000):
+    """Insert `count` ACTIVE certificate rows with serials SERIAL_BASE + i."""
+    from app.models.certificate_db import Certificate
+
+    now   = datetime.utcnow()
+    table = Certificate.__table__
+    with db.engine.begin() as conn:
+        for offset in range(0, count, batch):
+            conn.execute(table.insert(), [
+                {
+                    'serial_number': str(SERIAL_BASE + i),
+                    'owner_name':    f'bench-user-{i}',
+                    'email':         f'user{i}@bench.local',
+                    'organization':  f'Org {i % 50}',
+                    'issued_by':     'PKI-Advanced Intermediate CA',
+                    'issued_at':     now - timedelta(seconds=count - i),
+                    'valid_from':    now - timedelta(days=1),
+                    'valid_to':      now + timedelta(days=365),
+                    'status':        'ACTIVE',
+                    'cert_pem':      cert_pem,
+                }
+                for i in range(offset, min(offset + batch, count))
+            ])
+
+
+def revoke_seeded(db, upto):
+    """Mark seeded serials SERIAL_BASE .. SERIAL_BASE+upto-1 revoked (key compromise)."""
+    from app.models.certificate_db import Certificate
+    db.session.query(Certificate).filter(
+        Certificate.status == 'ACTIVE',
+        Certificate.owner_name.like('bench-user-%'),
+        Certificate.serial_number.in_([str(SERIAL_BASE + i) for i in range(upto)]),
+    ).update({
+        Certificate.status:            'REVOKED',
+        Certificate.revoked_at:        datetime.utcnow(),
+        Certificate.revocation_reason: 1,
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+# ─── Scenarios ───────────────────────────────────────────
+def bench_issue(ctx, results):
+    from app.ca.certificate import issue_certificate
+    n = ctx.args.issue
+    issue_certificate('bench-warmup')            # first call loads the CA key
+    start = time.perf_counter()
+    for i in range(n):
+        issue_certificate(f'bench-issue-{i}', f'issue{i}@bench.local', 'Bench Org')
+    seconds = time.perf_counter() - start
+    results['issue.per_second']  = (n / seconds, 'ops/s', 'higher')
+    results['issue.mean_ms']     = (seconds / n * 1000, 'ms', 'lower')
+
+
+def bench_ocsp(ctx, results):
+    from app.revocation.ocsp import build_ocsp_response, check_status_by_serial
+    rnd     = random.Random(7)
+    serials = [str(SERIAL_BASE + rnd.randrange(ctx.args.certs)) for _ in range(ctx.args.ocsp)]
+    serials += [str(SERIAL_BASE * 10 + i) for i in range(ctx.args.ocsp // 10)]   # unknown serials
+    samples = []
+    for serial in serials:
+        start = time.perf_counter()
+        check_status_by_serial(serial)
+        samples.append((time.perf_counter() - start) * 1000)
+    results['ocsp.p50_ms'] = (percentile(samples, 50), 'ms', 'lower')
+    results['ocsp.p95_ms'] = (percentile(samples, 95), 'ms', 'lower')
+    results['ocsp.p99_ms'] = (percentile(samples, 99), 'ms', 'lower')
+    results['ocsp.per_second'] = (len(samples) / (sum(samples) / 1000), 'ops/s', 'higher')
+
+    # What /ocsp/<serial> pays: the lookup plus one Intermediate CA signature
+    signed = []
+    for serial in serials[:ctx.args.ocsp // 4]:
+        start = time.perf_counter()
+        build_ocsp_response(serial)
+        signed.append((time.perf_counter() - start) * 1000)
+    results['ocsp.signed_p50_ms'] = (percentile(signed, 50), 'ms', 'lower')
+    results['ocsp.signed_p99_ms'] = (percentile(signed, 99), 'ms', 'lower')
+
+
+def bench_listing(ctx, results):
+    client = ctx.app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'Admin@12345'})
+    t, resp = timed(lambda: client.get('/certificates'), repeat=ctx.args.repeat)
+    assert resp.status_code == 200, resp.status_code
+    results[f'listing.{ctx.args.certs}.ms'] = (t * 1000, 'ms', 'lower')
+    t, _ = timed(lambda: client.get('/certificates?filter=revoked'), repeat=ctx.args.repeat)
+    results[f'listing.{ctx.args.certs}.revoked_filter_ms'] = (t * 1000, 'ms', 'lower')
+
+
+def bench_audit(ctx, results):
+    from app.audit.logger import log_action
+    from app.audit.sink import audit_sink
+    n = ctx.args.audit
+
+    start = time.perf_counter()
+    for i in range(n // 10):
+        log_action('BENCH_SYNC', detail=f'event {i}', sync=True)
+    results['audit.sync.per_second'] = ((n // 10) / (time.perf_counter() - start), 'events/s', 'higher')
+
+    start = time.perf_counter()
+    for i in range(n):
+        log_action('BENCH_ASYNC', detail=f'event {i}')
+    audit_sink.flush(timeout=120)
+    results['audit.async.per_second'] = (n / (time.perf_counter() - start), 'events/s', 'higher')
+
+
+def bench_crl(ctx, results):
+    from app.revocation.crl_manager import generate_crl
+    for tier in [t for t in CRL_TIERS if t <= ctx.args.certs]:
+        revoke_seeded(ctx.db, tier)
+        t, pem = timed(generate_crl, repeat=ctx.args.repeat)
+        results[f'crl.{tier}.seconds'] = (t, 's', 'lower')
+        results[f'crl.{tier}.bytes']   = (len(pem), 'bytes', 'lower')
+
+
+BENCHES = {'issue': bench_issue, 'ocsp': bench_ocsp, 'listing': bench_listing,
+           'audit': bench_audit, 'crl': bench_crl}
+
+
+# ─── Report / compare ───────────────────────────────────
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def to_json(results, args, seconds):
+    return {
+        'meta': {
+            'timestamp':  datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'revision':   _git_revision(),
+            'python':     platform.python_version(),
+            'platform':   platform.platform(),
+            'cpu_count':  os.cpu_count(),
+            'sqlite':     sqlite3.sqlite_version,
+            'duration_s': round(seconds, 1),
+            'args':       {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': {
+            name: {'value': round(value, 4), 'unit': unit, 'better': better}
+            for name, (value, unit, better) in results.items()
+        },
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print per-metric change vs baseline. Returns the names that regressed."""
+    regressed = []
+    rows = []
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or not base['value']:
+            rows.append((name, None, cur['value'], None, 'new'))
+            continue
+        change = (cur['value'] - base['value']) / base['value']
+        worse  = -change if cur['better'] == 'higher' else change
+        verdict = 'REGRESSION' if worse > threshold else ('improved' if worse < -threshold else 'ok')
+        if verdict == 'REGRESSION':
+            regressed.append(name)
+        rows.append((name, base['value'], cur['value'], change, verdict))
+
+    width = max(len(r[0]) for r in rows)
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp')}), threshold {threshold:.0%}\n")
+    for name, base, cur, change, verdict in rows:
+        base_s   = f"{base:12.3f}" if base is not None else ' ' * 12
+        change_s = f"{change:+8.1%}" if change is not None else ' ' * 8
+        print(f"  {name:<{width}}  {base_s} → {cur:12.3f}  {change_s}  {verdict}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', default=','.join(SCENARIOS), help='comma-separated scenarios')
+    parser.add_argument('--certs', type=int, default=100_000, help='seeded certificates (listing, OCSP, CRL)')
+    parser.add_argument('--issue', type=int, default=50, help='certificates issued')
+    parser.add_argument('--ocsp', type=int, default=2_000, help='OCSP lookups')
+    parser.add_argument('--audit', type=int, default=20_000, help='async audit events (sync runs a tenth)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help='small sizes for CI smoke runs')
+    parser.add_argument('--output', default=None, help='write results JSON here')
+    parser.add_argument('--compare', default=None, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.20)
+    parser.add_argument('--workdir', default=None, help='keep the DB and CA here instead of a temp dir')
+    args = parser.parse_args()
+    if args.quick:
+        args.certs, args.issue, args.ocsp, args.audit, args.repeat = 10_000, 10, 500, 2_000, 1
+
+    chosen = [s.strip() for s in args.only.split(',') if s.strip()]
+    unknown = set(chosen) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    app, workdir = make_app(args.workdir, AUDIT_BACKPRESSURE='block', SERVER_TIMING_HEADER=False,
+                            REQUEST_SLOW_MS=-1, RENEWAL_INTERVAL=0)
+    from app import db
+
+    class Ctx:
+        pass
+    ctx = Ctx()
+    ctx.app, ctx.db, ctx.args = app, db, args
+
+    print(f"\nBenchmark suite — {args.certs:,} certificates, SQLite ({workdir})\n")
+    results = {}
+    try:
+        with app.app_context():
+            if any(s in chosen for s in ('ocsp', 'listing', 'crl')):
+                from app.ca.certificate import issue_certificate
+                pem = issue_certificate('bench-template')[0]
+                seed_certificates(db, args.certs, pem)
+
+            for name in SCENARIOS:
+                if name not in chosen:
+                    continue
+                t0 = time.perf_counter()
+                BENCHES[name](ctx, results)
+                print(f"  {name:<8} done in {time.perf_counter() - t0:6.1f} s")
+    finally:
+        from app.audit.sink import audit_sink
+        audit_sink.stop()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = to_json(results, args, time.perf_counter() - started)
+    print()
+    width = max(len(n) for n in report['results'])
+    for name, r in report['results'].items():
+        print(f"  {name:<{width}}  {r['value']:14.3f} {r['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n  results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
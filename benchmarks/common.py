@@ -0,0 +1,54 @@
+"""
+Shared setup for the benchmark scripts: the real app against SQLite in a
+temp directory, so nothing here needs MySQL or touches ./storage.
+"""
+import os
+import sys
+import statistics
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def make_app(workdir=None, **overrides):
+    """Create the app with its DB and CA storage under workdir. Returns (app, workdir)."""
+    workdir = workdir or tempfile.mkdtemp(prefix='pki-bench-')
+    storage = os.path.join(workdir, 'storage')
+    Config.STORAGE_DIR      = storage
+    Config.ROOT_CA_DIR      = os.path.join(storage, 'root_ca')
+    Config.INTERMEDIATE_DIR = os.path.join(storage, 'intermediate_ca')
+    Config.ISSUED_DIR       = os.path.join(storage, 'issued')
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    Config.DATABASE_REPLICA_URLS   = []
+    overrides.setdefault('LOG_LEVEL', 'ERROR')   # keep app logs out of the report on stdout
+    for key, value in overrides.items():
+        setattr(Config, key, value)
+
+    from app import create_app
+    return create_app(), workdir
+
+
+def timed(fn, repeat=5):
+    """Run fn() `repeat` times; return (median_seconds, last_result)."""
+    samples, result = [], None
+    for _ in range(repeat):
+        start  = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile (0-100) of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(rows):
+    """Print (label, seconds, note) rows as an aligned table."""
+    width = max(len(r[0]) for r in rows)
+    for label, seconds, note in rows:
+        print(f"  {label:<{width}}  {seconds * 1000:10.2f} ms  {note}")
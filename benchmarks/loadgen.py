@@ -0,0 +1,352 @@
+"""
+Load generator: concurrent virtual users driving the real app with a
+weighted mix of operations. Reports p50/p95/p99 latency, throughput and
+error rate per endpoint.
+
+    python benchmarks/loadgen.py                                  # in-process test clients
+    python benchmarks/loadgen.py --mode server --users 16 --duration 60
+    python benchmarks/loadgen.py --url http://127.0.0.1:5000 --admin-password '...'
+    python benchmarks/loadgen.py --mix ocsp=1 --users 32 --output ocsp.json
+
+Modes:
+    inproc   one Flask test client per virtual user, no sockets
+    server   a threaded werkzeug server on 127.0.0.1, users talk HTTP to it
+    --url    an already running local deployment (users are registered
+             through /auth/register; OCSP serials will mostly be UNKNOWN)
+
+inproc and server build the app on SQLite in a temp dir, seed --certs
+certificates for OCSP, and count the certificates issued during the run.
+Operations, and the response each one counts as success:
+
+    login    logout, then POST /auth/login           302
+    submit   POST /request (one pending per user)    302
+    approve  GET /requests/review + POST approve      302   (admin session)
+    verify   POST /verify by owner name               200
+    ocsp     GET /ocsp/<serial>                       200
+    crl      GET /crl/download                        200
+
+Everything runs offline. --output writes the report as JSON.
+"""
+import argparse
+import http.cookiejar
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+from common import make_app, percentile
+
+DEFAULT_MIX = 'ocsp=10,verify=3,submit=2,approve=2,crl=1,login=1'
+EXPECTED    = {'login': 302, 'submit': 302, 'review': 200, 'approve': 302,
+               'verify': 200, 'ocsp': 200, 'crl': 200}
+PASSWORD    = 'LoadTest@12345'
+APPROVE_RE  = re.compile(rb'/requests/approve/(\d+)')
+
+
+# ─── Transports ──────────────────────────────────────────
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        resp = self.client.open(path, method=method, data=data)
+        return resp.status_code, resp.get_data()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener   = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req  = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# ─── Results ─────────────────────────────────────────────
+class Recorder:
+    """Latencies and failures per endpoint, shared by all virtual users."""
+
+    def __init__(self):
+        self._lock      = threading.Lock()
+        self.latencies  = {}
+        self.errors     = {}
+        self.error_kinds = {}
+
+    def record(self, name, seconds, ok, kind=None):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+                key = (name, kind)
+                self.error_kinds[key] = self.error_kinds.get(key, 0) + 1
+
+    def summary(self, elapsed):
+        out = {}
+        for name, samples in sorted(self.latencies.items()):
+            ms = sorted(s * 1000 for s in samples)
+            errors = self.errors.get(name, 0)
+            out[name] = {
+                'requests':   len(ms),
+                'errors':     errors,
+                'error_rate': round(errors / len(ms), 4),
+                'rps':        round(len(ms) / elapsed, 2),
+                'mean_ms':    round(statistics.fmean(ms), 2),
+                'p50_ms':     round(percentile(ms, 50), 2),
+                'p95_ms':     round(percentile(ms, 95), 2),
+                'p99_ms':     round(percentile(ms, 99), 2),
+                'max_ms':     round(ms[-1], 2),
+            }
+        return out
+
+
+# ─── Virtual user ────────────────────────────────────────
+class VirtualUser:
+
+    def __init__(self, index, make_transport, shared, recorder, rnd):
+        self.index    = index
+        self.username = f'lg-user-{index}'
+        self.user     = make_transport()
+        self.admin    = make_transport()
+        self.shared   = shared
+        self.recorder = recorder
+        self.rnd      = rnd
+        self.counter  = itertools.count()
+        self.owners   = []
+
+    def call(self, name, transport, method, path, data=None):
+        start = time.perf_counter()
+        try:
+            status, body = transport.request(method, path, data)
+            ok, kind = status == EXPECTED[name], f'HTTP {status}'
+        except Exception as e:
+            status, body, ok, kind = None, b'', False, type(e).__name__
+        self.recorder.record(name, time.perf_counter() - start, ok, None if ok else kind)
+        return status, body
+
+    def setup(self, register):
+        if register:
+            self.user.request('POST', '/auth/register', {
+                'username': self.username, 'email': f'{self.username}@loadtest.local',
+                'password': PASSWORD, 'confirm_password': PASSWORD,
+            })
+        self.user.request('POST', '/auth/login', {'username': self.username, 'password': PASSWORD})
+        self.admin.request('POST', '/auth/login', {'username': 'admin', 'password': self.shared['admin_password']})
+
+    # ─── Operations ──────────────────────────────────────
+    def op_login(self):
+        self.user.request('GET', '/auth/logout')
+        self.call('login', self.user, 'POST', '/auth/login',
+                  {'username': self.username, 'password': PASSWORD})
+
+    def op_submit(self):
+        owner = f'{self.username}-{next(self.counter)}'
+        self.call('submit', self.user, 'POST', '/request',
+                  {'owner_name': owner, 'email': f'{owner}@loadtest.local',
+                   'organization': 'Load Test', 'purpose': 'load test'})
+        self.owners.append(owner)
+
+    def op_approve(self):
+        status, body = self.call('review', self.admin, 'GET', '/requests/review')
+        claimed = self.shared['claimed']
+        with self.shared['lock']:
+            ids = [int(i) for i in APPROVE_RE.findall(body) if int(i) not in claimed]
+            if not ids:
+                return
+            req_id = ids[0]
+            claimed.add(req_id)
+        self.call('approve', self.admin, 'POST', f'/requests/approve/{req_id}')
+
+    def op_verify(self):
+        owner = self.rnd.choice(self.owners) if self.owners else f'{self.username}-none'
+        self.call('verify', self.user, 'POST', '/verify', {'owner_name': owner})
+
+    def op_ocsp(self):
+        serial = self.shared['serial_base'] + self.rnd.randrange(max(1, self.shared['certs']))
+        self.call('ocsp', self.user, 'GET', f'/ocsp/{serial}')
+
+    def op_crl(self):
+        self.call('crl', self.user, 'GET', '/crl/download')
+
+    def run(self, ops, weights, deadline, think):
+        while time.monotonic() < deadline:
+            getattr(self, f'op_{self.rnd.choices(ops, weights)[0]}')()
+            if think:
+                time.sleep(think)
+
+
+# ─── Driver ──────────────────────────────────────────────
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if not hasattr(VirtualUser, f'op_{name}'):
+            raise SystemExit(f'unknown operation in --mix: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def local_app(args):
+    """Build the app on SQLite in a temp dir with users and --certs seeded certificates."""
+    from bench_suite import seed_certificates, SERIAL_BASE
+
+    app, workdir = make_app(args.workdir, SERVER_TIMING_HEADER=False, REQUEST_SLOW_MS=-1)
+    from app import db
+    from app.auth.models import User, Role
+    from app.ca.certificate import issue_certificate
+
+    with app.app_context():
+        role = Role.query.filter_by(name='user').first()
+        for i in range(args.users):
+            user = User(username=f'lg-user-{i}', email=f'lg-user-{i}@loadtest.local',
+                        role=role, is_active=True)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+        if args.certs:
+            seed_certificates(db, args.certs, issue_certificate('lg-template')[0])
+    return app, workdir, SERIAL_BASE
+
+
+def count_certificates(app):
+    from app.models.certificate_db import Certificate
+    with app.app_context():
+        return Certificate.query.count()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=('inproc', 'server'), default='inproc')
+    parser.add_argument('--url', default=None, help='drive a running local deployment instead')
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='op=weight,...')
+    parser.add_argument('--think-ms', type=float, default=0, help='pause between a user\'s operations')
+    parser.add_argument('--certs', type=int, default=10_000, help='seeded certificates for OCSP (local modes)')
+    parser.add_argument('--admin-password', default='Admin@12345')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='write the JSON report here')
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    mix    = parse_mix(args.mix)
+    shared = {'lock': threading.Lock(), 'claimed': set(), 'admin_password': args.admin_password,
+              'certs': args.certs, 'serial_base': 10 ** 15}
+    app = server = workdir = None
+    before = 0
+
+    if args.url:
+        target = args.url
+        make_transport = lambda: HttpTransport(args.url)
+    else:
+        app, workdir, shared['serial_base'] = local_app(args)
+        before = count_certificates(app)
+        if args.mode == 'server':
+            import logging
+            from werkzeug.serving import make_server
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)   # no access log per request
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, name='loadgen-server', daemon=True).start()
+            target = f'http://127.0.0.1:{server.server_port}'
+            make_transport = lambda: HttpTransport(target)
+        else:
+            target = 'in-process test clients'
+            make_transport = lambda: TestClientTransport(app)
+
+    recorder = Recorder()
+    users = [VirtualUser(i, make_transport, shared, recorder, random.Random(args.seed + i))
+             for i in range(args.users)]
+    for vu in users:
+        vu.setup(register=bool(args.url))
+    recorder.__init__()                             # setup logins are not part of the run
+
+    print(f"\nLoad test — {args.users} virtual users, {args.duration:.0f} s, mix {args.mix}\n"
+          f"  target: {target}\n")
+    ops, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + args.duration
+    started  = time.perf_counter()
+    threads  = [threading.Thread(target=vu.run, args=(ops, weights, deadline, args.think_ms / 1000),
+                                 name=f'vu-{vu.index}') for vu in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = recorder.summary(elapsed)
+    total     = sum(e['requests'] for e in endpoints.values())
+    errors    = sum(e['errors'] for e in endpoints.values())
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'target':    target,
+            'mode':      'url' if args.url else args.mode,
+            'users':     args.users,
+            'duration':  round(elapsed, 2),
+            'mix':       mix,
+            'cpu_count': os.cpu_count(),
+        },
+        'totals': {
+            'requests':   total,
+            'errors':     errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'rps':        round(total / elapsed, 2),
+        },
+        'endpoints': endpoints,
+        'errors_by_kind': {f'{name}: {kind}': n for (name, kind), n in recorder.error_kinds.items()},
+    }
+
+    if app is not None:
+        from app.audit.sink import audit_sink
+        from app.requests.jobs import issuance_workers
+        time.sleep(0.5)                             # let queued issuance jobs land
+        issuance_workers.stop()
+        report['totals']['certificates_issued'] = count_certificates(app) - before
+        report['totals']['issued_per_second']   = round(report['totals']['certificates_issued'] / elapsed, 2)
+        audit_sink.stop()
+    if server is not None:
+        server.shutdown()
+    if workdir and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    width = max([len(n) for n in endpoints] + [8])
+    print(f"  {'endpoint':<{width}}  {'reqs':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for name, e in endpoints.items():
+        print(f"  {name:<{width}}  {e['requests']:>7} {e['rps']:>8.1f} {e['error_rate'] * 100:>6.2f} "
+              f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f} {e['max_ms']:>8.1f}")
+    t = report['totals']
+    print(f"\n  total {t['requests']} requests, {t['rps']:.1f} req/s, error rate {t['error_rate'] * 100:.2f}%")
+    if 'certificates_issued' in t:
+        print(f"  certificates issued during the run: {t['certificates_issued']} ({t['issued_per_second']:.2f}/s)")
+    for kind, n in report['errors_by_kind'].items():
+        print(f"  error  {kind} × {n}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n  report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -14,12 +15,85 @@ class Config:
     MYSQL_HOST     = os.environ.get('MYSQL_HOST', 'localhost')
     MYSQL_DB       = os.environ.get('MYSQL_DB', 'pki_advanced')
 
-    SQLALCHEMY_DATABASE_URI = (
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or (
         f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}"
         f"@{MYSQL_HOST}/{MYSQL_DB}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # ─── Connection Pool ─────────────────────────────────
+    DB_POOL_SIZE      = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW   = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT   = int(os.environ.get('DB_POOL_TIMEOUT', 10))     # seconds to wait for a connection
+    DB_POOL_RECYCLE   = int(os.environ.get('DB_POOL_RECYCLE', 1800))   # below MySQL wait_timeout
+    DB_POOL_PRE_PING  = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    DB_SQLITE_BUSY_TIMEOUT = float(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 30))  # seconds a SQLite writer waits for the lock
+
+    # ─── Read Replicas ───────────────────────────────────
+    # Comma-separated URIs. Empty → every query goes to the primary.
+    DATABASE_REPLICA_URLS = [
+        u.strip() for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip()
+    ]
+    # After a write, keep this browser session on the primary for N seconds
+    DB_STICKY_SECONDS = int(os.environ.get('DB_STICKY_SECONDS', 5))
+
+    # ─── Auth Cache ───────────────────────────────────────
+    AUTH_CACHE_SIZE   = int(os.environ.get('AUTH_CACHE_SIZE', 4096))  # users
+    AUTH_CACHE_TTL    = int(os.environ.get('AUTH_CACHE_TTL', 30))     # seconds
+    AUTH_QUERY_HEADER = DEBUG                                        # X-Auth-Queries response header
+
+    # ─── API Tokens ───────────────────────────────────────
+    API_TOKEN_KEY = os.environ.get('API_TOKEN_KEY')   # HMAC key for stored token hashes; defaults to SECRET_KEY
+
+    # ─── Audit Log Writer ─────────────────────────────────
+    AUDIT_ASYNC          = os.environ.get('AUDIT_ASYNC', '1') == '1'   # 0 → write every event inline
+    AUDIT_QUEUE_SIZE     = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BATCH_SIZE     = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 0.5))  # seconds
+    AUDIT_BACKPRESSURE   = os.environ.get('AUDIT_BACKPRESSURE', 'block')      # block / drop / sync
+    AUDIT_BLOCK_TIMEOUT  = float(os.environ.get('AUDIT_BLOCK_TIMEOUT', 1.0))   # seconds
+    AUDIT_ACTIONS_CACHE_SECONDS = 300   # distinct action list on /audit
+    AUDIT_ROLLOVER_BATCH_SIZE   = int(os.environ.get('AUDIT_ROLLOVER_BATCH_SIZE', 5000))
+    AUDIT_RETENTION_MONTHS      = int(os.environ.get('AUDIT_RETENTION_MONTHS', 24))  # monthly tables kept
+    AUDIT_COMPRESS_AFTER_MONTHS = int(os.environ.get('AUDIT_COMPRESS_AFTER_MONTHS', 3))  # MySQL only
+
+    # ─── Issuance Jobs ────────────────────────────────────
+    ISSUANCE_ASYNC         = os.environ.get('ISSUANCE_ASYNC', '1') == '1'   # 0 → issue inside the approve request
+    ISSUANCE_WORKERS       = int(os.environ.get('ISSUANCE_WORKERS', 2))     # threads per process
+    ISSUANCE_MAX_ATTEMPTS  = int(os.environ.get('ISSUANCE_MAX_ATTEMPTS', 3))
+    ISSUANCE_RETRY_DELAY   = 5      # seconds, doubled on every retry
+    ISSUANCE_POLL_INTERVAL = 2.0    # seconds between checks for due retries
+    ISSUANCE_JOB_TIMEOUT   = 300    # seconds before a RUNNING job is taken over
+
+    # ─── Auto-Approval ────────────────────────────────────
+    # JSON list of rules — see app/requests/policy.py. Empty → every request waits for a CA admin.
+    AUTO_APPROVE_POLICIES = json.loads(os.environ.get('AUTO_APPROVE_POLICIES', '[]'))
+
+    # ─── Startup ──────────────────────────────────────────
+    # Skip create_all/upgrade/seeding when the stored schema fingerprint matches
+    FAST_START = os.environ.get('FAST_START', '1') == '1'
+    # Decrypt the CA keys during create_app() — set with gunicorn --preload so
+    # workers inherit them; otherwise each process loads them on first use
+    CA_PRELOAD = os.environ.get('CA_PRELOAD', '0') == '1'
+
+    # ─── Metrics ──────────────────────────────────────────
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'   # /metrics, Prometheus text format
+    METRICS_TOKEN   = os.environ.get('METRICS_TOKEN')                # if set, scrapers send "Bearer <token>"
+
+    # ─── Logging ──────────────────────────────────────────
+    LOG_FORMAT     = os.environ.get('LOG_FORMAT', 'json')          # json → one object per line, text → readable
+    LOG_LEVEL      = os.environ.get('LOG_LEVEL', 'INFO')           # level for the app package
+    LOG_LEVELS     = os.environ.get('LOG_LEVELS', '')              # per-module overrides: "app.crypto=DEBUG,werkzeug=ERROR"
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records waiting for the writer; full → dropped
+    LOG_RATE_LIMIT = float(os.environ.get('LOG_RATE_LIMIT', 20))   # records/s per logger + message; 0 → unlimited
+    LOG_RATE_BURST = int(os.environ.get('LOG_RATE_BURST', 100))    # ERROR and above are never limited
+
+    # ─── Request Timing & Profiling ───────────────────────
+    SERVER_TIMING_HEADER = DEBUG                                         # db/crypto/render/app split per response
+    REQUEST_SLOW_MS      = int(os.environ.get('REQUEST_SLOW_MS', 1000))  # log slower requests; 0 → all, -1 → none
+    PROFILER_INTERVAL    = float(os.environ.get('PROFILER_INTERVAL', 0.005))  # seconds between stack samples
+    PROFILER_MAX_REQUESTS = 500                                          # cap on "profile the next N requests"
+
     # ─── Storage Paths ───────────────────────────────────
     BASE_DIR          = os.path.dirname(os.path.abspath(__file__))
     STORAGE_DIR       = os.path.join(BASE_DIR, 'storage')
@@ -27,6 +101,11 @@ class Config:
     INTERMEDIATE_DIR  = os.path.join(STORAGE_DIR, 'intermediate_ca')
     ISSUED_DIR        = os.path.join(STORAGE_DIR, 'issued')
 
+    # ─── Issued Key Store ─────────────────────────────────
+    KEY_STORE_FSYNC         = os.environ.get('KEY_STORE_FSYNC', 'group')   # group → shared fsync rounds, always → per write, off → none
+    KEY_STORE_FSYNC_WINDOW  = float(os.environ.get('KEY_STORE_FSYNC_WINDOW', 0))  # seconds a round waits for more writers
+    KEY_STORE_GC_BATCH_SIZE = 1000   # archived serials per page when collecting keys
+
     # ─── CA Settings ─────────────────────────────────────
     CA_KEY_PASSWORD   = os.environ.get('CA_KEY_PASSWORD', 'ca-secret-pass').encode()
     CA_COUNTRY        = "IN"
@@ -37,7 +116,47 @@ class Config:
     ROOT_CA_CN        = "PKI-Advanced Root CA"
     INTERMEDIATE_CN   = "PKI-Advanced Intermediate CA"
 
+    # ─── Signing Backend ──────────────────────────────────
+    SIGNING_BACKEND     = os.environ.get('SIGNING_BACKEND', 'file')   # file → encrypted PEM keys, pkcs11 → HSM/SoftHSM
+    PKCS11_MODULE       = os.environ.get('PKCS11_MODULE')             # e.g. /usr/lib/softhsm/libsofthsm2.so
+    PKCS11_TOKEN_LABEL  = os.environ.get('PKCS11_TOKEN_LABEL', 'pki-advanced')
+    PKCS11_PIN          = os.environ.get('PKCS11_PIN')
+    PKCS11_ROOT_KEY_LABEL         = os.environ.get('PKCS11_ROOT_KEY_LABEL', 'root-ca')
+    PKCS11_INTERMEDIATE_KEY_LABEL = os.environ.get('PKCS11_INTERMEDIATE_KEY_LABEL', 'intermediate-ca')
+    PKCS11_POOL_SIZE    = int(os.environ.get('PKCS11_POOL_SIZE', 4))  # logged-in sessions kept per process
+    PKCS11_POOL_TIMEOUT = 5.0                                         # seconds to wait for a free session
+
     # ─── Certificate Settings ─────────────────────────────
     CERT_VALIDITY_DAYS         = 365
     ROOT_CA_VALIDITY_DAYS      = 3650   # 10 years
-    INTERMEDIATE_VALIDITY_DAYS = 1825   # 5 years
\ No newline at end of file
+    INTERMEDIATE_VALIDITY_DAYS = 1825   # 5 years
+
+    # ─── Chain Validation ─────────────────────────────────
+    CHAIN_VERIFY_WORKERS   = int(os.environ.get('CHAIN_VERIFY_WORKERS', os.cpu_count() or 2))
+    CHAIN_VERIFY_MAX_BATCH = 1000   # certificates per /verify/chain request
+
+    # ─── Automatic Renewal ────────────────────────────────
+    RENEWAL_WINDOW_DAYS = int(os.environ.get('RENEWAL_WINDOW_DAYS', 30))   # renew certs expiring within N days
+    RENEWAL_BATCH_SIZE  = int(os.environ.get('RENEWAL_BATCH_SIZE', 50))    # certs per transaction / CRL publish
+    RENEWAL_RATE        = float(os.environ.get('RENEWAL_RATE', 5))          # certs signed per second, 0 → unlimited
+    RENEWAL_INTERVAL    = int(os.environ.get('RENEWAL_INTERVAL', 0))        # seconds between in-app runs, 0 → cron only
+
+    # ─── Bulk Revocation ──────────────────────────────────
+    BULK_REVOKE_BATCH_SIZE = int(os.environ.get('BULK_REVOKE_BATCH_SIZE', 200))   # certs per transaction
+
+    # ─── Certificate Export ───────────────────────────────
+    EXPORT_YIELD_PER   = int(os.environ.get('EXPORT_YIELD_PER', 1000))  # rows fetched per server-side cursor round trip
+    EXPORT_CHUNK_BYTES = 64 * 1024                                      # bytes per chunk of the streamed response
+
+    # ─── PKCS#12 Downloads ────────────────────────────────
+    PKCS12_KDF_ROUNDS    = int(os.environ.get('PKCS12_KDF_ROUNDS', 600000))  # PBKDF2-SHA256 iterations
+    PKCS12_WORKERS       = int(os.environ.get('PKCS12_WORKERS', 1))        # build processes; 0 → build in the request
+    PKCS12_QUEUE_DEPTH   = int(os.environ.get('PKCS12_QUEUE_DEPTH', 16))   # builds allowed to wait; more → 503
+    PKCS12_WAIT_TIMEOUT  = 30.0                                            # seconds a request waits for its build
+    PKCS12_CACHE_SIZE    = int(os.environ.get('PKCS12_CACHE_SIZE', 256))   # built bundles kept per process
+    PKCS12_MIN_PASSPHRASE = 8
+
+    # ─── Archival ─────────────────────────────────────────
+    ARCHIVE_RETENTION_DAYS = int(os.environ.get('ARCHIVE_RETENTION_DAYS', 90))  # days after expiry
+    ARCHIVE_BATCH_SIZE     = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_BATCH_PAUSE    = 0.05   # seconds between batches
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Build the real app against SQLite + a temp storage dir.
+    Usage:
+        app = make_app()
+        app = make_app(DATABASE_REPLICA_URLS=['sqlite:///...'])
+    """
+    from app import create_app, db
+
+    storage = tmp_path / 'storage'
+    monkeypatch.setattr(Config, 'STORAGE_DIR',      str(storage))
+    monkeypatch.setattr(Config, 'ROOT_CA_DIR',      str(storage / 'root_ca'))
+    monkeypatch.setattr(Config, 'INTERMEDIATE_DIR', str(storage / 'intermediate_ca'))
+    monkeypatch.setattr(Config, 'ISSUED_DIR',       str(storage / 'issued'))
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(Config, 'DATABASE_REPLICA_URLS', [])
+
+    apps = []
+
+    def _make(**overrides):
+        for key, value in overrides.items():
+            monkeypatch.setattr(Config, key, value, raising=False)
+        app = create_app()
+        app.config['TESTING'] = True
+        apps.append(app)
+        return app
+
+    yield _make
+
+    from app.audit.sink import audit_sink
+    from app.requests.jobs import issuance_workers
+    from app.ca.renewal import renewal_scheduler
+    from app.ca.pkcs12 import pkcs12_bundles
+    issuance_workers.stop()
+    pkcs12_bundles.queue.stop()
+    renewal_scheduler.stop()
+    audit_sink.stop()
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username='admin', password='Admin@12345'):
+    return client.post('/auth/login', data={'username': username, 'password': password})
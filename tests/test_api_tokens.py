@@ -0,0 +1,51 @@
+def test_bearer_token_auth_scopes_and_revocation(app, monkeypatch):
+    from app.auth.models import User, ApiToken
+    from app.auth.tokens import create_api_token, revoke_api_token
+    from app.audit.models import AuditLog
+    from app.audit.sink import audit_sink
+
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        token, plaintext = create_api_token(admin, 'provisioning', scopes='requests')
+        token_id = token.id
+
+    # No bcrypt on the token path
+    monkeypatch.setattr(User, 'check_password', lambda *a: (_ for _ in ()).throw(AssertionError))
+
+    client  = app.test_client()
+    headers = {'Authorization': f'Bearer {plaintext}'}
+
+    ok = client.get('/requests/review', headers=headers)
+    assert ok.status_code == 200
+    assert 'session=' not in ok.headers.get('Set-Cookie', '')
+    assert client.get('/audit', headers=headers).status_code == 403          # outside scope
+    assert client.get('/requests/review',
+                      headers={'Authorization': plaintext[:-1] + 'x'}).status_code == 302
+    assert client.get('/requests/review',
+                      headers={'Authorization': f'Bearer {plaintext[:-1]}x'}).status_code == 401
+
+    audit_sink.flush()
+    with app.app_context():
+        assert AuditLog.query.filter_by(action='API_TOKEN_USED').count() == 2
+        revoke_api_token(ApiToken.query.filter_by(id=token_id).one())
+    assert client.get('/requests/review', headers=headers).status_code == 401
+
+
+def test_token_scope_enforced_before_every_view(app):
+    from app.auth.models import User
+    from app.auth.tokens import create_api_token
+
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        _, scoped = create_api_token(admin, 'crl-fetcher', scopes='crl_ocsp')
+        _, wildcard = create_api_token(admin, 'everything', scopes='*')
+
+    client = app.test_client()
+    for plaintext in (scoped, wildcard):
+        resp = client.post('/auth/profile', data={'action': 'update_email', 'email': 'mallory@example.com'},
+                           headers={'Authorization': f'Bearer {plaintext}'})
+        assert resp.status_code == 403 and resp.is_json
+    assert client.get('/auth/profile',
+                      headers={'Authorization': f'Bearer {scoped}'}).status_code == 403   # outside scope
+    with app.app_context():
+        assert User.query.filter_by(username='admin').first().email != 'mallory@example.com'
@@ -0,0 +1,85 @@
+import pytest
+from conftest import login
+
+POLICIES = [
+    {'name': 'corp', 'roles': ['ca_admin'], 'email_domains': ['@PKI-Advanced.local'],
+     'owner_names': ['web*'], 'max_per_user': 1},
+]
+
+
+def test_compile_rejects_unknown_keys():
+    from app.requests.policy import compile_policy
+    with pytest.raises(ValueError):
+        compile_policy({'name': 'typo', 'role': ['user']})
+    with pytest.raises(ValueError):
+        compile_policy({'name': 'orgs', 'organizations': ['Example Corp']})   # free text, not trusted
+    assert compile_policy({'name': 'any'}).roles is None
+    assert compile_policy({'name': 'any'}).email_domains is None            # no rule, not an empty one
+
+
+def test_submit_auto_approves_matching_request_within_quota(make_app):
+    from app.requests.models import CertificateRequest
+    from app.requests.policy import approval_policy
+
+    app = make_app(AUTO_APPROVE_POLICIES=POLICIES, ISSUANCE_ASYNC=False)
+    client = app.test_client()
+    login(client)
+
+    form = {'owner_name': 'web01', 'email': 'Admin@pki-advanced.local', 'organization': 'example corp'}
+    client.post('/request', data=form)
+    client.post('/request', data=form)                                   # over quota → manual
+    client.post('/request', data={**form, 'owner_name': 'x', 'organization': 'Other'})
+
+    with app.app_context():
+        statuses = [r.status for r in CertificateRequest.query.order_by(CertificateRequest.id)]
+    assert statuses == ['APPROVED', 'PENDING']      # third is refused: one PENDING per user
+
+    stats = approval_policy.stats()
+    assert (stats['auto_approved'], stats['manual']) == (1, 1)
+    assert stats['by_policy'] == {'corp': 1}
+    assert stats['eval_max'] > 0
+
+
+def test_typed_email_cannot_borrow_a_trusted_domain(make_app):
+    from app import db
+    from app.auth.models import User, Role
+    from app.requests.models import CertificateRequest
+
+    app = make_app(AUTO_APPROVE_POLICIES=[{'name': 'corp', 'email_domains': ['pki-advanced.local']}],
+                   ISSUANCE_ASYNC=False)
+    with app.app_context():
+        mallory = User(username='mallory', email='mallory@evil.test',
+                       role=Role.query.filter_by(name='user').first(), is_active=True)
+        mallory.set_password('Mallory@12345')
+        db.session.add(mallory)
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, 'mallory', 'Mallory@12345')
+    client.post('/request', data={'owner_name': 'web02', 'email': 'ops@pki-advanced.local'})
+
+    admin = app.test_client()
+    login(admin)
+    admin.post('/request', data={'owner_name': 'web03', 'email': 'ops@pki-advanced.local'})
+
+    with app.app_context():
+        assert [r.status for r in CertificateRequest.query.order_by(CertificateRequest.id)] == \
+            ['PENDING', 'PENDING']          # neither typed email is the account's own
+
+
+def test_owner_name_must_match_the_account_or_the_rule(make_app):
+    from app import db
+    from app.auth.models import User
+    from app.requests.models import CertificateRequest
+    from app.requests.policy import approval_policy
+
+    app = make_app(AUTO_APPROVE_POLICIES=[{'name': 'self', 'roles': ['ca_admin']}], ISSUANCE_ASYNC=False)
+    client = app.test_client()
+    login(client)
+    client.post('/request', data={'owner_name': 'alice', 'organization': 'Example Corp'})
+
+    with app.app_context():
+        req = CertificateRequest.query.one()
+        assert req.status == 'PENDING'                           # someone else's name
+        req.owner_name = 'Admin'
+        assert approval_policy.evaluate(db.session.get(User, req.user_id), req) == 'self'
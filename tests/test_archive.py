@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+
+def test_archive_moves_long_expired_and_lookup_falls_back(app):
+    from app import db
+    from app.models.certificate_db import Certificate, ArchivedCertificate, find_certificate
+    from app.models.archive import archive_expired_certificates
+    from app.revocation.ocsp import check_status_by_serial
+
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(5):
+            db.session.add(Certificate(
+                serial_number=f'90{i}', owner_name=f'old-{i}', issued_by='test',
+                valid_from=now - timedelta(days=800), valid_to=now - timedelta(days=400),
+                cert_pem='-----BEGIN CERTIFICATE-----', status='ACTIVE'
+            ))
+        db.session.add(Certificate(
+            serial_number='999', owner_name='live', issued_by='test',
+            valid_from=now, valid_to=now + timedelta(days=30), cert_pem='-', status='ACTIVE'
+        ))
+        db.session.commit()
+
+        moved = archive_expired_certificates(retention_days=90, batch_size=2, pause=0)
+
+        assert moved == 5
+        assert Certificate.query.count() == 1
+        assert ArchivedCertificate.query.count() == 5
+        assert find_certificate('903').cert_pem == '-----BEGIN CERTIFICATE-----'
+        assert check_status_by_serial('903')['status'] == 'EXPIRED'
+        assert check_status_by_serial('999')['status'] == 'GOOD'
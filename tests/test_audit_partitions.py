@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta
+
+from conftest import login
+
+
+def test_rollover_retention_and_streaming_export(app, client):
+    from app import db
+    from app.audit.models import AuditLog
+    from app.audit.sink import audit_sink
+    from app.audit.partitions import rollover_audit_log, apply_retention, list_partitions
+
+    now = datetime.utcnow()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), [
+                {'action': 'OLD_EVENT', 'timestamp': now - timedelta(days=40 * i), 'status': 'SUCCESS'}
+                for i in range(1, 6)
+            ])
+        moved = rollover_audit_log(batch_size=2)
+        assert moved == 5
+        assert AuditLog.query.filter_by(action='OLD_EVENT').count() == 0
+        assert len(list_partitions()) >= 4
+
+    login(client)
+    audit_sink.flush()
+    body = client.get('/audit/export?format=ndjson&action=OLD_EVENT').data.decode()
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert len(rows) == 5
+    assert rows == sorted(rows, key=lambda r: r['timestamp'])
+
+    csv_body = client.get('/audit/export?format=csv&action=OLD_EVENT').data.decode()
+    assert len(csv_body.strip().splitlines()) == 6      # header + 5 rows
+
+    with app.app_context():
+        dropped = apply_retention(keep_months=3)
+        assert dropped
+        remaining = {name for _, name in list_partitions()}
+        assert not remaining & set(dropped)
+
+
+def test_search_reads_rolled_over_partitions(app, client):
+    from app import db
+    from app.audit.models import AuditLog
+    from app.audit.partitions import rollover_audit_log
+    from app.audit.query import search_audit_logs, make_cursor
+
+    now = datetime.utcnow()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), [
+                {'action': 'ARCHIVED_EVENT', 'username': 'erin', 'certificate_serial': f'90{i}',
+                 'timestamp': now - timedelta(days=40 * i), 'status': 'SUCCESS'}
+                for i in range(1, 4)
+            ])
+        assert rollover_audit_log() == 3
+        rows = search_audit_logs(username='erin')
+        assert [r.certificate_serial for r in rows] == ['901', '902', '903']   # newest first
+        assert search_audit_logs(certificate_serial='902')[0].action == 'ARCHIVED_EVENT'
+        window = search_audit_logs(action='ARCHIVED_EVENT', since=now - timedelta(days=100),
+                                   until=now - timedelta(days=60))
+        assert [r.certificate_serial for r in window] == ['902']
+
+        page1 = search_audit_logs(username='erin', limit=2)
+        page2 = search_audit_logs(username='erin', limit=2, before=make_cursor(page1[-1]))
+        assert [r.certificate_serial for r in page2] == ['903']
+
+    login(client)
+    page = client.get('/audit?action=ARCHIVED_EVENT')
+    assert page.status_code == 200 and page.data.count(b'ARCHIVED_EVENT') >= 3
+
+
+def test_rollover_never_lets_live_ids_collide(app):
+    from app import db
+    from app.audit.models import AuditLog
+    from app.audit.partitions import rollover_audit_log
+    from app.audit.query import distinct_actions, clear_actions_cache
+
+    with app.app_context():
+        db.session.query(AuditLog).delete()
+        db.session.commit()
+        old = AuditLog(action='ONLY_LAST_YEAR', timestamp=datetime.utcnow() - timedelta(days=400))
+        db.session.add(old)
+        db.session.commit()
+        old_id = old.id
+        assert rollover_audit_log() == 1                 # the newest row left the live table
+
+        new = AuditLog(action='TODAY')
+        db.session.add(new)
+        db.session.commit()
+        assert new.id > old_id
+
+        clear_actions_cache()
+        assert {'ONLY_LAST_YEAR', 'TODAY'} <= set(distinct_actions())
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from conftest import login
+
+
+def test_exact_filters_time_range_and_cursor(app, client):
+    from app.audit.logger import log_action
+    from app.audit.sink import audit_sink
+    from app.audit.query import search_audit_logs, distinct_actions, make_cursor, clear_actions_cache
+
+    clear_actions_cache()
+    with app.test_request_context('/'):
+        for i in range(5):
+            log_action('CERT_RENEWED', certificate_serial=f'77{i}')
+        log_action('CERT_RENEWED_BULK')
+        log_action('LOGIN_FAILED', status='FAILED')
+    audit_sink.flush()
+
+    with app.app_context():
+        renewed = search_audit_logs(action='CERT_RENEWED')
+        assert len(renewed) == 5                       # exact match, not LIKE
+        assert search_audit_logs(certificate_serial='772')[0].action == 'CERT_RENEWED'
+        assert [l.action for l in search_audit_logs(status='FAILED')] == ['LOGIN_FAILED']
+        assert search_audit_logs(since=datetime.utcnow() + timedelta(hours=1)) == []
+
+        page1 = search_audit_logs(action='CERT_RENEWED', limit=3)
+        page2 = search_audit_logs(action='CERT_RENEWED', limit=3, before=make_cursor(page1[-1]))
+        assert len(page2) == 2
+        assert not {l.id for l in page1} & {l.id for l in page2}
+
+        assert 'CERT_RENEWED_BULK' in distinct_actions()
+
+    login(client)
+    audit_sink.flush()
+    page = client.get('/audit?action=LOGIN_FAILED&status=FAILED')
+    assert page.status_code == 200
+    assert b'LOGIN_FAILED' in page.data
+    assert client.get('/audit?before=not-a-cursor').status_code == 400
+    assert client.get('/audit?before=2026-01-01T00:00:00_abc').status_code == 400
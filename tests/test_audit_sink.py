@@ -0,0 +1,35 @@
+def test_events_are_batched_and_flushed_on_stop(app):
+    from app.audit.models import AuditLog
+    from app.audit.sink import audit_sink
+    from app.audit.logger import log_action
+
+    with app.test_request_context('/'):
+        for i in range(50):
+            log_action('TEST_EVENT', detail=f'event {i}')
+    audit_sink.stop()
+
+    with app.app_context():
+        assert AuditLog.query.filter_by(action='TEST_EVENT').count() == 50
+    stats = audit_sink.stats()
+    assert stats['written'] == 50 and stats['dropped'] == 0
+    assert stats['batches'] < 50
+
+
+def test_sync_mode_writes_immediately(app):
+    from app.audit.models import AuditLog
+    from app.audit.logger import log_action
+
+    with app.test_request_context('/'):
+        log_action('SYNC_EVENT', sync=True)
+    with app.app_context():
+        assert AuditLog.query.filter_by(action='SYNC_EVENT').count() == 1
+
+
+def test_drop_policy_counts_dropped_events(make_app):
+    from app.audit.sink import audit_sink
+    app = make_app(AUDIT_QUEUE_SIZE=1, AUDIT_BACKPRESSURE='drop', AUDIT_FLUSH_INTERVAL=5.0)
+
+    with app.test_request_context('/'):
+        results = [audit_sink.submit({'action': 'X'}) for _ in range(200)]
+    assert False in results
+    assert audit_sink.stats()['dropped'] == results.count(False)
@@ -0,0 +1,50 @@
+from conftest import login
+
+
+def test_one_auth_query_per_request_and_invalidation(app, client):
+    from app import db
+    from app.auth.models import User, Role
+    from app.auth.cache import user_cache
+
+    login(client)
+    first  = client.get('/requests/review')      # role_required + templates use role_name
+    second = client.get('/requests/review')
+    assert first.status_code == 200
+    assert int(first.headers['X-Auth-Queries']) <= 1
+    assert int(second.headers['X-Auth-Queries']) == 1
+
+    with app.app_context():
+        bob = User(username='bob', email='bob@example.com',
+                   role=Role.query.filter_by(name='user').first())
+        bob.set_password('password123')
+        db.session.add(bob)
+        db.session.commit()
+        bob_id = bob.id
+
+    bob_client = app.test_client()
+    login(bob_client, 'bob', 'password123')
+    assert bob_client.get('/requests/review').status_code == 302      # not a CA admin
+
+    client.post(f'/admin/users/role/{bob_id}', data={'role': 'ca_admin'})
+    assert user_cache.get(bob_id) is None                             # invalidated
+    assert bob_client.get('/requests/review').status_code == 200
+
+    client.post(f'/admin/users/toggle/{bob_id}')
+    assert bob_client.get('/requests/review').status_code == 302      # deactivated → logged out
+
+
+def test_cached_user_deactivated_outside_the_app_is_logged_out(app, client):
+    from app import db
+    from app.auth.models import User
+    from app.auth.cache import user_cache
+
+    login(client)
+    assert client.get('/requests/review').status_code == 200
+    with app.app_context():
+        admin_id = User.query.filter_by(username='admin').first().id
+        db.session.execute(db.update(User).where(User.id == admin_id).values(is_active=False))
+        db.session.commit()
+    assert user_cache.get(admin_id) is not None                       # cache still says active
+    assert client.get('/requests/review').status_code == 302
+    info = user_cache.get(admin_id)
+    assert info is None or not info.is_active
@@ -0,0 +1,37 @@
+from conftest import login
+
+
+def test_bulk_revoke_batches_audits_each_cert_and_publishes_one_crl(make_app, monkeypatch):
+    from app.models.certificate_db import Certificate, RevokedCertificate
+    from app.audit.models import AuditLog
+    from app.audit.sink import audit_sink
+    from app.revocation import bulk
+
+    app = make_app(BULK_REVOKE_BATCH_SIZE=2)
+    client = app.test_client()
+    login(client)
+    for i in range(5):
+        client.post('/issue', data={'owner_name': f'host{i}', 'organization': 'Acme'})
+    client.post('/issue', data={'owner_name': 'other', 'organization': 'Globex'})
+
+    published = []
+    real_generate_crl = bulk.generate_crl
+    monkeypatch.setattr(bulk, 'generate_crl', lambda: published.append(1) or real_generate_crl())
+
+    assert client.post('/revoke/bulk', json={'reason': 'Key Compromise'}).status_code == 400
+
+    result = client.post('/revoke/bulk', json={
+        'organization': 'Acme', 'owners': ['host0', 'host1', 'host2', 'host3'],
+        'reason': 'Key Compromise',
+    }).get_json()
+    assert (result['revoked'], result['batches'], result['crl_published']) == (4, 2, True)
+    assert published == [1]
+
+    audit_sink.flush()
+    with app.app_context():
+        assert Certificate.query.filter_by(status='REVOKED').count() == 4
+        assert {c.owner_name for c in Certificate.query.filter_by(status='ACTIVE')} == {'host4', 'other'}
+        assert {c.revocation_reason for c in Certificate.query.filter_by(status='REVOKED')} == {1}
+        assert RevokedCertificate.query.count() == 4
+        assert AuditLog.query.filter_by(action='CERT_REVOKED').count() == 4
+        assert AuditLog.query.filter_by(action='CERT_BULK_REVOKED').count() == 1
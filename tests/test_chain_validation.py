@@ -0,0 +1,56 @@
+import datetime
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from conftest import login
+
+
+def _self_signed_pem():
+    key  = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'Rogue CA')])
+    now  = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    return cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def test_verify_chain_batch_checks_path_purpose_and_revocation(app, monkeypatch):
+    from app.models.certificate_db import Certificate
+    from app.ca import chain
+    from app.ca.root_ca import load_root_ca
+    from config import Config
+
+    monkeypatch.setattr(Config, 'CHAIN_VERIFY_WORKERS', 4)
+    client = app.test_client()
+    login(client)
+    client.post('/issue', data={'owner_name': 'good'})
+    client.post('/issue', data={'owner_name': 'gone'})
+    client.post('/revoke', data={'owner_name': 'gone', 'reason': 'Key Compromise'})
+
+    with app.app_context():
+        pems = {c.owner_name: c.cert_pem for c in Certificate.query}
+        root_pem = load_root_ca()[1].public_bytes(serialization.Encoding.PEM).decode()
+
+    # Trust anchors come from the .crt files only — never the encrypted keys
+    from app.ca.root_ca import clear_ca_cache
+    monkeypatch.setattr('app.ca.root_ca.load_private_key',
+                        lambda *a: (_ for _ in ()).throw(AssertionError('key loaded')))
+    clear_ca_cache()
+    chain.trust_anchors.invalidate()
+
+    body = client.post('/verify/chain', json={
+        'certificates': [pems['good'], pems['gone'], _self_signed_pem(), root_pem],
+    }).get_json()
+    assert [r['status'] for r in body['results']] == ['VALID', 'REVOKED', 'UNTRUSTED', 'VALID']
+    assert body['results'][0]['chain'] == ['good', Config.INTERMEDIATE_CN, Config.ROOT_CA_CN]
+    assert body['verified'] == 4 and body['per_second'] > 0
+
+    wrong = client.post('/verify/chain?purpose=server_auth', data=pems['good']).get_json()
+    assert wrong['results'][0]['status'] == 'WRONG_PURPOSE'
+    assert client.post('/verify/chain', data=b'not a cert').status_code == 400
+    for body in ({'certificates': [123]}, [{}], {'certificates': [{}]}, {'certificates': 'pem'},
+                 {'certificates': [_self_signed_pem()], 'purpose': ['client_auth']}):
+        assert client.post('/verify/chain', json=body).status_code == 400, body
@@ -6,18 +6,18 @@ from app.crypto.key_manager import generate_and_save_keypair, load_private_key,
 from app.crypto.signer import sign_data, verify_signature
 from config import Config
 
-def test_key_generation():
+def test_key_generation(tmp_path):
     print("\n--- Testing Key Generation ---")
     priv, pub = generate_and_save_keypair(
         name="test_key",
-        directory="storage/test",
+        directory=str(tmp_path),
         password=Config.CA_KEY_PASSWORD
     )
     print("  [OK] Keys generated")
 
     # Reload from file and verify they work
-    loaded_priv = load_private_key("storage/test/test_key.key", Config.CA_KEY_PASSWORD)
-    loaded_pub  = load_public_key("storage/test/test_key.pub")
+    loaded_priv = load_private_key(str(tmp_path / "test_key.key"), Config.CA_KEY_PASSWORD)
+    loaded_pub  = load_public_key(str(tmp_path / "test_key.pub"))
     print("  [OK] Keys loaded from file")
 
     # Sign and verify
@@ -36,4 +36,5 @@ def test_key_generation():
     print("\n ALL CRYPTO TESTS PASSED!")
 
 if __name__ == '__main__':
-    test_key_generation()
\ No newline at end of file
+    import pathlib, tempfile
+    test_key_generation(pathlib.Path(tempfile.mkdtemp()))
\ No newline at end of file
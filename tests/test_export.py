@@ -0,0 +1,96 @@
+import io
+import warnings
+import zipfile
+from datetime import datetime, timedelta
+
+from cryptography import x509
+from cryptography.hazmat.primitives.serialization import pkcs7
+
+from conftest import login
+
+
+def _seed(app):
+    from app import db
+    from app.ca.certificate import issue_certificate
+    from app.models.certificate_db import Certificate
+
+    now = datetime.utcnow()
+    serials = {}
+    with app.app_context():
+        for owner, org, status, valid_to in (
+            ('alice', 'Acme',    'ACTIVE',  now + timedelta(days=30)),
+            ('bob',   'Acme',    'REVOKED', now + timedelta(days=30)),
+            ('carol', 'Initech', 'ACTIVE',  now + timedelta(days=30)),
+            ('dave',  'Acme',    'ACTIVE',  now - timedelta(days=1)),
+        ):
+            pem, serial, valid_from, _ = issue_certificate(owner, organization=org)
+            db.session.add(Certificate(serial_number=serial, owner_name=owner, organization=org,
+                                       issued_by='test', valid_from=valid_from, valid_to=valid_to,
+                                       cert_pem=pem, status=status))
+            serials[owner] = serial
+        db.session.commit()
+    return serials
+
+
+def test_export_formats_and_filters(app, client):
+    serials = _seed(app)
+    login(client)
+
+    resp = client.get('/certificates/export?format=pem&status=active&org=Acme')
+    assert resp.status_code == 200 and resp.is_streamed
+    certs = x509.load_pem_x509_certificates(resp.data)
+    assert [str(c.serial_number) for c in certs] == [serials['alice']]
+
+    resp = client.get('/certificates/export?format=zip&status=all')
+    names = zipfile.ZipFile(io.BytesIO(resp.data)).namelist()
+    assert sorted(names) == sorted(f'{s}.pem' for s in serials.values())
+
+    resp = client.get('/certificates/export?format=pkcs7&status=active')
+    assert resp.mimetype == 'application/x-pkcs7-certificates'
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')             # indefinite-length BER outer framing
+        certs = pkcs7.load_der_pkcs7_certificates(resp.data)
+    subjects = [c.subject.rfc4514_string() for c in certs]
+    assert 'Root CA' in subjects[0] and 'Intermediate CA' in subjects[1]   # chain first
+    assert sorted(str(c.serial_number) for c in certs[2:]) == sorted([serials['alice'], serials['carol']])
+
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+    assert client.get(f'/certificates/export?status=all&since={tomorrow}').data == b''
+    assert client.get('/certificates/export?format=der').status_code == 400
+
+
+def test_malformed_dates_are_rejected_not_ignored(app, client):
+    """A typo in since/until must not silently export everything."""
+    login(client)
+    for url in ('/certificates/export?status=all&until=2024-13-01',
+                '/certificates/export?since=yesterday',
+                '/audit/export?since=2024-02-30',
+                '/audit?until=01/02/2024'):
+        resp = client.get(url)
+        assert resp.status_code == 400, url
+        assert b'YYYY-MM-DD' in resp.data
+    assert client.get('/audit/export?since=2024-02-29').status_code == 200
+
+
+def test_export_streams_in_chunks(app):
+    from app.ca.export import export_certificates, iter_certificates
+
+    _seed(app)
+    with app.app_context():
+        chunks = list(export_certificates('pem', iter_certificates('all', chunk_size=1), chunk_bytes=1024))
+    assert len(chunks) >= 4 and all(len(c) >= 1024 for c in chunks[:-1])
+    assert len(x509.load_pem_x509_certificates(b''.join(chunks))) == 4
+
+
+def test_cli_and_http_until_both_include_the_day(app, tmp_path):
+    _seed(app)
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+
+    client = app.test_client()
+    login(client)
+    http = x509.load_pem_x509_certificates(client.get(f'/certificates/export?status=all&until={today}').data)
+
+    out = tmp_path / 'certs.pem'
+    result = app.test_cli_runner().invoke(args=['export-certs', '--status', 'all', '--until', today, '-o', str(out)])
+    assert result.exit_code == 0, result.output
+    assert len(x509.load_pem_x509_certificates(out.read_bytes())) == len(http) == 4
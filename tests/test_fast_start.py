@@ -0,0 +1,43 @@
+def test_warm_boot_skips_schema_and_seed_work(make_app, monkeypatch):
+    import app as app_module
+    from app.auth.models import User
+
+    first = make_app()
+    with first.app_context():
+        assert User.query.filter_by(username='admin').count() == 1
+
+    calls = []
+    for name in ('_upgrade_schema', '_seed_roles', '_seed_admin'):
+        monkeypatch.setattr(app_module, name, lambda name=name: calls.append(name))
+
+    second = make_app()
+    assert calls == []
+    with second.app_context():
+        assert User.query.filter_by(username='admin').count() == 1
+
+    # A model change (here: a forced fingerprint mismatch) runs the full path once
+    monkeypatch.setattr('app.models.schema.schema_fingerprint', lambda: 'changed')
+    make_app()
+    assert calls == ['_upgrade_schema', '_seed_roles', '_seed_admin']
+
+
+def test_ca_keys_are_decrypted_once_on_first_use(make_app, monkeypatch):
+    from app.ca import root_ca
+    from app.ca.intermediate_ca import load_intermediate_ca
+
+    make_app()                      # cold boot generates the hierarchy
+    root_ca.clear_ca_cache()
+
+    loads = []
+    real = root_ca.load_private_key
+    monkeypatch.setattr(root_ca, 'load_private_key', lambda *a: loads.append(a[0]) or real(*a))
+
+    make_app()                      # warm boot decrypts nothing
+    assert loads == []
+
+    first = load_intermediate_ca()
+    assert load_intermediate_ca()[0] is first[0]
+    assert len(loads) == 1
+
+    make_app(CA_PRELOAD=True)       # preload pulls in the root key as well
+    assert len(loads) == 2
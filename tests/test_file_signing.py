@@ -0,0 +1,63 @@
+from app.crypto.key_manager import generate_and_save_keypair
+from app.crypto.signer import (
+    sign_data, sign_file, verify_file, hash_file, write_detached_signature,
+    verify_detached_signature, sign_files, verify_files,
+)
+
+
+def test_streaming_signature_matches_whole_file_signature(tmp_path):
+    priv, pub = generate_and_save_keypair('signer', str(tmp_path))
+    artifact = tmp_path / 'artifact.bin'
+    artifact.write_bytes(b'\x00\x01payload' * 300_000)          # spans several chunks
+
+    assert hash_file(str(artifact), chunk_size=4096) == hash_file(str(artifact), use_mmap=True)
+    sig = sign_file(str(artifact), priv)
+    assert sig == sign_data(artifact.read_bytes(), priv)         # PKCS#1 v1.5 is deterministic
+    assert verify_file(str(artifact), sig, pub, use_mmap=True)
+
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    assert verify_file(str(empty), sign_file(str(empty), priv, use_mmap=True), pub)
+
+    sig_path = write_detached_signature(str(artifact), priv)
+    assert sig_path.endswith('artifact.bin.sig')
+    assert verify_detached_signature(str(artifact), pub)
+    artifact.write_bytes(b'tampered')
+    assert not verify_detached_signature(str(artifact), pub)
+    assert not verify_detached_signature(str(empty), pub)        # no .sig file
+
+
+def test_batch_sign_and_verify_across_processes(tmp_path):
+    generate_and_save_keypair('batch', str(tmp_path), password=b'pw')
+    files = []
+    for i in range(6):
+        path = tmp_path / f'f{i}.txt'
+        path.write_bytes(f'file {i}'.encode() * 1000)
+        files.append(str(path))
+
+    sigs = sign_files(files, str(tmp_path / 'batch.key'), password=b'pw', workers=2)
+    assert sigs == [f + '.sig' for f in files]
+
+    (tmp_path / 'f3.txt').write_bytes(b'changed')
+    assert verify_files(files, str(tmp_path / 'batch.pub'), workers=2) == [True, True, True, False, True, True]
+
+
+def test_verify_many_returns_bitmap_and_matches_single_calls(tmp_path):
+    from app.crypto.signer import sign_many, verify_many, verify_signature
+
+    priv, pub = generate_and_save_keypair('many', str(tmp_path))
+    messages = [f'message {i}'.encode() for i in range(100)]
+    sigs = sign_many(messages, priv, workers=4)
+    assert sigs[7] == sign_data(messages[7], priv)
+
+    items = list(zip(messages, sigs))
+    items[3]  = (b'tampered', sigs[3])
+    items[64] = (messages[64], 'not base64!')
+    result = verify_many(items, pub, workers=4)
+
+    assert len(result) == 100 and result.count() == 98
+    assert result.failed() == [3, 64]
+    assert list(result) == [verify_signature(d, s, pub) for d, s in items]
+    assert len(result.bits) == 13
+    assert verify_many([(m, s) for m, s in zip(messages, sign_many(messages, priv, raw=True))],
+                       pub, raw=True, workers=1).all()
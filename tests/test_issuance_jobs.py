@@ -0,0 +1,134 @@
+import time
+from conftest import login
+
+
+def _pending_request(owner='Alice'):
+    from app import db
+    from app.requests.models import CertificateRequest
+    req = CertificateRequest(user_id=1, owner_name=owner, status='PENDING')
+    db.session.add(req)
+    db.session.commit()
+    return req.id
+
+
+def test_approval_queues_job_and_worker_issues_once(make_app):
+    from app import db
+    from app.models.certificate_db import Certificate
+    from app.requests.models import CertificateRequest, IssuanceJob
+    from app.requests.jobs import enqueue_issuance
+
+    app = make_app(ISSUANCE_ASYNC=True, ISSUANCE_POLL_INTERVAL=0.05)
+    with app.app_context():
+        req_id = _pending_request()
+
+    client = app.test_client()
+    login(client)
+    assert client.post(f'/requests/approve/{req_id}').status_code == 302
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = client.get(f'/requests/status/{req_id}').get_json()
+        if status['job']['status'] == 'DONE':
+            break
+        time.sleep(0.05)
+    assert status['request_status'] == 'APPROVED', status
+    assert status['job']['attempts'] == 1                  # no retry needed
+    assert status['certificate_id'] is not None
+
+    # Enqueueing again is a no-op keyed on the request id
+    with app.app_context():
+        req = db.session.get(CertificateRequest, req_id)
+        job = enqueue_issuance(req, 'admin')
+        assert job.status == 'DONE'
+        assert IssuanceJob.query.count() == 1
+        assert Certificate.query.count() == 1
+
+
+def test_failed_issuance_retries_then_returns_request_to_pending(make_app, monkeypatch):
+    from app import db
+    from app.requests.models import CertificateRequest, IssuanceJob
+    from app.requests import jobs
+
+    app = make_app(ISSUANCE_ASYNC=True, ISSUANCE_MAX_ATTEMPTS=2, ISSUANCE_RETRY_DELAY=0)
+    monkeypatch.setattr(jobs.issuance_workers, 'notify', lambda: None)   # drive jobs by hand
+    monkeypatch.setattr(jobs, '_issue_for_request',
+                        lambda req, reviewer: (_ for _ in ()).throw(RuntimeError('HSM offline')))
+
+    with app.app_context():
+        req = db.session.get(CertificateRequest, _pending_request())
+        jobs.enqueue_issuance(req, 'admin')
+        assert req.status == 'ISSUING'
+
+        assert jobs.process_pending_jobs() == 2
+        job = IssuanceJob.query.one()
+        assert (job.status, job.attempts, job.last_error) == ('FAILED', 2, 'HSM offline')
+        assert db.session.get(CertificateRequest, req.id).status == 'PENDING'
+
+
+def test_status_endpoint_is_owner_or_admin_only(make_app):
+    from app import db
+    from app.auth.models import User, Role
+
+    app = make_app(ISSUANCE_ASYNC=False)
+    with app.app_context():
+        req_id = _pending_request()
+        bob = User(username='bob', email='bob@example.com',
+                   role=Role.query.filter_by(name='user').first(), is_active=True)
+        bob.set_password('Bob@12345678')
+        db.session.add(bob)
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, 'bob', 'Bob@12345678')
+    assert client.get(f'/requests/status/{req_id}').status_code == 403
+
+
+def test_failed_attempt_is_retried_by_the_workers(make_app, monkeypatch):
+    from app.requests import jobs
+
+    real  = jobs._issue_for_request
+    calls = []
+
+    def flaky(req, reviewer):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+        return real(req, reviewer)
+
+    monkeypatch.setattr(jobs, '_issue_for_request', flaky)
+    app = make_app(ISSUANCE_ASYNC=True, ISSUANCE_POLL_INTERVAL=0.05, ISSUANCE_RETRY_DELAY=0.2)
+    with app.app_context():
+        req_id = _pending_request()
+
+    client = app.test_client()
+    login(client)
+    client.post(f'/requests/approve/{req_id}')
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = client.get(f'/requests/status/{req_id}').get_json()
+        if status['job']['status'] == 'DONE':
+            break
+        time.sleep(0.05)
+    assert status['request_status'] == 'APPROVED', status
+    assert status['job']['attempts'] == 2
+    assert calls[1] - calls[0] >= 0.2                  # waited ISSUANCE_RETRY_DELAY
+
+
+def test_reject_only_applies_to_pending_requests(make_app):
+    from app import db
+    from app.requests.models import CertificateRequest
+
+    app = make_app(ISSUANCE_ASYNC=False)
+    with app.app_context():
+        approved_id, pending_id = _pending_request('Alice'), _pending_request('Bob')
+
+    client = app.test_client()
+    login(client)
+    client.post(f'/requests/approve/{approved_id}')
+    client.post(f'/requests/reject/{approved_id}', data={'reason': 'too late'})
+    client.post(f'/requests/reject/{pending_id}', data={'reason': 'unknown host'})
+
+    with app.app_context():
+        approved = db.session.get(CertificateRequest, approved_id)
+        assert (approved.status, approved.reject_reason) == ('APPROVED', None)
+        assert db.session.get(CertificateRequest, pending_id).status == 'REJECTED'
@@ -0,0 +1,67 @@
+import json
+import logging
+
+from conftest import login
+
+
+def _records(capsys):
+    from app.monitoring.logs import log_pipeline
+    log_pipeline.flush()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+
+def test_json_records_carry_request_id_user_and_serial(make_app, capsys):
+    client = make_app(LOG_FORMAT='json', REQUEST_SLOW_MS=0).test_client()
+    login(client)
+    capsys.readouterr()
+
+    resp = client.post('/issue', data={'owner_name': 'log-test'},
+                       headers={'X-Request-ID': 'req-abc.123'})
+    assert resp.headers['X-Request-ID'] == 'req-abc.123'
+
+    issued = [r for r in _records(capsys) if r['logger'] == 'app.ca.certificate']
+    assert len(issued) == 1
+    record = issued[0]
+    assert record['level'] == 'INFO' and record['msg'] == 'Issued certificate for log-test'
+    assert (record['request_id'], str(record['user_id'])) == ('req-abc.123', '1')
+    assert record['serial'].isdigit() and 'valid_to' in record
+
+    # Once Flask-Login has loaded the user, the username is logged too;
+    # a malformed id is replaced, not echoed
+    resp = client.get('/dashboard', headers={'X-Request-ID': 'bad id <script>'})
+    assert len(resp.headers['X-Request-ID']) == 32
+    timing = [r for r in _records(capsys) if r['logger'] == 'app.monitoring.timing']
+    assert timing[-1]['user'] == 'admin' and timing[-1]['route'] == 'dashboard.index'
+    assert timing[-1]['request_id'] == resp.headers['X-Request-ID']
+
+
+def test_rate_limit_suppresses_bursts_and_reports_the_count():
+    from app.monitoring.logs import _RateLimitFilter
+
+    now    = [0.0]
+    limit  = _RateLimitFilter(rate=1, burst=3, clock=lambda: now[0])
+    record = lambda msg, level=logging.INFO: logging.LogRecord('app.x', level, __file__, 1, msg, ('a',), None)
+
+    passed = [limit.filter(record('queue full %s')) for _ in range(10)]
+    assert passed.count(True) == 3
+    assert limit.filter(record('other %s'))                      # separate bucket per message
+    assert limit.filter(record('queue full %s', logging.ERROR))  # errors always pass
+
+    now[0] = 1.0
+    after = record('queue full %s')
+    assert limit.filter(after) and after.suppressed == 7
+
+
+def test_per_module_levels(make_app, capsys):
+    make_app(LOG_FORMAT='text', LOG_LEVEL='INFO', LOG_LEVELS='app.crypto=DEBUG, app.ca.certificate=WARNING')
+    assert logging.getLogger('app.crypto.key_manager').getEffectiveLevel() == logging.DEBUG
+    assert logging.getLogger('app.ca.certificate').getEffectiveLevel() == logging.WARNING
+    assert logging.getLogger('app.revocation').getEffectiveLevel() == logging.INFO
+
+    from app.monitoring.logs import log_pipeline
+    log_pipeline.flush()
+    out = capsys.readouterr().out
+    assert 'DEBUG   app.crypto.key_manager: Private key saved:' in out     # CA keys written at boot
+
+    make_app(LOG_LEVELS='')
+    assert logging.getLogger('app.ca.certificate').getEffectiveLevel() == logging.INFO
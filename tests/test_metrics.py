@@ -0,0 +1,64 @@
+import threading
+from conftest import login
+
+
+def test_registry_sums_per_thread_cells_and_exposes_prometheus_text():
+    from app.monitoring.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    latency  = registry.histogram('t_latency_seconds', 'test', buckets=(0.1, 1.0))
+    hits     = registry.counter('t_hits_total', 'test', ['route'])
+
+    def work():
+        for _ in range(1000):
+            latency.observe(0.05)
+            hits.labels(route='a"b').inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency.observe(5)
+
+    text = registry.expose()
+    assert '# TYPE t_latency_seconds histogram' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 4000' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 4001' in text
+    assert 't_latency_seconds_count 4001' in text
+    assert 't_hits_total{route="a\\"b"} 4000' in text
+    # Finished threads were folded into the retired totals, and stay counted
+    assert latency.snapshot()['count'] == 4001
+
+
+def test_metrics_endpoint_reports_pki_operations(make_app):
+    app    = make_app(METRICS_TOKEN='scrape-me')
+    client = app.test_client()
+    login(client)
+    client.post('/issue', data={'owner_name': 'metrics-alice'})
+    client.post('/revoke', data={'owner_name': 'metrics-alice', 'reason': 'Superseded'})
+    client.get('/ocsp/12345')
+
+    assert client.get('/metrics').status_code == 401
+    resp = client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+    assert resp.status_code == 200
+    assert resp.content_type.startswith('text/plain; version=0.0.4')
+
+    samples = {}
+    for line in resp.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+
+    assert samples['pki_issue_certificate_seconds_count'] >= 1
+    assert samples['pki_sign_seconds_count{kind="crl"}'] >= 1
+    assert samples['pki_ocsp_lookup_seconds_count'] >= 1
+    assert samples['pki_certificates_revoked_total'] >= 1
+    assert samples['pki_crl_entries'] == 1
+    assert samples['pki_db_queries_total{route="issue.issue"}'] > 0
+    assert 'pki_renewal_backlog' in samples and 'pki_audit_queue_depth' in samples
+
+
+def test_metrics_endpoint_can_be_disabled(make_app):
+    client = make_app(METRICS_ENABLED=False).test_client()
+    assert client.get('/metrics').status_code == 404
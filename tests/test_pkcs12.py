@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from conftest import login
+
+
+def _issue(app, owner):
+    from app import db
+    from app.ca.certificate import issue_certificate
+    from app.models.certificate_db import Certificate
+
+    with app.app_context():
+        pem, serial, valid_from, valid_to = issue_certificate(owner)
+        cert = Certificate(serial_number=serial, owner_name=owner, issued_by='test',
+                           valid_from=valid_from, valid_to=valid_to, cert_pem=pem, status='ACTIVE')
+        db.session.add(cert)
+        db.session.commit()
+        return cert.id, serial
+
+
+def test_download_builds_full_chain_and_caches(make_app):
+    from app import db
+    from app.auth.models import User, Role
+    from app.ca.pkcs12 import pkcs12_bundles
+
+    app = make_app(PKCS12_KDF_ROUNDS=1000)
+    cert_id, serial = _issue(app, 'alice')
+    client = app.test_client()
+    login(client)
+
+    resp = client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'correct horse'})
+    assert resp.status_code == 200 and resp.mimetype == 'application/x-pkcs12'
+    key, cert, chain = pkcs12.load_key_and_certificates(resp.data, b'correct horse')
+    assert str(cert.serial_number) == serial
+    assert key.public_key().public_numbers() == cert.public_key().public_numbers()
+    assert [c.subject for c in chain] == [cert.issuer, chain[0].issuer]      # intermediate, then root
+
+    again = client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'correct horse'})
+    assert again.data == resp.data and len(pkcs12_bundles.cache) == 1
+    other = client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'battery staple'})
+    assert other.status_code == 200 and len(pkcs12_bundles.cache) == 2
+    assert client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'short'}).status_code == 400
+
+    with app.app_context():
+        bob = User(username='bob', email='bob@example.com',
+                   role=Role.query.filter_by(name='user').first(), is_active=True)
+        bob.set_password('Bob@12345678')
+        db.session.add(bob)
+        db.session.commit()
+    bob_client = app.test_client()
+    login(bob_client, 'bob', 'Bob@12345678')
+    assert bob_client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'correct horse'}).status_code == 403
+
+
+def test_download_filename_is_sanitised(make_app):
+    from app import db
+    from app.models.certificate_db import Certificate
+
+    app = make_app(PKCS12_KDF_ROUNDS=1000)
+    cert_id, serial = _issue(app, 'alice')
+    client = app.test_client()
+    login(client)
+
+    def download_as(owner_name):
+        with app.app_context():     # owner_name is free text on the request form
+            db.session.get(Certificate, cert_id).owner_name = owner_name
+            db.session.commit()
+        return client.post(f'/view/{cert_id}/pkcs12', data={'passphrase': 'correct horse'})
+
+    resp = download_as('web "01"; x=1')
+    assert resp.headers['Content-Disposition'] == 'attachment; filename=web_01_x1.p12'
+    assert resp.headers['Cache-Control'] == 'no-store'
+    resp = download_as('Ωμέγα')
+    assert resp.headers['Content-Disposition'] == f'attachment; filename={serial}.p12'
+
+def test_only_the_requester_not_a_namesake_can_download(make_app):
+    from app import db
+    from app.auth.models import User
+    from app.requests.models import CertificateRequest
+
+    app = make_app(PKCS12_KDF_ROUNDS=1000, PKCS12_WORKERS=0)
+    cert_id, _ = _issue(app, 'erin')                     # issued by an admin, no request
+
+    client = app.test_client()
+    client.post('/auth/register', data={'username': 'erin', 'email': 'erin@evil.test',
+                                        'password': 'Erin@123456', 'confirm_password': 'Erin@123456'})
+    login(client, 'erin', 'Erin@123456')
+    form = {'passphrase': 'correct horse'}
+    assert client.post(f'/view/{cert_id}/pkcs12', data=form).status_code == 403
+    assert b'Download .p12' not in client.get(f'/view/{cert_id}').data
+
+    with app.app_context():
+        erin = User.query.filter_by(username='erin').one()
+        db.session.add(CertificateRequest(user_id=erin.id, owner_name='erin', status='APPROVED',
+                                          certificate_id=cert_id))
+        db.session.commit()
+    assert client.post(f'/view/{cert_id}/pkcs12', data=form).status_code == 200
+
+
+def test_legacy_key_used_only_if_it_matches(make_app):
+    from app import db
+    from app.ca.pkcs12 import pkcs12_bundles, KeyNotFound
+    from app.crypto.key_manager import generate_rsa_keypair, save_private_key
+    from app.crypto.key_store import key_store
+    from app.models.certificate_db import Certificate
+    from config import Config
+
+    app = make_app(PKCS12_KDF_ROUNDS=1000, PKCS12_WORKERS=0)
+    cert_id, serial = _issue(app, 'carol')
+    with app.app_context():
+        cert = db.session.get(Certificate, cert_id)
+        stored = serialization.load_pem_private_key(key_store.get(serial), Config.CA_KEY_PASSWORD)
+        key_store.delete(serial)
+
+        wrong, _ = generate_rsa_keypair()                 # a later re-issue overwrote the flat file
+        save_private_key(wrong, key_store.legacy_path('carol'), Config.CA_KEY_PASSWORD)
+        with pytest.raises(KeyNotFound):
+            pkcs12_bundles.bundle(cert, b'passphrase')
+
+        save_private_key(stored, key_store.legacy_path('carol'), Config.CA_KEY_PASSWORD)
+        key, _, _ = pkcs12.load_key_and_certificates(pkcs12_bundles.bundle(cert, b'passphrase'), b'passphrase')
+        assert key.private_numbers() == stored.private_numbers()
+
+        os.unlink(key_store.legacy_path('carol'))
+        with pytest.raises(KeyNotFound):
+            pkcs12_bundles.bundle(cert, b'another one')
+
+
+def test_kdf_queue_rejects_when_full_and_shares_identical_builds():
+    from app.ca.pkcs12 import KdfQueue, BundleQueueFull
+
+    queue = KdfQueue()
+    queue.configure(workers=1, depth=0)
+    results = []
+    try:
+        first = threading.Thread(target=lambda: results.append(queue.run('a', time.sleep, 0.5)))
+        twin  = threading.Thread(target=lambda: results.append(queue.run('a', time.sleep, 0.5)))
+        first.start()
+        deadline = time.monotonic() + 5
+        while not queue.stats()['inflight'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        twin.start()                                      # same key: waits on the same build
+        with pytest.raises(BundleQueueFull):
+            queue.run('b', time.sleep, 0.5)
+        first.join()
+        twin.join()
+        assert results == [None, None] and queue.stats()['inflight'] == 0
+        assert queue.run('b', abs, -3) == 3               # the slot was released
+    finally:
+        queue.stop()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from conftest import login
+
+
+def test_renew_expiring_batches_supersedes_and_publishes_crl_per_batch(app, monkeypatch):
+    from app import db
+    from app.models.certificate_db import Certificate, RevokedCertificate
+    from app.ca import renewal
+    from app.revocation import crl_manager
+
+    client = app.test_client()
+    login(client)
+    for name in ('soon1', 'soon2', 'later'):
+        client.post('/issue', data={'owner_name': name})
+
+    with app.app_context():
+        for cert in Certificate.query.filter(Certificate.owner_name.like('soon%')):
+            cert.valid_to = datetime.utcnow() + timedelta(days=3)
+        db.session.commit()
+        assert renewal.renewal_backlog(window_days=7) == 2
+
+        published = []
+        real_generate_crl = crl_manager.generate_crl
+        monkeypatch.setattr(crl_manager, 'generate_crl', lambda: published.append(1) or real_generate_crl())
+
+        result = renewal.renew_expiring(window_days=7, batch_size=1, rate=0)
+        assert result == {'renewed': 2, 'failed': 0, 'batches': 2, 'backlog': 0}
+        assert len(published) == 2
+
+        old = Certificate.query.filter_by(status='REVOKED').all()
+        assert {c.owner_name for c in old} == {'soon1', 'soon2'}
+        assert {c.revocation_reason for c in old} == {4}                 # superseded
+        assert RevokedCertificate.query.count() == 2
+        assert Certificate.query.filter_by(status='ACTIVE').count() == 3
+
+
+def test_renewal_skips_certificates_superseded_by_another_run(app, monkeypatch):
+    from app import db
+    from app.models.certificate_db import Certificate, RevokedCertificate
+    from app.ca import renewal
+    from app.crypto.key_store import key_store
+
+    client = app.test_client()
+    login(client)
+    for name in ('race1', 'race2'):
+        client.post('/issue', data={'owner_name': name})
+
+    with app.app_context():
+        for cert in Certificate.query.all():
+            cert.valid_to = datetime.utcnow() + timedelta(days=3)
+        db.session.commit()
+
+        real_reissue, discarded = renewal.reissue, []
+
+        def racing_reissue(old):
+            new = real_reissue(old)
+            if old.owner_name == 'race1':          # another process superseded it meanwhile
+                with db.engine.begin() as conn:
+                    conn.execute(db.update(Certificate).where(Certificate.id == old.id)
+                                 .values(status='REVOKED'))
+                discarded.append(new.serial_number)
+            return new
+
+        monkeypatch.setattr(renewal, 'reissue', racing_reissue)
+        result = renewal.renew_expiring(window_days=7, rate=0)
+
+        assert result['renewed'] == 1
+        assert Certificate.query.count() == 3                          # one replacement only
+        assert [r.owner_name for r in RevokedCertificate.query] == ['race2']
+        assert not key_store.exists(discarded[0])
+
+
+def test_renewal_lease_lets_one_process_run(app):
+    from app.models.lease import acquire_lease
+
+    now = datetime.utcnow()
+    with app.app_context():
+        assert acquire_lease('renewal', ttl=60, holder='web1:10', now=now)
+        assert not acquire_lease('renewal', ttl=60, holder='web2:20', now=now)
+        assert acquire_lease('renewal', ttl=60, holder='web1:10', now=now + timedelta(seconds=30))  # renewed
+        assert not acquire_lease('renewal', ttl=60, holder='web2:20', now=now + timedelta(seconds=80))
+        assert acquire_lease('renewal', ttl=60, holder='web2:20', now=now + timedelta(seconds=91))  # expired
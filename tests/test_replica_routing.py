@@ -0,0 +1,47 @@
+import shutil
+from datetime import datetime, timedelta
+
+from conftest import login
+
+
+def _add_cert(db, serial):
+    from app.models.certificate_db import Certificate
+    now = datetime.utcnow()
+    db.session.add(Certificate(
+        serial_number=serial, owner_name='replica-test', issued_by='test',
+        valid_from=now, valid_to=now + timedelta(days=30), cert_pem='-', status='ACTIVE'
+    ))
+    db.session.commit()
+
+
+def test_read_only_routes_use_replica_until_a_write(make_app, tmp_path):
+    primary = tmp_path / 'primary.db'
+    replica = tmp_path / 'replica.db'
+
+    # First boot creates schema + admin on the primary; snapshot it as the "replica"
+    make_app()
+    shutil.copy(primary, replica)
+
+    app = make_app(DATABASE_REPLICA_URLS=[f"sqlite:///{replica}"], DB_STICKY_SECONDS=60)
+    from app import db
+    with app.app_context():
+        _add_cert(db, '424242')
+
+    client = app.test_client()
+
+    # Replica has not "replicated" the new row yet → OCSP (read-only) says UNKNOWN
+    status = client.get('/ocsp/424242').get_json()['ocsp_response']['cert_status']
+    assert status['status'] == 'UNKNOWN'
+
+    # Logging in writes last_login → this session sticks to the primary
+    login(client)
+    status = client.get('/ocsp/424242').get_json()['ocsp_response']['cert_status']
+    assert status['status'] == 'GOOD'
+
+
+def test_pool_options_from_config(make_app):
+    app = make_app(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=1)
+    from app import db
+    with app.app_context():
+        assert db.engine.pool.size() == 3
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_pre_ping'] is True
@@ -0,0 +1,49 @@
+from conftest import login
+
+
+def _phases(header):
+    out = {}
+    for part in header.split(','):
+        name, *params = part.strip().split(';')
+        out[name] = next(float(p[4:]) for p in params if p.startswith('dur='))
+    return out
+
+
+def test_server_timing_splits_db_crypto_and_render(make_app):
+    app    = make_app(SERVER_TIMING_HEADER=True, REQUEST_SLOW_MS=0)
+    client = app.test_client()
+    login(client)
+
+    resp   = client.get('/crl')
+    phases = _phases(resp.headers['Server-Timing'])
+    assert set(phases) == {'db', 'crypto', 'render', 'app', 'total'}
+    assert phases['db'] > 0 and phases['crypto'] > 0 and phases['render'] > 0
+    assert phases['db'] + phases['crypto'] + phases['render'] <= phases['total'] + 0.5
+
+
+def test_profiler_samples_next_n_requests_to_one_route(make_app):
+    from app.monitoring.profiler import profiler
+
+    client = make_app().test_client()
+    login(client)
+    armed = client.post('/admin/profiler', json={
+        'endpoint': 'crl_ocsp.view_crl', 'requests': 2, 'interval_ms': 1,
+    }).get_json()
+    assert armed['active'] and armed['remaining'] == 2
+
+    for _ in range(3):
+        client.get('/crl')
+    client.get('/ocsp')                         # other routes are not captured
+
+    status = client.get('/admin/profiler?format=json').get_json()
+    assert (status['active'], status['captured'], status['remaining']) == (False, 2, 0)
+    assert status['samples'] > 0
+
+    resp = client.get('/admin/profiler/profile.folded')
+    assert 'crl_ocsp-view_crl.folded' in resp.headers['Content-Disposition']
+    lines = resp.get_data(as_text=True).splitlines()
+    assert all(line.startswith('root;') and line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('app.routes.crl_ocsp:view_crl' in line for line in lines)
+
+    assert client.post('/admin/profiler', json={'endpoint': 'nope'}).status_code == 400
+    profiler.stop()
@@ -0,0 +1,38 @@
+from cryptography import x509
+from sqlalchemy import event
+
+
+def test_revoke_denormalizes_status_for_single_query_lookups(app, client):
+    from app import db
+    from app.models.certificate_db import Certificate, RevokedCertificate
+    from app.revocation.ocsp import check_status_by_serial
+    from app.revocation.crl_manager import generate_crl
+
+    client.post('/issue', data={'owner_name': 'Alice'})
+    client.post('/revoke', data={'owner_name': 'Alice', 'reason': 'Key Compromise'})
+
+    with app.app_context():
+        cert = Certificate.query.filter_by(owner_name='Alice').one()
+        assert cert.status == 'REVOKED'
+        assert cert.revoked_at is not None
+        assert cert.revocation_reason == 1          # RFC 5280 keyCompromise
+        assert RevokedCertificate.query.filter_by(serial_number=cert.serial_number).count() == 1
+        serial = cert.serial_number
+        db.session.expunge_all()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            status = check_status_by_serial(serial)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert status['status'] == 'REVOKED'
+        assert status['reason'] == 'Key Compromise'
+        assert len(statements) == 1
+
+        crl = x509.load_pem_x509_crl(generate_crl().encode())
+        entry = crl.get_revoked_certificate_by_serial_number(int(serial))
+        assert entry.extensions.get_extension_for_class(x509.CRLReason).value.reason \
+            == x509.ReasonFlags.key_compromise
@@ -0,0 +1,159 @@
+import base64
+import datetime
+import os
+import threading
+import uuid
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+
+def _builder(int_cert):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    now = datetime.datetime(2026, 1, 1)
+    return (x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'splice')]))
+            .issuer_name(int_cert.subject)
+            .public_key(key.public_key())
+            .serial_number(123456789)
+            .not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=30)))
+
+
+def test_spliced_signature_matches_direct_signing(app):
+    """The token path (sign TBS, splice into DER) yields what builder.sign() would."""
+    from app.ca.signing import SigningBackend, FileSigningBackend
+
+    file_backend = FileSigningBackend()
+
+    class RawBackend(SigningBackend):
+        def sign(self, data, ca='intermediate'):
+            return file_backend.sign(data, ca)
+
+    raw = RawBackend()
+    with app.app_context():
+        int_cert = file_backend.certificate('intermediate')
+        builder  = _builder(int_cert)
+        spliced  = raw.sign_certificate(builder)
+        direct   = file_backend.sign_certificate(builder)
+        assert spliced.public_bytes(serialization.Encoding.DER) == direct.public_bytes(serialization.Encoding.DER)
+        spliced.verify_directly_issued_by(int_cert)
+
+        crl = raw.sign_crl(
+            x509.CertificateRevocationListBuilder()
+            .issuer_name(int_cert.subject)
+            .last_update(datetime.datetime(2026, 1, 1))
+            .next_update(datetime.datetime(2026, 1, 8)))
+        assert crl.is_signature_valid(int_cert.public_key())
+
+
+def test_ocsp_response_is_signed_by_intermediate(app):
+    from app.ca.signing import ca_certificate
+    from app.revocation.ocsp import build_ocsp_response, canonical_response_bytes
+
+    with app.app_context():
+        body = build_ocsp_response('424242')['ocsp_response']
+        int_cert = ca_certificate('intermediate')
+    int_cert.public_key().verify(base64.b64decode(body['signature']), canonical_response_bytes(body),
+                                 padding.PKCS1v15(), hashes.SHA256())
+    body['cert_status']['status'] = 'GOOD'     # tampering breaks it
+    with pytest.raises(Exception):
+        int_cert.public_key().verify(base64.b64decode(body['signature']), canonical_response_bytes(body),
+                                     padding.PKCS1v15(), hashes.SHA256())
+
+
+def test_file_backend_reads_certificate_without_the_key(app, monkeypatch):
+    """Chains and issuer names never decrypt the CA private key."""
+    from app.ca import signing
+
+    def no_key(*args, **kwargs):
+        raise AssertionError('certificate() decrypted the CA key')
+
+    monkeypatch.setattr(signing, 'load_ca_material', no_key)
+    with app.app_context():
+        cert = signing.FileSigningBackend().certificate('intermediate')
+    assert isinstance(cert, x509.Certificate)
+
+def test_session_pool_reuses_caps_and_discards():
+    from app.ca.signing import SessionPool
+
+    class FakeSession:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    opened = []
+
+    def opener():
+        opened.append(FakeSession())
+        return opened[-1]
+
+    pool = SessionPool(opener, size=2, timeout=0.05, discard_on=RuntimeError)
+    for _ in range(5):
+        with pool.session():
+            pass
+    assert len(opened) == 1                       # one session serves sequential signatures
+
+    with pool.session(), pool.session():
+        with pytest.raises(TimeoutError):         # both lent out, none may be opened
+            with pool.session():
+                pass
+    assert len(opened) == 2
+
+    with pytest.raises(RuntimeError):
+        with pool.session() as entry:
+            raise RuntimeError('token error')
+    assert entry.session.closed and pool.stats()['open'] == 1
+
+    with pytest.raises(ValueError):
+        with pool.session() as entry:
+            raise ValueError('no PKCS11 key label configured')
+    assert not entry.session.closed and pool.stats()['discarded'] == 1    # config error: kept
+
+    results = []
+
+    def sign():
+        with pool.session() as e:
+            results.append(e.session)
+    threads = [threading.Thread(target=sign) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 8 and pool.stats()['open'] <= 2
+
+
+@pytest.mark.skipif(not os.environ.get('PKCS11_MODULE') or not os.environ.get('PKCS11_PIN'),
+                    reason='set PKCS11_MODULE, PKCS11_PIN and PKCS11_TOKEN_LABEL for a SoftHSM token')
+def test_pkcs11_backend_issues_with_token_key(make_app):
+    pytest.importorskip('pkcs11')
+    from app.ca.root_ca import load_ca_material
+    from app.ca.signing import ca_certificate, ca_paths, get_backend, make_backend
+    from app.ca.certificate import issue_certificate
+    from app.revocation.crl_manager import generate_crl
+
+    suffix = uuid.uuid4().hex[:8]
+    labels = {'PKCS11_ROOT_KEY_LABEL': f'test-root-{suffix}',
+              'PKCS11_INTERMEDIATE_KEY_LABEL': f'test-int-{suffix}',
+              'PKCS11_TOKEN_LABEL': os.environ.get('PKCS11_TOKEN_LABEL', 'pki-advanced'),
+              'PKCS11_MODULE': os.environ['PKCS11_MODULE'], 'PKCS11_PIN': os.environ['PKCS11_PIN']}
+
+    app = make_app(**labels)                      # file backend generates the hierarchy
+    with app.app_context():
+        token = make_backend({**app.config, 'SIGNING_BACKEND': 'pkcs11'})
+        for ca in ('root', 'intermediate'):
+            token.import_key(ca, load_ca_material(*ca_paths(ca))[0])
+        token.close()
+
+    app = make_app(SIGNING_BACKEND='pkcs11', **labels)
+    with app.app_context():
+        assert get_backend().name == 'pkcs11'
+        pem = issue_certificate('hsm-user')[0]
+        x509.load_pem_x509_certificate(pem.encode()).verify_directly_issued_by(ca_certificate('intermediate'))
+        crl = x509.load_pem_x509_crl(generate_crl().encode())
+        assert crl.is_signature_valid(ca_certificate('intermediate').public_key())
+        assert get_backend().pool.stats()['opened'] == 1